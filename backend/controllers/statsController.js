@@ -50,6 +50,13 @@ const predictNextSeason = async (req, res) => {
     try {
         const { playerId } = req.params;
         const playerModel = new Player(req.db);
+
+        // Precomputed by scripts/feature_store.py; one primary key lookup
+        const features = await playerModel.getPlayerFeatures(playerId);
+        if (features) {
+            return res.json({ predictions: predictionsFromFeatures(features) });
+        }
+
         const seasons = await playerModel.getPlayerSeasons(playerId);
         
         if (!seasons || seasons.length === 0) {
@@ -128,6 +135,15 @@ const generatePredictions = (seasons) => {
     return predictions;
 };
 
+const predictionsFromFeatures = (features) => {
+    const stats = ['pts', 'ast', 'reb', 'stl', 'blk', 'fg_pct', 'fg3_pct', 'ft_pct'];
+    const predictions = {};
+    stats.forEach(stat => {
+        predictions[stat] = features[`${stat}_predicted`];
+    });
+    return predictions;
+};
+
 const calculateTrend = (seasons, stat) => {
     if (seasons.length < 2) return 0;
     
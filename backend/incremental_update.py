@@ -1,13 +1,24 @@
 from nba_api.stats.static import players, teams
-from nba_api.stats.endpoints import playercareerstats, commonplayerinfo, playerprofilev2
+from nba_api.stats.endpoints import playercareerstats, commonplayerinfo, playerprofilev2, leaguegamelog
+from nba_api.stats.library.http import NBAStatsHTTP
+import os
+import sys
 import sqlite3
 import json
 import time
+import calendar
 import logging
 from datetime import datetime, timedelta
 import asyncio
 import aiohttp
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes'))
+from response_cache import ResponseCache, install_cache, CACHE_FILE
+from db_writer import GroupCommitWriter, DEFAULT_DURABILITY
+import metrics
+from player_stats import init_player_stats_table, stats_write_ops, SEASON_SCOPE, CAREER_SCOPE
+from profile_cache import init_profile_table, invalidate_ops, build_profiles
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,12 +26,118 @@ logging.basicConfig(
     filename='nba_updates.log'
 )
 
+class PlayerPayloads(NamedTuple):
+    """Raw JSON bodies for one player, exactly as returned by the API."""
+    player_info: str
+    career_stats: str
+    profile: str
+
+class PlayerRecord(NamedTuple):
+    """Everything update_player writes for one player, parsed once."""
+    player_id: int
+    full_name: str
+    team: str
+    position: str
+    jersey_number: str
+    current_season: Dict
+    career_totals: Dict
+
+def first_row(raw: Dict, result_set: str) -> Dict:
+    """Return the first row of a named result set as a dict, or {} if it is empty."""
+    return row_at(raw, result_set, 0)
+
+def row_at(raw: Dict, result_set: str, index: int) -> Dict:
+    for data_set in raw.get('resultSets', []):
+        if data_set.get('name') == result_set:
+            rows = data_set.get('rowSet') or []
+            if not rows:
+                return {}
+            return dict(zip(data_set['headers'], rows[index]))
+    return {}
+
+def fetch_raw(endpoint_class, **parameters) -> str:
+    """Send one request without letting nba_api parse the body; runs on a worker thread."""
+    endpoint = endpoint_class(get_request=False, **parameters)
+    started = time.perf_counter()
+    try:
+        response = NBAStatsHTTP().send_api_request(
+            endpoint=endpoint.endpoint,
+            parameters=endpoint.parameters,
+            proxy=endpoint.proxy,
+            headers=endpoint.headers,
+            timeout=endpoint.timeout,
+        )
+        body = response.get_response()
+    except Exception as e:
+        metrics.observe_request('update', endpoint.endpoint, started, e)
+        raise
+    metrics.observe_request('update', endpoint.endpoint, started)
+    return body
+
+def parse_player_payloads(player: Dict, payloads: PlayerPayloads) -> PlayerRecord:
+    """Decode each payload once and keep only the rows update_player stores."""
+    info = first_row(json.loads(payloads.player_info), 'CommonPlayerInfo')
+    career_totals = first_row(json.loads(payloads.career_stats), 'CareerTotalsRegularSeason')
+    # Season rows come oldest first, so the last one is the current season
+    current_season = row_at(json.loads(payloads.profile), 'SeasonTotalsRegularSeason', -1)
+    return PlayerRecord(
+        player_id=player['id'],
+        full_name=player['full_name'],
+        team=info.get('TEAM_NAME', 'N/A'),
+        position=info.get('POSITION', 'N/A'),
+        jersey_number=info.get('JERSEY', 'N/A'),
+        current_season=current_season,
+        career_totals=career_totals,
+    )
+
+PLAYER_UPSERT_SQL = """
+    INSERT OR REPLACE INTO players 
+    (id, full_name, team, position, jersey_number, last_updated)
+    VALUES (?, ?, ?, ?, ?, datetime('now'))
+"""
+
+def record_write_ops(record: PlayerRecord) -> List:
+    """The (sql, rows) operations that persist one PlayerRecord."""
+    return [(PLAYER_UPSERT_SQL, [(
+        record.player_id,
+        record.full_name,
+        record.team,
+        record.position,
+        record.jersey_number
+    )])] + stats_write_ops(record.player_id, {
+        SEASON_SCOPE: record.current_season,
+        CAREER_SCOPE: record.career_totals,
+    }) + invalidate_ops([record.player_id])
+
+def fetch_last_game_dates() -> Dict[int, int]:
+    """One league-wide game log request: each player's latest game date as a UTC epoch."""
+    raw = json.loads(fetch_raw(leaguegamelog.LeagueGameLog, player_or_team_abbreviation='P'))
+    latest = {}
+    for data_set in raw.get('resultSets', []):
+        if data_set.get('name') != 'LeagueGameLog':
+            continue
+        player_col = data_set['headers'].index('PLAYER_ID')
+        date_col = data_set['headers'].index('GAME_DATE')
+        for row in data_set.get('rowSet') or []:
+            player_id, game_date = row[player_col], row[date_col][:10]
+            if game_date > latest.get(player_id, ''):
+                latest[player_id] = game_date
+    return {player_id: calendar.timegm(time.strptime(game_date, '%Y-%m-%d'))
+            for player_id, game_date in latest.items()}
+
 class NBADatabaseUpdater:
-    def __init__(self, db_path: str = "nba_stats.db"):
+    def __init__(self, db_path: str = "nba_stats.db", cache_path: str = CACHE_FILE,
+                 durability: str = DEFAULT_DURABILITY):
         self.db_path = db_path
+        self.durability = durability
+        self.writer = None
         self.active_players_cache = {}
         self.update_interval = timedelta(hours=24)
         self.rate_limit_delay = 1.2  # Seconds between API calls
+        self.timings = []  # (parse seconds, wall seconds) per updated player
+        self.response_cache = ResponseCache(cache_path) if cache_path else None
+        if self.response_cache is not None:
+            install_cache(NBAStatsHTTP, self.response_cache)
 
     async def get_active_players(self) -> List[Dict]:
         """Fetch all currently active NBA players."""
@@ -43,89 +160,135 @@ class NBADatabaseUpdater:
             logging.error(f"Error fetching stats for player {player_id}: {e}")
             return None
 
-    async def needs_update(self, cursor, player_id: int) -> bool:
-        """Check if a player needs to be updated based on last update time."""
-        cursor.execute(
-            "SELECT last_updated FROM players WHERE id = ?",
-            (player_id,)
-        )
-        result = cursor.fetchone()
-        
-        if not result:
-            return True
-        
-        last_updated = datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S')
-        return datetime.now() - last_updated > self.update_interval
+    def plan_updates(self, conn, candidates: List[Dict], last_games: Optional[Dict[int, int]] = None) -> List[Dict]:
+        """Build the work queue from one query: due players only, those with games since
+        their last update first, then stalest first (never updated counts as stalest)."""
+        # datetime('now') stores UTC, and strftime('%s') reads it back as UTC epoch seconds
+        last_updated = dict(conn.execute(
+            "SELECT id, CAST(strftime('%s', last_updated) AS INTEGER) FROM players"
+        ).fetchall())
+        cutoff = time.time() - self.update_interval.total_seconds()
+        last_games = last_games or {}
+
+        queue = []
+        for player in candidates:
+            updated_at = last_updated.get(player['id'])
+            if updated_at is not None and updated_at > cutoff:
+                continue
+            last_game = last_games.get(player['id'])
+            # Game dates have no time, so a game on the update's day counts as possibly after it
+            played_since = last_game is not None and (updated_at is None or last_game + 86400 > updated_at)
+            staleness = updated_at if updated_at is not None else float('-inf')
+            queue.append((not played_since, staleness, player))
+
+        queue.sort(key=lambda item: (item[0], item[1]))
+        return [player for _, _, player in queue]
+
+    async def fetch_player_payloads(self, player_id: int) -> PlayerPayloads:
+        """Fetch stage: blocking HTTP calls run in worker threads, pacing uses async sleeps."""
+        bodies = []
+        for endpoint_class in (commonplayerinfo.CommonPlayerInfo,
+                               playercareerstats.PlayerCareerStats,
+                               playerprofilev2.PlayerProfileV2):
+            bodies.append(await asyncio.to_thread(fetch_raw, endpoint_class, player_id=player_id))
+            await metrics.async_sleep(self.rate_limit_delay, job='update', reason='pacing')
+        return PlayerPayloads(*bodies)
+
+    def write_player(self, conn, record: PlayerRecord):
+        """Write a record directly, for callers running without the group-commit writer."""
+        with metrics.timer('db_commit_seconds', job='update', writer='direct'), conn:
+            for sql, rows in record_write_ops(record):
+                conn.executemany(sql, rows)
 
     async def update_player(self, conn, player: Dict):
         """Update a single player's information and stats."""
         try:
-            cursor = conn.cursor()
-            
-            if not await self.needs_update(cursor, player['id']):
-                return False
+            started = time.perf_counter()
+            payloads = await self.fetch_player_payloads(player['id'])
 
-            # Fetch current player info
-            player_info = commonplayerinfo.CommonPlayerInfo(player_id=player['id'])
-            time.sleep(self.rate_limit_delay)
-            
-            # Fetch detailed stats
-            career_stats = playercareerstats.PlayerCareerStats(player_id=player['id'])
-            time.sleep(self.rate_limit_delay)
-
-            # Get current season averages
-            profile = playerprofilev2.PlayerProfileV2(player_id=player['id'])
-            time.sleep(self.rate_limit_delay)
-
-            # Prepare player data
-            stats_data = {
-                'current_season': profile.get_normalized_dict().get('SeasonAverages', [{}])[0],
-                'career_stats': career_stats.get_normalized_dict().get('CareerTotalsRegularSeason', [{}])[0],
-                'career_totals': career_stats.get_normalized_dict().get('CareerTotalsRegularSeason', [{}])[0]
-            }
-
-            # Update database
-            cursor.execute("""
-                INSERT OR REPLACE INTO players 
-                (id, full_name, team, position, jersey_number, stats, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
-            """, (
-                player['id'],
-                player['full_name'],
-                player_info.get_normalized_dict().get('CommonPlayerInfo', [{}])[0].get('TEAM_NAME', 'N/A'),
-                player_info.get_normalized_dict().get('CommonPlayerInfo', [{}])[0].get('POSITION', 'N/A'),
-                player_info.get_normalized_dict().get('CommonPlayerInfo', [{}])[0].get('JERSEY', 'N/A'),
-                json.dumps(stats_data)
-            ))
-
-            conn.commit()
+            parse_started = time.perf_counter()
+            record = parse_player_payloads(player, payloads)
+            parse_time = time.perf_counter() - parse_started
+            metrics.inc('work_seconds_total', parse_time, job='update', stage='parse')
+
+            # Write stage: a full writer queue blocks the worker thread, not the loop
+            if self.writer is not None:
+                await asyncio.to_thread(self.writer.submit, record_write_ops(record))
+            else:
+                await asyncio.to_thread(self.write_player, conn, record)
+
+            wall_time = time.perf_counter() - started
+            self.timings.append((parse_time, wall_time))
+            metrics.observe('player_seconds', wall_time, job='update')
+            logging.debug(f"{player['full_name']}: parse {parse_time * 1000:.2f} ms, wall {wall_time:.2f} s")
             return True
 
         except Exception as e:
             logging.error(f"Error updating player {player['full_name']}: {e}")
+            metrics.inc('player_errors_total', job='update', error=type(e).__name__)
             conn.rollback()
             return False
 
+    def timing_summary(self) -> Optional[Dict]:
+        """Mean/max parse and wall time per updated player."""
+        if not self.timings:
+            return None
+        parse_times = [parse for parse, _ in self.timings]
+        wall_times = [wall for _, wall in self.timings]
+        return {
+            'players': len(self.timings),
+            'mean_parse_ms': sum(parse_times) / len(parse_times) * 1000,
+            'max_parse_ms': max(parse_times) * 1000,
+            'mean_wall_s': sum(wall_times) / len(wall_times),
+            'max_wall_s': max(wall_times),
+        }
+
     async def run_incremental_update(self):
         """Run the incremental update process."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.writer = GroupCommitWriter(self.db_path, durability=self.durability, job='update')
             active_players = await self.get_active_players()
+
+            try:
+                last_games = await asyncio.to_thread(fetch_last_game_dates)
+            except Exception as e:
+                logging.warning(f"Could not fetch league game log, ordering by staleness only: {e}")
+                last_games = {}
+
+            planning_started = time.perf_counter()
+            work_queue = self.plan_updates(conn, active_players, last_games)
+            planning_time = time.perf_counter() - planning_started
             
-            logging.info(f"Starting incremental update for {len(active_players)} active players")
+            logging.info(f"Starting incremental update for {len(work_queue)} of {len(active_players)} active players "
+                         f"(planned in {planning_time * 1000:.1f} ms)")
             
             updated_count = 0
-            for player in active_players:
+            for player in work_queue:
                 if await self.update_player(conn, player):
                     updated_count += 1
                     logging.info(f"Updated {player['full_name']}")
-                await asyncio.sleep(self.rate_limit_delay)
+                await metrics.async_sleep(self.rate_limit_delay, job='update', reason='pacing')
 
             logging.info(f"Incremental update complete. Updated {updated_count} players")
+            # Updated players' profiles were invalidated with their rows
+            await asyncio.to_thread(self.writer.flush)
+            await asyncio.to_thread(build_profiles, self.db_path)
+            summary = self.timing_summary()
+            if summary:
+                logging.info(f"Per-player timings: {summary}")
+            if self.response_cache is not None:
+                logging.info(f"Response cache: {self.response_cache.stats()}")
 
         except Exception as e:
             logging.error(f"Error in incremental update: {e}")
         finally:
+            if self.writer is not None:
+                self.writer.close()
+                logging.info(f"Writer: {self.writer.summary()}")
+                self.writer = None
+            metrics.set_gauge('last_run_timestamp_seconds', time.time(), job='update')
+            metrics.flush()
             conn.close()
 
     def setup_database(self):
@@ -152,6 +315,8 @@ class NBADatabaseUpdater:
                 last_updated DATETIME
             )
         """)
+        init_player_stats_table(cursor)
+        init_profile_table(cursor)
         
         conn.commit()
         conn.close()
@@ -7,6 +7,13 @@ function normalizeText(text) {
                .trim();
 }
 
+// Columns of player_stats that updatePlayerStats accepts (see routes/player_stats.py)
+const STAT_COLUMNS = [
+    'season_id', 'team_abbreviation', 'player_age', 'gp', 'gs', 'min', 'fgm', 'fga', 'fg_pct',
+    'fg3m', 'fg3a', 'fg3_pct', 'ftm', 'fta', 'ft_pct', 'oreb', 'dreb', 'reb', 'ast', 'stl',
+    'blk', 'tov', 'pf', 'pts'
+];
+
 class Player {
     constructor(db) {
         this.db = db;
@@ -159,6 +166,21 @@ class Player {
         });
     }
 
+    async getPlayerFeatures(playerId) {
+        return new Promise((resolve, reject) => {
+            this.db.get(
+                'SELECT * FROM player_features WHERE player_id = ?',
+                [playerId],
+                (err, row) => {
+                    // Databases built before the feature store have no such table
+                    if (err && /no such table/.test(err.message)) resolve(null);
+                    else if (err) reject(err);
+                    else resolve(row || null);
+                }
+            );
+        });
+    }
+
     async getSeasonStats(playerId, seasonId) {
         return new Promise((resolve, reject) => {
             this.db.get(
@@ -173,18 +195,39 @@ class Player {
     }
 
     async updatePlayerStats(playerId, stats) {
+        // Typed columns of player_stats; API payloads use the same names in upper case
+        const columns = STAT_COLUMNS
+            .filter(name => stats[name] !== undefined || stats[name.toUpperCase()] !== undefined);
+        const values = columns.map(name => stats[name] !== undefined ? stats[name] : stats[name.toUpperCase()]);
+        const perMode = stats.per_mode || 'Totals';
         return new Promise((resolve, reject) => {
-            this.db.run(
-                `UPDATE players SET 
-                stats = ?,
-                last_updated = datetime('now')
-                WHERE id = ?`,
-                [JSON.stringify(stats), playerId],
-                (err) => {
-                    if (err) reject(err);
-                    else resolve();
-                }
-            );
+            this.db.serialize(() => {
+                this.db.run(
+                    `INSERT OR REPLACE INTO player_stats
+                    (player_id, scope, per_mode${columns.map(name => `, ${name}`).join('')}, last_updated)
+                    VALUES (?, 'season', ?${columns.map(() => ', ?').join('')}, datetime('now'))`,
+                    [playerId, perMode, ...values],
+                    (err) => {
+                        if (err) reject(err);
+                    }
+                );
+                // The precomputed /players document now has stale stats; the route falls back to a live query
+                this.db.run(
+                    'DELETE FROM player_profiles WHERE player_id = ?',
+                    [playerId],
+                    (err) => {
+                        if (err) reject(err);
+                    }
+                );
+                this.db.run(
+                    `UPDATE players SET last_updated = datetime('now') WHERE id = ?`,
+                    [playerId],
+                    (err) => {
+                        if (err) reject(err);
+                        else resolve();
+                    }
+                );
+            });
         });
     }
 
@@ -0,0 +1,203 @@
+import re
+import queue
+import sqlite3
+import threading
+import time
+import logging
+
+import metrics
+
+MAX_QUEUE_SIZE = 256
+MAX_BATCH_SIZE = 64
+MAX_BATCH_LATENCY = 0.5  # Seconds a record may wait for its batch to fill up
+
+# How hard each commit tries to reach disk; WAL keeps readers unblocked in all modes
+DURABILITY_LEVELS = {
+    'full': 'FULL',      # fsync on every group commit
+    'normal': 'NORMAL',  # fsync at checkpoints; a power cut can lose the last few commits
+    'off': 'OFF',        # leave it to the OS; fastest, for rebuildable data only
+}
+DEFAULT_DURABILITY = 'normal'
+
+_STOP = object()
+
+def statement_table(sql):
+    """Table an INSERT/UPDATE/DELETE statement writes to, for metric labels."""
+    match = re.search(r'\b(?:INTO|UPDATE|FROM)\s+(\w+)', sql, re.IGNORECASE)
+    return match.group(1) if match else 'unknown'
+
+class GroupCommitWriter:
+    """Single writer thread that owns the SQLite connection and commits records in groups.
+
+    A record is a list of (sql, rows) operations that must land together, e.g. a
+    player row plus all of its seasons. submit() blocks while the queue is full,
+    which pushes back on producers faster than the disk. Records are committed
+    together once MAX_BATCH_SIZE have queued up or the oldest has waited
+    MAX_BATCH_LATENCY seconds.
+    """
+
+    def __init__(self, db_path, durability=DEFAULT_DURABILITY, max_queue_size=MAX_QUEUE_SIZE,
+                 max_batch_size=MAX_BATCH_SIZE, max_batch_latency=MAX_BATCH_LATENCY,
+                 foreign_keys=False, job='db_writer'):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability {durability!r}, expected one of {sorted(DURABILITY_LEVELS)}")
+        self.db_path = db_path
+        self.durability = durability
+        self.foreign_keys = foreign_keys
+        self.job = job  # Metrics label
+        self.max_batch_size = max_batch_size
+        self.max_batch_latency = max_batch_latency
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.stats = {'records': 0, 'batches': 0, 'failed': 0, 'commit_seconds': 0.0}
+        self.ready = threading.Event()
+        self.startup_error = None
+        self.error = None  # Unexpected failure of the writer thread; every later record fails with it
+        self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.startup_error is not None:
+            raise self.startup_error
+
+    def submit(self, operations, on_done=None):
+        """Queue one record; on_done(error) runs on the writer thread after it commits or fails."""
+        if self.error is not None:
+            raise self.error
+        if not self.thread.is_alive():
+            raise RuntimeError("Writer thread is not running")
+        self.queue.put((operations, on_done))
+
+    def flush(self):
+        """Block until everything submitted so far has been committed; raises if the writer thread failed."""
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA synchronous = {DURABILITY_LEVELS[self.durability]}')
+        if self.foreign_keys:
+            conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            self.startup_error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        try:
+            stopping = False
+            while not stopping:
+                first = self.queue.get()
+                if first is _STOP:
+                    self.queue.task_done()
+                    break
+                batch = [first]
+                deadline = time.monotonic() + self.max_batch_latency
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        self.queue.task_done()
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                try:
+                    if self.error is None:
+                        self._commit(conn, batch)
+                    else:
+                        self._fail(batch, self.error)
+                except Exception as e:
+                    # Not a rejected record but the writer itself; keep draining so flush() can't hang
+                    logging.error(f"Writer thread failed: {e}")
+                    self.error = e
+                    self._fail(batch, e)
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        started = time.perf_counter()
+        try:
+            with conn:
+                self._execute(conn, [operations for operations, _ in batch])
+            errors = [None] * len(batch)
+        except Exception as e:
+            # One bad record shouldn't sink the whole group; retry them one by one
+            logging.warning(f"Group commit of {len(batch)} records failed ({e}), retrying individually")
+            errors = []
+            for operations, _ in batch:
+                try:
+                    with conn:
+                        self._execute(conn, [operations])
+                    errors.append(None)
+                except Exception as record_error:
+                    errors.append(record_error)
+
+        elapsed = time.perf_counter() - started
+        self.stats['commit_seconds'] += elapsed
+        metrics.observe('db_commit_seconds', elapsed, job=self.job, writer='group')
+        if metrics.enabled():
+            for (operations, _), error in zip(batch, errors):
+                if error is None:
+                    for sql, rows in operations:
+                        metrics.inc('rows_written_total', len(rows), job=self.job, table=statement_table(sql))
+        self.stats['batches'] += 1
+        self.stats['records'] += len(batch)
+        self.stats['failed'] += sum(1 for error in errors if error is not None)
+
+        self._notify(batch, errors)
+
+    def _fail(self, batch, error):
+        self.stats['failed'] += len(batch)
+        self._notify(batch, [error] * len(batch))
+
+    @staticmethod
+    def _notify(batch, errors):
+        for (_, on_done), error in zip(batch, errors):
+            if error is not None:
+                logging.error(f"Failed to write record: {error}")
+            if on_done is not None:
+                try:
+                    on_done(error)
+                except Exception as e:
+                    logging.error(f"Writer callback failed: {e}")
+
+    @staticmethod
+    def _execute(conn, records):
+        """Run the batch's statements in submission order, one executemany per run of the same SQL.
+
+        Only adjacent operations are merged, so dependent writes (a DELETE
+        before its re-INSERT, say) run in the order they were submitted.
+        """
+        runs = []
+        for operations in records:
+            for sql, rows in operations:
+                if runs and runs[-1][0] == sql:
+                    runs[-1][1].extend(rows)
+                else:
+                    runs.append((sql, list(rows)))
+        for sql, rows in runs:
+            if rows:
+                conn.executemany(sql, rows)
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats['mean_batch_size'] = stats['records'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
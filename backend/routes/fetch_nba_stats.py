@@ -1,16 +1,28 @@
 from nba_api.stats.static import players
 from nba_api.stats.endpoints import playercareerstats, commonplayerinfo
+from nba_api.stats.library.http import NBAStatsHTTP
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import argparse
+from queue import Queue, Empty
 import sys
 import json
 import sqlite3
 import time
 import math
 import random
+import socket
+import threading
 from requests.exceptions import RequestException, Timeout, ConnectionError
 import logging
 from datetime import datetime, timedelta
 from fake_useragent import UserAgent
 import os
+from rate_limiter import AdaptiveTokenBucket, is_throttle_error
+from response_cache import ResponseCache, install_cache, CACHE_FILE
+from db_writer import GroupCommitWriter, DURABILITY_LEVELS, DEFAULT_DURABILITY
+import metrics
+from player_stats import init_player_stats_table, stats_write_ops, SEASON_SCOPE
+from profile_cache import init_profile_table, invalidate_ops, build_profiles
 
 # Set up logging
 logging.basicConfig(
@@ -20,16 +32,25 @@ logging.basicConfig(
 )
 
 DB_FILE = "nba_stats.db"
-PROGRESS_FILE = "fetch_progress.json"
+PROGRESS_FILE = "fetch_progress.json"  # Legacy tracker file, imported once if present
+RETRY_PASS_DELAY = 300
+CLAIM_LEASE = 600  # Seconds before another worker may take over an unfinished claim
 DAILY_LIMIT = 300
+MAX_CONCURRENT_PLAYERS = 4
+REQUEST_TIMEOUT = 120
+RETRY_BACKOFF_BASE = 5
+RETRY_BACKOFF_CAP = 300
 
 class NBAAPIHandler:
-    def __init__(self):
+    def __init__(self, limiter=None, cache=None):
         self.user_agent = UserAgent()
+        self.limiter = limiter or AdaptiveTokenBucket()
+        self.cache = cache
         self.requests_made = 0
-        self.max_requests = 50
-        self.reset_interval = 300
-        self.last_request_time = datetime.now()
+        self.counter_lock = threading.Lock()
+        if cache is not None:
+            # The caching session takes a limiter token only for real network calls
+            install_cache(NBAStatsHTTP, cache, before_request=self.handle_rate_limit)
 
     def get_headers(self):
         return {
@@ -43,57 +64,170 @@ class NBAAPIHandler:
             'Referer': 'https://www.nba.com/',
         }
 
-    def should_reset_counter(self):
-        time_since_last = (datetime.now() - self.last_request_time).total_seconds()
-        return time_since_last >= self.reset_interval
-
     def handle_rate_limit(self):
-        if self.requests_made >= self.max_requests:
-            wait_time = random.uniform(self.reset_interval, self.reset_interval * 1.5)
-            logging.info(f"Rate limit approached. Waiting {wait_time:.2f} seconds...")
-            time.sleep(wait_time)
-            self.requests_made = 0
-            self.last_request_time = datetime.now()
+        """Wait for a token from the shared limiter before sending a request."""
+        waited = self.limiter.acquire()
+        with self.counter_lock:
+            self.requests_made += 1
+        if waited:
+            metrics.inc('sleep_seconds_total', waited, job='fetch', reason='rate_limit')
+        if waited > 1:
+            logging.debug(f"Rate limiter held request for {waited:.2f} seconds")
+
+    def record_success(self):
+        self.limiter.record_success()
+
+    def acquire_slot(self):
+        """Rate limit a request unless the cache session is already doing it."""
+        if self.cache is None:
+            self.handle_rate_limit()
+
+    def record_failure(self, error):
+        if is_throttle_error(error):
+            self.limiter.record_throttle()
 
 class ProgressTracker:
-    def __init__(self):
-        self.progress_file = PROGRESS_FILE
-        self.load_progress()
-
-    def load_progress(self):
-        if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r') as f:
-                data = json.load(f)
-                self.last_processed_id = data.get('last_processed_id', 0)
-                self.daily_count = data.get('daily_count', 0)
-                self.last_update_date = data.get('last_update_date', None)
-        else:
-            self.last_processed_id = 0
-            self.daily_count = 0
-            self.last_update_date = None
-
-        # Reset daily count if it's a new day
-        current_date = datetime.now().strftime('%Y-%m-%d')
-        if self.last_update_date != current_date:
-            self.daily_count = 0
-            self.last_update_date = current_date
-
-    def save_progress(self):
-        with open(self.progress_file, 'w') as f:
-            json.dump({
-                'last_processed_id': self.last_processed_id,
-                'daily_count': self.daily_count,
-                'last_update_date': self.last_update_date
-            }, f)
-
-    def update_progress(self, player_id):
-        self.last_processed_id = player_id
-        self.daily_count += 1
-        self.save_progress()
+    """Per-player progress kept in the fetch_progress table of the stats database.
+
+    A player is 'claimed' by a worker while in flight and becomes 'done' (or
+    'missing' when the API has no stats for them) in the same transaction that
+    writes their data, so a crash can neither lose nor double-count a player.
+    Claims carry a lease so several workers, in this or other processes, can
+    share one crawl; claims left by dead workers are reclaimed.
+    """
+
+    FINISHED = ('done', 'missing')
+
+    def __init__(self, db_path=DB_FILE, worker_id=None, lease=CLAIM_LEASE):
+        self.db_path = db_path
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = lease
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS fetch_progress (
+                    player_id INTEGER PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_fetch_progress_status ON fetch_progress(status, updated_at)'
+            )
+        self.import_legacy_progress()
+        self.compact()
+
+    def import_legacy_progress(self):
+        """Carry over fetch_progress.json from the old tracker, which skipped every id up to last_processed_id."""
+        if not os.path.exists(PROGRESS_FILE):
+            return
+        with open(PROGRESS_FILE, 'r') as f:
+            last_processed_id = json.load(f).get('last_processed_id', 0)
+        ids = [(p['id'], time.time()) for p in players.get_players() if p['id'] <= last_processed_id]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO fetch_progress (player_id, status, updated_at) VALUES (?, 'done', ?)",
+                ids
+            )
+        os.replace(PROGRESS_FILE, PROGRESS_FILE + '.migrated')
+        logging.info(f"Imported {len(ids)} finished players from {PROGRESS_FILE}")
+
+    def worker_is_dead(self, worker):
+        """Only provable for workers on this host; others fall back to the lease."""
+        host, _, pid = (worker or '').rpartition(':')
+        if os.name != 'posix' or host != socket.gethostname() or not pid.isdigit():
+            return False
+        if int(pid) == os.getpid():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def compact(self):
+        """Release claims whose worker died or whose lease ran out, and truncate the WAL."""
+        cutoff = time.time() - self.lease
+        claims = self.conn.execute(
+            "SELECT player_id, worker, updated_at FROM fetch_progress WHERE status = 'claimed'"
+        ).fetchall()
+        stale = [(player_id,) for player_id, worker, updated_at in claims
+                 if updated_at < cutoff or self.worker_is_dead(worker)]
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE fetch_progress SET status = 'released', worker = NULL WHERE player_id = ?",
+                stale
+            )
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        if stale:
+            logging.info(f"Released {len(stale)} stale claims")
+
+    def remaining(self, all_players):
+        """Players not finished and not currently claimed by another live worker."""
+        cutoff = time.time() - self.lease
+        unavailable = {player_id for (player_id,) in self.conn.execute('''
+            SELECT player_id FROM fetch_progress
+            WHERE status IN ('done', 'missing')
+               OR (status = 'claimed' AND worker != ? AND updated_at >= ?)
+        ''', (self.worker_id, cutoff))}
+        return [p for p in all_players if p['id'] not in unavailable]
+
+    def claim(self, player_id):
+        """Take a player for this worker; False if someone else holds or finished it."""
+        now = time.time()
+        with self.conn:
+            cursor = self.conn.execute('''
+                INSERT INTO fetch_progress (player_id, status, worker, updated_at)
+                VALUES (?, 'claimed', ?, ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    status = 'claimed', worker = excluded.worker, updated_at = excluded.updated_at
+                WHERE fetch_progress.status NOT IN ('done', 'missing')
+                  AND (fetch_progress.status != 'claimed'
+                       OR fetch_progress.worker = excluded.worker
+                       OR fetch_progress.updated_at < ?)
+            ''', (player_id, self.worker_id, now, now - self.lease))
+        return cursor.rowcount == 1
+
+    def release(self, player_id):
+        """Give a claim back after a failed fetch so the next run retries it."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE fetch_progress SET status = 'failed', worker = NULL, updated_at = ? "
+                "WHERE player_id = ? AND worker = ?",
+                (time.time(), player_id, self.worker_id)
+            )
+
+    def finished_op(self, player_id, status='done'):
+        """(sql, rows) operation marking a player finished, to commit alongside their data."""
+        return (
+            "INSERT OR REPLACE INTO fetch_progress (player_id, status, worker, updated_at) VALUES (?, ?, ?, ?)",
+            [(player_id, status, self.worker_id, time.time())]
+        )
+
+    def update_progress(self, player_id, status='done'):
+        sql, rows = self.finished_op(player_id, status)
+        with self.conn:
+            self.conn.executemany(sql, rows)
+
+    @property
+    def daily_count(self):
+        """Players finished since local midnight, by any worker."""
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM fetch_progress WHERE status IN ('done', 'missing') AND updated_at >= ?",
+            (midnight,)
+        ).fetchone()[0]
 
     def should_wait_for_next_day(self):
         return self.daily_count >= DAILY_LIMIT
 
+    def close(self):
+        self.conn.close()
+
 def create_connection():
     try:
         conn = sqlite3.connect(DB_FILE)
@@ -137,204 +271,324 @@ def init_database(conn):
                 FOREIGN KEY(player_id) REFERENCES players(id)
             )
         ''')
+        init_player_stats_table(cursor)
+        init_profile_table(cursor)
         conn.commit()
     except sqlite3.Error as e:
         logging.error(f"Database initialization error: {e}")
         raise
 
+def retry_delay(attempt):
+    """Exponential backoff with jitter; the limiter already slows everyone down on throttling."""
+    return min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * (2 ** attempt)) * random.uniform(1, 1.5)
+
 def fetch_with_retry(player_id, api_handler, max_retries=7):
     """Fetch player stats with enhanced retry logic."""
-    api_handler.handle_rate_limit()
-    
     for attempt in range(max_retries):
+        api_handler.acquire_slot()
+        started = time.perf_counter()
         try:
-            headers = api_handler.get_headers()
-            
             career_stats = playercareerstats.PlayerCareerStats(
                 player_id=player_id,
-                timeout=120,
-                headers=headers
+                timeout=REQUEST_TIMEOUT,
+                headers=api_handler.get_headers()
             )
-            
-            api_handler.requests_made += 1
-            base_delay = random.uniform(15, 25)
-            extra_delay = attempt * 5
-            total_delay = base_delay + extra_delay
-            logging.info(f"Successful request. Waiting {total_delay:.2f} seconds before next request...")
-            time.sleep(total_delay)
-            
-            return career_stats.get_data_frames()[0]
+            stats_df = career_stats.get_data_frames()[0]
+            metrics.observe_request('fetch', 'playercareerstats', started)
+            api_handler.record_success()
+            return stats_df
             
         except Exception as e:
-            base_wait = 30
-            wait_time = (base_wait * (3 ** attempt)) + random.uniform(10, 20)
-            
-            if "timeout" in str(e).lower():
-                wait_time *= 2
-            
+            metrics.observe_request('fetch', 'playercareerstats', started, e)
+            api_handler.record_failure(e)
+            wait_time = retry_delay(attempt)
             logging.warning(f"Attempt {attempt + 1} failed for player {player_id}. "
                           f"Waiting {wait_time:.2f} seconds. Error: {str(e)}")
-            
-            time.sleep(wait_time)
-            
-            if attempt == max_retries - 1:
-                logging.info("Final attempt with fresh connection...")
-                api_handler = NBAAPIHandler()
+            metrics.inc('api_retries_total', job='fetch', endpoint='playercareerstats', error=type(e).__name__)
+            metrics.sleep(wait_time, job='fetch', reason='retry_backoff')
+
+    logging.error(f"Giving up on career stats for player {player_id} after {max_retries} attempts")
+    metrics.inc('api_failures_total', job='fetch', endpoint='playercareerstats')
+    return None
 
 def get_player_info(player_id, api_handler, max_retries=7):
-    api_handler.handle_rate_limit()
-    
     for attempt in range(max_retries):
+        api_handler.acquire_slot()
+        started = time.perf_counter()
         try:
-            headers = api_handler.get_headers()
             player_info = commonplayerinfo.CommonPlayerInfo(
                 player_id=player_id,
-                timeout=120,
-                headers=headers
+                timeout=REQUEST_TIMEOUT,
+                headers=api_handler.get_headers()
             )
-            
-            api_handler.requests_made += 1
-            time.sleep(random.uniform(10, 15))
-            
-            return player_info.get_data_frames()[0].iloc[0]
+            info = player_info.get_data_frames()[0].iloc[0]
+            metrics.observe_request('fetch', 'commonplayerinfo', started)
+            api_handler.record_success()
+            return info
         except Exception as e:
-            wait_time = (30 * (3 ** attempt)) + random.uniform(5, 10)
-            time.sleep(wait_time)
+            metrics.observe_request('fetch', 'commonplayerinfo', started, e)
+            api_handler.record_failure(e)
             if attempt == max_retries - 1:
                 logging.error(f"Failed to fetch info for player {player_id}: {str(e)}")
+                metrics.inc('api_failures_total', job='fetch', endpoint='commonplayerinfo')
                 return None
+            metrics.inc('api_retries_total', job='fetch', endpoint='commonplayerinfo', error=type(e).__name__)
+            metrics.sleep(retry_delay(attempt), job='fetch', reason='retry_backoff')
+
+PLAYER_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO players 
+    (id, full_name, team, position, jersey_number, last_updated)
+    VALUES (?, ?, ?, ?, ?, datetime('now'))
+'''
+
+SEASON_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO seasons
+    (player_id, season_id, team_abbreviation, gp, min, pts, ast, reb, stl, blk, fg_pct, fg3_pct, ft_pct)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def player_write_ops(player_data):
+    """The (sql, rows) operations that store one player and all of their seasons."""
+    player_row = (
+        player_data['id'],
+        player_data['full_name'],
+        player_data.get('team', 'N/A'),
+        player_data.get('position', 'N/A'),
+        player_data.get('jersey_number', 'N/A')
+    )
+    season_rows = [(
+        player_data['id'],
+        season['SEASON_ID'],
+        season.get('TEAM_ABBREVIATION', 'N/A'),
+        season.get('GP', 0),
+        season.get('MIN', 0),
+        season.get('PTS', 0),
+        season.get('AST', 0),
+        season.get('REB', 0),
+        season.get('STL', 0),
+        season.get('BLK', 0),
+        season.get('FG_PCT', 0),
+        season.get('FG3_PCT', 0),
+        season.get('FT_PCT', 0)
+    ) for season in player_data.get('seasons', [])]
+    return ([(PLAYER_UPSERT_SQL, [player_row]), (SEASON_UPSERT_SQL, season_rows)]
+            + stats_write_ops(player_data['id'], {SEASON_SCOPE: player_data['stats']})
+            + invalidate_ops([player_data['id']]))
 
 def save_player_data(conn, player_data):
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
-            INSERT OR REPLACE INTO players 
-            (id, full_name, team, position, jersey_number, stats, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
-        ''', (
-            player_data['id'],
-            player_data['full_name'],
-            player_data.get('team', 'N/A'),
-            player_data.get('position', 'N/A'),
-            player_data.get('jersey_number', 'N/A'),
-            json.dumps(player_data['stats'])
-        ))
-
-        if 'seasons' in player_data:
-            for season in player_data['seasons']:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO seasons
-                    (player_id, season_id, team_abbreviation, gp, min, pts, ast, reb, stl, blk, fg_pct, fg3_pct, ft_pct)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    player_data['id'],
-                    season['SEASON_ID'],
-                    season.get('TEAM_ABBREVIATION', 'N/A'),
-                    season.get('GP', 0),
-                    season.get('MIN', 0),
-                    season.get('PTS', 0),
-                    season.get('AST', 0),
-                    season.get('REB', 0),
-                    season.get('STL', 0),
-                    season.get('BLK', 0),
-                    season.get('FG_PCT', 0),
-                    season.get('FG3_PCT', 0),
-                    season.get('FT_PCT', 0)
-                ))
-        conn.commit()
+        operations = player_write_ops(player_data)
+        with metrics.timer('db_commit_seconds', job='fetch', writer='direct'), conn:
+            for sql, rows in operations:
+                conn.executemany(sql, rows)
+        metrics.inc('rows_written_total', 1, job='fetch', table='players')
+        metrics.inc('rows_written_total', len(operations[1][1]), job='fetch', table='seasons')
     except sqlite3.Error as e:
         logging.error(f"Error saving player {player_data['full_name']}: {e}")
-        conn.rollback()
         raise
 
-def process_players():
+def fetch_player(player, api_handler):
+    """Fetch everything saved for one player; runs on a worker thread."""
+    stats_df = fetch_with_retry(player['id'], api_handler)
+    if stats_df is None:
+        raise RuntimeError(f"Could not fetch career stats for player {player['id']}")
+    if stats_df.empty:
+        return None
+
+    stats_records = stats_df.to_dict('records')
+    player_info = get_player_info(player['id'], api_handler)
+
+    return {
+        'id': player['id'],
+        'full_name': player['full_name'],
+        'team': player_info['TEAM_NAME'] if player_info is not None else 'N/A',
+        'position': player_info['POSITION'] if player_info is not None else 'N/A',
+        'jersey_number': player_info['JERSEY'] if player_info is not None else 'N/A',
+        'stats': stats_records[0] if stats_records else {},
+        'seasons': stats_records
+    }
+
+def fetch_and_submit(player, api_handler, writer, progress, committed):
+    """Worker task: fetch one player and hand the record to the writer.
+
+    Blocks while the writer queue is full. The record carries the player's
+    progress entry, so it commits together with their data; `committed` then
+    receives (player, error, saved) from the writer thread.
+    """
+    with metrics.timer('player_seconds', job='fetch'):
+        player_data = fetch_player(player, api_handler)
+    if player_data is None:
+        operations = [progress.finished_op(player['id'], 'missing')]
+    else:
+        operations = player_write_ops(player_data) + [progress.finished_op(player['id'])]
+    writer.submit(
+        operations,
+        on_done=lambda error: committed.put((player, error, error is None and player_data is not None))
+    )
+
+def wait_for_next_day():
+    next_run = datetime.now() + timedelta(days=1)
+    next_run = next_run.replace(hour=0, minute=0, second=0, microsecond=0)
+    wait_time = (next_run - datetime.now()).total_seconds()
+    logging.info(f"Daily limit reached. Waiting until {next_run} to resume...")
+    metrics.flush()
+    metrics.sleep(wait_time, job='fetch', reason='daily_limit')
+
+def process_players(max_workers=MAX_CONCURRENT_PLAYERS, limiter=None, cache=None,
+                    durability=DEFAULT_DURABILITY):
     conn = create_connection()
     init_database(conn)
-    api_handler = NBAAPIHandler()
+    conn.close()
+    writer = GroupCommitWriter(DB_FILE, durability=durability, foreign_keys=True, job='fetch')
+    api_handler = NBAAPIHandler(limiter, cache)
     progress = ProgressTracker()
     
     try:
         all_players = players.get_players()
-        remaining_players = [p for p in all_players if p['id'] > progress.last_processed_id]
+        remaining_players = progress.remaining(all_players)
         
         if not remaining_players:
             logging.info("All players processed!")
             return True
 
         total_players = len(all_players)
-        logging.info(f"Starting to fetch data for {total_players} players")
-        
-        batch_size = 2
-        for i in range(0, len(remaining_players), batch_size):
-            if progress.should_wait_for_next_day():
-                next_run = datetime.now() + timedelta(days=1)
-                next_run = next_run.replace(hour=0, minute=0, second=0, microsecond=0)
-                wait_time = (next_run - datetime.now()).total_seconds()
-                logging.info(f"Daily limit reached. Waiting until {next_run} to resume...")
-                time.sleep(wait_time)
-                progress = ProgressTracker()  # Reset progress for new day
-                continue
-
-            batch = remaining_players[i:i+batch_size]
-            
-            for player in batch:
+        logging.info(f"Starting to fetch data for {len(remaining_players)} of {total_players} players "
+                     f"with {max_workers} workers (worker id {progress.worker_id})")
+
+        started = time.monotonic()
+        saved_count = 0
+        finished_today = progress.daily_count
+        pending = {}
+        committed = Queue()
+        next_index = 0
+        exhausted = False
+
+        def drain_committed():
+            nonlocal saved_count, finished_today
+            while True:
                 try:
-                    processed_count = i + progress.daily_count
-                    logging.info(f"Processing player {processed_count + 1}/{total_players}: {player['full_name']}")
-                    
-                    stats_df = fetch_with_retry(player['id'], api_handler)
-                    if stats_df.empty:
+                    player, error, saved = committed.get_nowait()
+                except Empty:
+                    break
+                if error is not None:
+                    logging.error(f"Error saving player {player['full_name']}: {error}")
+                    progress.release(player['id'])
+                    continue
+                finished_today += 1
+                if saved:
+                    saved_count += 1
+                    logging.info(f"Successfully saved data for {player['full_name']} "
+                                 f"({saved_count}/{len(remaining_players)})")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_workers * 2:
+                    if next_index >= len(remaining_players):
+                        exhausted = True
+                        break
+                    if finished_today + len(pending) >= DAILY_LIMIT:
+                        break
+                    player = remaining_players[next_index]
+                    next_index += 1
+                    # Another worker may have taken or finished it since we listed it
+                    if not progress.claim(player['id']):
                         continue
+                    pending[executor.submit(fetch_and_submit, player, api_handler, writer, progress, committed)] = player
 
-                    stats_records = stats_df.to_dict('records')
-                    player_info = get_player_info(player['id'], api_handler)
-
-                    player_data = {
-                        'id': player['id'],
-                        'full_name': player['full_name'],
-                        'team': player_info['TEAM_NAME'] if player_info is not None else 'N/A',
-                        'position': player_info['POSITION'] if player_info is not None else 'N/A',
-                        'jersey_number': player_info['JERSEY'] if player_info is not None else 'N/A',
-                        'stats': stats_records[0] if stats_records else {},
-                        'seasons': stats_records
-                    }
-
-                    save_player_data(conn, player_data)
-                    progress.update_progress(player['id'])
-                    logging.info(f"Successfully saved data for {player['full_name']}")
-                    
-                except Exception as e:
-                    logging.error(f"Error processing player {player['full_name']}: {str(e)}")
+                if not pending:
+                    writer.flush()
+                    drain_committed()
+                    # Other workers count toward the daily limit too
+                    finished_today = progress.daily_count
+                    if finished_today >= DAILY_LIMIT:
+                        wait_for_next_day()
+                        finished_today = progress.daily_count
                     continue
 
-            batch_delay = random.uniform(45, 60)
-            logging.info(f"Completed batch. Waiting {batch_delay:.2f} seconds before next batch...")
-            time.sleep(batch_delay)
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    player = pending.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"Error processing player {player['full_name']}: {str(e)}")
+                        progress.release(player['id'])
+                drain_committed()
+
+        writer.flush()
+        drain_committed()
+        # Saved players' profiles were invalidated with their rows
+        build_profiles(DB_FILE)
 
-        return True
+        elapsed = time.monotonic() - started
+        players_per_hour = saved_count / elapsed * 3600 if elapsed > 0 else 0
+        logging.info(f"Fetched {saved_count} players in {elapsed:.1f}s ({players_per_hour:.0f} players/hour, "
+                     f"{api_handler.requests_made} requests, {api_handler.limiter.throttle_count} throttles)")
+        logging.info(f"Writer: {writer.summary()}")
+        if cache is not None:
+            logging.info(f"Response cache: {cache.stats()}")
+        metrics.set_gauge('last_run_timestamp_seconds', time.time(), job='fetch')
+        metrics.flush()
+        # Failed players and claims of dead workers are picked up by the next pass
+        progress.compact()
+        return not progress.remaining(all_players)
 
     except Exception as e:
         logging.error(f"Fatal error in process_players: {str(e)}")
         raise
     finally:
-        conn.close()
+        writer.close()
+        progress.compact()
+        progress.close()
 
-def run_with_auto_resume():
+def run_with_auto_resume(max_workers=MAX_CONCURRENT_PLAYERS, limiter=None, cache=None,
+                         durability=DEFAULT_DURABILITY):
     while True:
         try:
-            completed = process_players()
+            completed = process_players(max_workers, limiter, cache, durability)
             if completed:
                 logging.info("All players processed successfully!")
                 break
+            logging.info(f"Some players failed. Retrying them in {RETRY_PASS_DELAY} seconds...")
+            metrics.sleep(RETRY_PASS_DELAY, job='fetch', reason='retry_pass')
         except Exception as e:
             logging.error(f"Error in main loop: {str(e)}")
             wait_time = 3600
             logging.info(f"Waiting {wait_time} seconds before retrying...")
-            time.sleep(wait_time)
+            metrics.sleep(wait_time, job='fetch', reason='error_restart')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch NBA player stats into the local database")
+    parser.add_argument('--workers', type=int, default=MAX_CONCURRENT_PLAYERS,
+                        help="players fetched concurrently")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="initial requests per second (adapts to throttling)")
+    parser.add_argument('--base-url', default=None,
+                        help="stats API root, e.g. http://127.0.0.1:8000/stats for a local stub server")
+    parser.add_argument('--cache-file', default=CACHE_FILE,
+                        help="on-disk response cache")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always go to the network")
+    parser.add_argument('--durability', choices=sorted(DURABILITY_LEVELS), default=DEFAULT_DURABILITY,
+                        help="fsync policy for group commits")
+    parser.add_argument('--metrics-file', default=None,
+                        help=f"write Prometheus metrics to this file (or set {metrics.METRICS_FILE_ENV})")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve Prometheus metrics on this local port")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.base_url:
+        NBAStatsHTTP.base_url = args.base_url.rstrip('/') + '/{endpoint}'
+    if args.metrics_file:
+        metrics.enable(args.metrics_file)
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    limiter = AdaptiveTokenBucket(rate=args.rate) if args.rate else None
+    cache = None if args.no_cache else ResponseCache(args.cache_file)
     try:
-        run_with_auto_resume()
+        run_with_auto_resume(args.workers, limiter, cache, args.durability)
     except KeyboardInterrupt:
         logging.info("Script manually interrupted. Will resume from last processed player when restarted.")
         sys.exit(0)
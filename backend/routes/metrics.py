@@ -0,0 +1,243 @@
+import os
+import time
+import atexit
+import asyncio
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_FILE_ENV = 'NBA_METRICS_FILE'  # Set to a .prom path to turn metrics on for any job
+FLUSH_INTERVAL = 15  # Seconds between rewrites of the metrics file while a job runs
+NAMESPACE = 'nba'
+
+# Request and commit latencies run from milliseconds to the API's 120 second timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name -> (type, help); every metric a job records is declared here
+METRICS = {
+    'api_request_seconds': ('histogram', 'NBA stats API request latency by endpoint and outcome'),
+    'api_retries_total': ('counter', 'Failed API attempts that were retried, by endpoint and error class'),
+    'api_failures_total': ('counter', 'API calls given up on after the last retry'),
+    'sleep_seconds_total': ('counter', 'Seconds spent sleeping, by job and reason'),
+    'work_seconds_total': ('counter', 'Seconds spent doing work, by job and stage'),
+    'player_seconds': ('histogram', 'Wall time to fetch, parse and queue one player'),
+    'player_errors_total': ('counter', 'Players whose update failed, by job'),
+    'db_commit_seconds': ('histogram', 'SQLite commit latency, by job and writer'),
+    'rows_written_total': ('counter', 'Rows written, by job and table'),
+    'rows_per_second': ('gauge', 'Write throughput of the last run, by job and phase'),
+    'phase_seconds': ('gauge', 'Duration of each phase of the last run, by job'),
+    'last_run_timestamp_seconds': ('gauge', 'Unix time the job last finished'),
+}
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Registry:
+    """Thread-safe in-process store of counters, gauges and histograms."""
+
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.values = {}  # (name, label key) -> float, for counters and gauges
+        self.histograms = {}  # (name, label key) -> [bucket counts..., sum, count]
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, amount, labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.maybe_flush()
+
+    def set(self, name, value, labels):
+        with self.lock:
+            self.values[(name, label_key(labels))] = float(value)
+        self.maybe_flush()
+
+    def observe(self, name, value, labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+        self.maybe_flush()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        with self.lock:
+            values = dict(self.values)
+            histograms = {key: list(histogram) for key, histogram in self.histograms.items()}
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = sorted((key, value) for key, value in values.items() if key[0] == name)
+            buckets = sorted((key, value) for key, value in histograms.items() if key[0] == name)
+            if not series and not buckets:
+                continue
+            full_name = f'{NAMESPACE}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            for (_, labels), value in series:
+                lines.append(f'{full_name}{format_labels(labels)} {value!r}')
+            for (_, labels), histogram in buckets:
+                for bound, count in zip(LATENCY_BUCKETS, histogram):
+                    lines.append(f'{full_name}_bucket{format_labels(labels, [("le", f"{bound:g}")])} {count}')
+                lines.append(f'{full_name}_bucket{format_labels(labels, [("le", "+Inf")])} {histogram[-1]}')
+                lines.append(f'{full_name}_sum{format_labels(labels)} {histogram[-2]!r}')
+                lines.append(f'{full_name}_count{format_labels(labels)} {histogram[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=None):
+        """Atomically replace the metrics file, so a scraper never reads half of it."""
+        path = path or self.path
+        if not path:
+            return
+        with self.flush_lock:
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'w') as f:
+                f.write(self.render())
+            os.replace(temp_path, path)
+            self.last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self.path and time.monotonic() - self.last_flush >= self.flush_interval:
+            try:
+                self.write()
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {self.path}: {e}")
+
+# None while metrics are disabled; every recording call returns straight away then
+_registry = None
+
+def enable(path=None, flush_interval=FLUSH_INTERVAL):
+    """Start recording; with a path, the file is rewritten periodically and at exit."""
+    global _registry
+    if _registry is None:
+        _registry = Registry(path, flush_interval)
+        atexit.register(flush)
+    elif path:
+        _registry.path = path
+    return _registry
+
+def enabled():
+    return _registry is not None
+
+def inc(name, amount=1.0, **labels):
+    if _registry is not None:
+        _registry.inc(name, amount, labels)
+
+def set_gauge(name, value, **labels):
+    if _registry is not None:
+        _registry.set(name, value, labels)
+
+def observe(name, value, **labels):
+    if _registry is not None:
+        _registry.observe(name, value, labels)
+
+class _Timer:
+    __slots__ = ('record', 'name', 'labels', 'started', 'elapsed')
+
+    def __init__(self, record, name, labels):
+        self.record = record
+        self.name = name
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        self.record(self.name, self.elapsed, **self.labels)
+        return False
+
+class _NullTimer:
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name, **labels):
+    """Context manager observing its block's duration into a histogram."""
+    if _registry is None:
+        return _NULL_TIMER
+    return _Timer(observe, name, labels)
+
+def work(job, stage):
+    """Context manager booking its block's duration as working time."""
+    if _registry is None:
+        return _NULL_TIMER
+    return _Timer(inc, 'work_seconds_total', {'job': job, 'stage': stage})
+
+def observe_request(job, endpoint, started, error=None):
+    """Record one API attempt that began at time.perf_counter() value `started`."""
+    if _registry is None:
+        return
+    elapsed = time.perf_counter() - started
+    observe('api_request_seconds', elapsed, job=job, endpoint=endpoint, outcome='error' if error else 'ok')
+    inc('work_seconds_total', elapsed, job=job, stage='request')
+
+def sleep(seconds, job, reason):
+    """time.sleep that books the time as sleeping rather than working."""
+    inc('sleep_seconds_total', seconds, job=job, reason=reason)
+    time.sleep(seconds)
+
+async def async_sleep(seconds, job, reason):
+    inc('sleep_seconds_total', seconds, job=job, reason=reason)
+    await asyncio.sleep(seconds)
+
+def flush(path=None):
+    """Write the metrics file now, e.g. at the end of a job."""
+    if _registry is not None:
+        try:
+            _registry.write(path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics: {e}")
+
+def render():
+    return _registry.render() if _registry is not None else ''
+
+def serve(port, host='127.0.0.1'):
+    """Expose /metrics over HTTP from a daemon thread, for jobs that run long enough to scrape."""
+    enable()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+if os.environ.get(METRICS_FILE_ENV):
+    enable(os.environ[METRICS_FILE_ENV])
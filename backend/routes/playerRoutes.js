@@ -5,6 +5,54 @@ const path = require('path');
 
 const DB_FILE = path.join(__dirname, '..', 'data', 'nba_stats.db');
 
+// Typed per-player stats (routes/player_stats.py), one row per player and scope
+const STAT_COLUMNS = {
+    per_mode: 'TEXT NOT NULL', season_id: 'TEXT', team_abbreviation: 'TEXT', player_age: 'REAL',
+    gp: 'INTEGER', gs: 'INTEGER', min: 'REAL', fgm: 'REAL', fga: 'REAL', fg_pct: 'REAL',
+    fg3m: 'REAL', fg3a: 'REAL', fg3_pct: 'REAL', ftm: 'REAL', fta: 'REAL', ft_pct: 'REAL',
+    oreb: 'REAL', dreb: 'REAL', reb: 'REAL', ast: 'REAL', stl: 'REAL', blk: 'REAL',
+    tov: 'REAL', pf: 'REAL', pts: 'REAL'
+};
+const PLAYER_STATS_DDL = `
+    CREATE TABLE IF NOT EXISTS player_stats (
+        player_id INTEGER NOT NULL,
+        scope TEXT NOT NULL,
+        ${Object.entries(STAT_COLUMNS).map(([name, type]) => `${name} ${type}`).join(', ')},
+        last_updated DATETIME,
+        PRIMARY KEY (player_id, scope)
+    ) WITHOUT ROWID`;
+const STATS_SELECT = Object.keys(STAT_COLUMNS).map(name => `ps.${name} AS stats_${name}`).join(', ');
+const STATS_JOIN = "LEFT JOIN player_stats ps ON ps.player_id = p.id AND ps.scope = 'season'";
+
+// Precomputed /players documents (routes/profile_cache.py), rebuilt by the Python writers
+const PLAYER_PROFILES_DDL = `
+    CREATE TABLE IF NOT EXISTS player_profiles (
+        player_id INTEGER PRIMARY KEY,
+        name_key TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        built_at DATETIME
+    );
+    CREATE INDEX IF NOT EXISTS idx_player_profiles_name_key ON player_profiles(name_key)`;
+
+let schemaReady = null;
+
+// Databases built before player_stats/player_profiles existed get empty tables, so the queries below work
+const ensureSchema = (db) => {
+    if (!schemaReady) {
+        schemaReady = new Promise((resolve, reject) => {
+            db.exec(`${PLAYER_STATS_DDL}; ${PLAYER_PROFILES_DDL}`, (err) => {
+                if (err) {
+                    schemaReady = null;
+                    reject(err);
+                } else {
+                    resolve();
+                }
+            });
+        });
+    }
+    return schemaReady;
+};
+
 const getDb = () => {
     return new Promise((resolve, reject) => {
         const db = new sqlite3.Database(DB_FILE, (err) => {
@@ -12,12 +60,22 @@ const getDb = () => {
                 console.error('Database connection error:', err);
                 reject(err);
             } else {
-                resolve(db);
+                ensureSchema(db).then(() => resolve(db), reject);
             }
         });
     });
 };
 
+// The player's season stats from the stats_* columns, without the NULLs
+const statsFromRow = (row) => {
+    const stats = {};
+    Object.keys(STAT_COLUMNS).forEach(name => {
+        const value = row[`stats_${name}`];
+        if (value !== null && value !== undefined) stats[name] = value;
+    });
+    return stats;
+};
+
 const calculateCareerAverages = (seasons) => {
     if (!seasons || seasons.length === 0) return null;
     
@@ -61,7 +119,7 @@ router.get('/random-players', async (req, res) => {
     try {
         const db = await getDb();
         db.all(`
-            SELECT p.*, 
+            SELECT p.*, ${STATS_SELECT},
                 json_group_array(
                     json_object(
                         'season_id', s.season_id,
@@ -81,6 +139,7 @@ router.get('/random-players', async (req, res) => {
                     )
                 ) as seasons_json
             FROM players p
+            ${STATS_JOIN}
             LEFT JOIN seasons s ON p.id = s.player_id
             GROUP BY p.id
             ORDER BY RANDOM()
@@ -100,7 +159,7 @@ router.get('/random-players', async (req, res) => {
                         full_name: player.full_name,
                         team: player.team,
                         position: player.position,
-                        stats: JSON.parse(player.stats || '{}'),
+                        stats: statsFromRow(player),
                         // Only include career averages for random players
                         career_averages: calculateCareerAverages(seasons)
                     };
@@ -125,9 +184,19 @@ router.get('/players', async (req, res) => {
         const db = await getDb();
         const name = req.query.name;
 
+        // A cached profile is one key lookup, sent without parsing; ambiguous names take the query path
+        const profiles = await new Promise((resolve, reject) => {
+            db.all('SELECT profile FROM player_profiles WHERE name_key = LOWER(?) LIMIT 2', [name],
+                (err, rows) => err ? reject(err) : resolve(rows));
+        });
+        if (profiles.length === 1) {
+            res.type('application/json').send(`{"player":${profiles[0].profile}}`);
+            return;
+        }
+
         // Exact match query
         const exactQuery = `
-            SELECT p.*, 
+            SELECT p.*, ${STATS_SELECT},
                 json_group_array(
                     json_object(
                         'season_id', s.season_id,
@@ -147,6 +216,7 @@ router.get('/players', async (req, res) => {
                     )
                 ) as seasons_json
             FROM players p
+            ${STATS_JOIN}
             LEFT JOIN seasons s ON p.id = s.player_id
             WHERE LOWER(p.full_name) = LOWER(?)
             GROUP BY p.id`;
@@ -166,7 +236,7 @@ router.get('/players', async (req, res) => {
                         full_name: exactMatch.full_name,
                         team: exactMatch.team,
                         position: exactMatch.position,
-                        stats: JSON.parse(exactMatch.stats || '{}'),
+                        stats: statsFromRow(exactMatch),
                         seasons: seasons,
                         career_averages: calculateCareerAverages(seasons)
                     };
@@ -180,7 +250,7 @@ router.get('/players', async (req, res) => {
 
             // If no exact match, try partial match
             const partialQuery = `
-                SELECT p.*, 
+                SELECT p.*, ${STATS_SELECT},
                     json_group_array(
                         json_object(
                             'season_id', s.season_id,
@@ -200,6 +270,7 @@ router.get('/players', async (req, res) => {
                         )
                     ) as seasons_json
                 FROM players p
+                ${STATS_JOIN}
                 LEFT JOIN seasons s ON p.id = s.player_id
                 WHERE LOWER(p.full_name) LIKE LOWER(?)
                 GROUP BY p.id
@@ -223,7 +294,7 @@ router.get('/players', async (req, res) => {
                         full_name: player.full_name,
                         team: player.team,
                         position: player.position,
-                        stats: JSON.parse(player.stats || '{}'),
+                        stats: statsFromRow(player),
                         seasons: JSON.parse(player.seasons_json || '[]'),
                         career_averages: calculateCareerAverages(JSON.parse(player.seasons_json || '[]'))
                     }));
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+
+APP_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'nba_stats.db')
+
+# One row per player and scope, replacing the JSON blobs in players.stats
+SEASON_SCOPE = 'season'  # A single season's line, e.g. the current season
+CAREER_SCOPE = 'career'  # Career totals
+TOTALS = 'Totals'  # stats.nba.com PerMode of the API rows
+PER_GAME = 'PerGame'  # Averages, as in the Basketball Reference CSVs
+
+# column -> (SQL type, keys it is read from: stats.nba.com name, then CSV per-game name)
+STAT_COLUMNS = {
+    'season_id': ('TEXT', ('SEASON_ID', 'season_id')),
+    'team_abbreviation': ('TEXT', ('TEAM_ABBREVIATION', 'team')),
+    'player_age': ('REAL', ('PLAYER_AGE',)),
+    'gp': ('INTEGER', ('GP', 'games')),
+    'gs': ('INTEGER', ('GS', 'games_started')),
+    'min': ('REAL', ('MIN', 'minutes_per_game')),
+    'fgm': ('REAL', ('FGM',)),
+    'fga': ('REAL', ('FGA',)),
+    'fg_pct': ('REAL', ('FG_PCT', 'fg_percent')),
+    'fg3m': ('REAL', ('FG3M',)),
+    'fg3a': ('REAL', ('FG3A',)),
+    'fg3_pct': ('REAL', ('FG3_PCT', 'fg3_percent')),
+    'ftm': ('REAL', ('FTM',)),
+    'fta': ('REAL', ('FTA',)),
+    'ft_pct': ('REAL', ('FT_PCT', 'ft_percent')),
+    'oreb': ('REAL', ('OREB',)),
+    'dreb': ('REAL', ('DREB',)),
+    'reb': ('REAL', ('REB', 'reb_per_game')),
+    'ast': ('REAL', ('AST', 'ast_per_game')),
+    'stl': ('REAL', ('STL', 'stl_per_game')),
+    'blk': ('REAL', ('BLK', 'blk_per_game')),
+    'tov': ('REAL', ('TOV', 'turnover_per_game')),
+    'pf': ('REAL', ('PF',)),
+    'pts': ('REAL', ('PTS', 'pts_per_game')),
+}
+
+# What most readers want of a player's current stats
+CURRENT_STATS = ('season_id', 'gp', 'min', 'pts', 'reb', 'ast', 'stl', 'blk', 'fg_pct', 'fg3_pct', 'ft_pct')
+
+STATS_UPSERT_SQL = f'''
+    INSERT OR REPLACE INTO player_stats
+    (player_id, scope, per_mode, {', '.join(STAT_COLUMNS)}, last_updated)
+    VALUES (?, ?, ?, {', '.join('?' for _ in STAT_COLUMNS)}, datetime('now'))
+'''
+
+def init_player_stats_table(conn):
+    columns = ',\n            '.join(f'{name} {sql_type}' for name, (sql_type, _) in STAT_COLUMNS.items())
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            player_id INTEGER NOT NULL,
+            scope TEXT NOT NULL,
+            per_mode TEXT NOT NULL,
+            {columns},
+            last_updated DATETIME,
+            PRIMARY KEY (player_id, scope)
+        ) WITHOUT ROWID
+    ''')
+
+def typed(value, sql_type):
+    """Coerce one API/CSV value to its column type; blanks and NaN become NULL."""
+    if value is None or value == '' or (isinstance(value, float) and value != value):
+        return None
+    if sql_type == 'TEXT':
+        return str(value)
+    try:
+        return int(value) if sql_type == 'INTEGER' else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def stats_row(player_id, scope, values, per_mode=TOTALS):
+    """A player_stats row from an API result row or a per-game stats dict."""
+    row = [player_id, scope, per_mode]
+    for sql_type, keys in STAT_COLUMNS.values():
+        value = next((values[key] for key in keys if key in values), None)
+        row.append(typed(value, sql_type))
+    return tuple(row)
+
+def stats_write_ops(player_id, stats_by_scope, per_mode=TOTALS):
+    """The (sql, rows) operation storing a player's stats, for save paths and the group-commit writer."""
+    rows = [stats_row(player_id, scope, values, per_mode)
+            for scope, values in stats_by_scope.items() if values]
+    return [(STATS_UPSERT_SQL, rows)]
+
+def load_player_stats(conn, player_ids, scope=SEASON_SCOPE, columns=None):
+    """{player_id: stats dict} for the given players; the decoder for what the blobs used to hold.
+
+    Unlike a JSON blob, only the requested columns are read; None means all
+    of them. Values a source didn't provide are None.
+    """
+    player_ids = list(player_ids)
+    columns = list(columns or ['per_mode'] + list(STAT_COLUMNS))
+    unknown = set(columns) - set(STAT_COLUMNS) - {'per_mode', 'last_updated'}
+    if unknown:
+        raise ValueError(f"Unknown player_stats columns: {sorted(unknown)}")
+    result = {}
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(player_ids), 500):
+        chunk = player_ids[start:start + 500]
+        for player_id, *values in conn.execute(f'''
+            SELECT player_id, {', '.join(columns)} FROM player_stats
+            WHERE scope = ? AND player_id IN ({', '.join('?' for _ in chunk)})
+        ''', [scope] + chunk):
+            result[player_id] = dict(zip(columns, values))
+    return result
+
+def legacy_stats_rows(player_id, blob):
+    """player_stats rows for one players.stats JSON blob, whichever writer produced it."""
+    stats = json.loads(blob)
+    if not isinstance(stats, dict) or not stats:
+        return []
+    if 'current_season' in stats or 'career_totals' in stats:
+        # incremental_update: current season from the profile, career totals
+        _, rows = stats_write_ops(player_id, {
+            SEASON_SCOPE: stats.get('current_season'),
+            CAREER_SCOPE: stats.get('career_totals') or stats.get('career_stats'),
+        })[0]
+        return rows
+    if 'pts_per_game' in stats:
+        # migrate_from_csv: latest season averages
+        return [stats_row(player_id, SEASON_SCOPE, stats, PER_GAME)]
+    # fetch_nba_stats: one season row of PlayerCareerStats
+    return [stats_row(player_id, SEASON_SCOPE, stats)]
+
+def read_json_stats(conn, player_ids):
+    """The old read path, kept to measure the typed table against."""
+    return {player_id: json.loads(blob) for player_id, blob in conn.execute(
+        f"SELECT id, stats FROM players WHERE id IN ({', '.join('?' for _ in player_ids)})", player_ids
+    )}
+
+def time_reads(read, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        read()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def migrate_json_stats(db_path=None, sample_size=500):
+    """One-time move of players.stats JSON into player_stats, then VACUUM to give the space back."""
+    db_path = db_path or APP_DB
+    size_before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            init_player_stats_table(conn)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(players)')}
+        if 'stats' not in columns:
+            logging.info("players has no stats column, nothing to migrate")
+            return 0
+
+        blobs = conn.execute('SELECT id, stats FROM players WHERE stats IS NOT NULL').fetchall()
+        sample = [player_id for player_id, _ in blobs[:sample_size]]
+        json_ms = time_reads(lambda: read_json_stats(conn, sample)) if sample else None
+
+        rows, failed = [], []
+        for player_id, blob in blobs:
+            try:
+                rows.extend(legacy_stats_rows(player_id, blob))
+            except (ValueError, TypeError) as e:
+                failed.append(player_id)
+                logging.warning(f"Could not decode stats of player {player_id}: {e}")
+        failed_ids = set(failed)
+        migrated = [(player_id,) for player_id, _ in blobs if player_id not in failed_ids]
+        with conn:
+            conn.executemany(STATS_UPSERT_SQL, rows)
+            conn.executemany('UPDATE players SET stats = NULL WHERE id = ?', migrated)
+        conn.execute('VACUUM')
+
+        typed_ms = time_reads(lambda: load_player_stats(conn, sample, columns=CURRENT_STATS)) if sample else None
+    finally:
+        conn.close()
+
+    size_after = os.path.getsize(db_path)
+    logging.info(f"Moved stats of {len(migrated)} players into {len(rows)} player_stats rows "
+                 f"({len(failed)} undecodable blobs left in place)")
+    logging.info(f"Database size: {size_before / 1e6:.2f} MB -> {size_after / 1e6:.2f} MB")
+    if sample:
+        logging.info(f"Reading {len(sample)} players' stats: JSON {json_ms:.2f} ms, "
+                     f"typed {typed_ms:.2f} ms ({json_ms / typed_ms:.1f}x)")
+    return len(migrated)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        migrate_json_stats(sys.argv[1] if len(sys.argv) > 1 else None)
+    except Exception as e:
+        logging.error(f"Stats migration failed: {e}")
+        sys.exit(1)
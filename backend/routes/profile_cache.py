@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+
+from player_stats import init_player_stats_table, load_player_stats, SEASON_SCOPE
+
+APP_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'nba_stats.db')
+
+# Season fields of the /api/players document; the numeric ones are COALESCEd to 0 there
+SEASON_TEXT_FIELDS = ('season_id', 'season', 'team')
+SEASON_NUMBER_FIELDS = (
+    'games', 'minutes_per_game', 'pts_per_game', 'ast_per_game', 'reb_per_game', 'stl_per_game',
+    'blk_per_game', 'fg_percent', 'fg3_percent', 'ft_percent', 'turnover_per_game'
+)
+# career_averages key -> seasons column, weighted by games as in calculateCareerAverages
+CAREER_AVERAGES = {
+    'career_ppg': 'pts_per_game',
+    'career_apg': 'ast_per_game',
+    'career_rpg': 'reb_per_game',
+    'career_spg': 'stl_per_game',
+    'career_bpg': 'blk_per_game',
+    'career_fg_pct': 'fg_percent',
+    'career_fg3_pct': 'fg3_percent',
+    'career_ft_pct': 'ft_percent',
+}
+
+PROFILE_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO player_profiles (player_id, name_key, profile, built_at)
+    VALUES (?, ?, ?, datetime('now'))
+'''
+PROFILE_INVALIDATE_SQL = 'DELETE FROM player_profiles WHERE player_id = ?'
+
+def init_profile_table(conn):
+    # name_key is SQLite's LOWER(full_name), the same folding the /api/players exact match uses
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_profiles (
+            player_id INTEGER PRIMARY KEY,
+            name_key TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            built_at DATETIME
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_player_profiles_name_key ON player_profiles(name_key)')
+
+def invalidate_ops(player_ids):
+    """The (sql, rows) operation dropping cached profiles, run in the same transaction as the write."""
+    return [(PROFILE_INVALIDATE_SQL, [(player_id,) for player_id in player_ids])]
+
+def invalidate_profiles(conn, player_ids):
+    for sql, rows in invalidate_ops(player_ids):
+        conn.executemany(sql, rows)
+
+def profile_season(row):
+    season = {field: row.get(field) for field in SEASON_TEXT_FIELDS}
+    season.update((field, row.get(field) or 0) for field in SEASON_NUMBER_FIELDS)
+    return season
+
+def career_averages(seasons):
+    """calculateCareerAverages of routes/playerRoutes.js; NaN (no games) becomes null, as in JSON.stringify."""
+    if not seasons:
+        return None
+    total_games = sum(season['games'] for season in seasons)
+    return {key: sum(season[column] * season['games'] for season in seasons) / total_games if total_games else None
+            for key, column in CAREER_AVERAGES.items()}
+
+def build_profile(player, seasons, stats):
+    """The player document GET /api/players responds with for an exact name match."""
+    # The endpoint's LEFT JOIN yields one all-NULL season for a player without seasons
+    seasons = [profile_season(row) for row in seasons] or [profile_season({})]
+    return {
+        'id': player['id'],
+        'full_name': player['full_name'],
+        'team': player.get('team'),
+        'position': player.get('position'),
+        'stats': {name: value for name, value in (stats or {}).items() if value is not None},
+        'seasons': seasons,
+        'career_averages': career_averages(seasons),
+    }
+
+def load_profile_sources(conn, player_ids=None):
+    """(player row, seasons, season stats) of every player, or of the given ones only."""
+    # incremental_update's own database has players but no seasons
+    has_seasons = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seasons'"
+    ).fetchone() is not None
+    conn.row_factory = sqlite3.Row
+    try:
+        if player_ids is None:
+            players = conn.execute('SELECT *, LOWER(full_name) AS name_key FROM players').fetchall()
+            season_rows = (conn.execute('SELECT * FROM seasons ORDER BY player_id, id').fetchall()
+                           if has_seasons else [])
+        else:
+            players, season_rows = [], []
+            player_ids = list(player_ids)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(player_ids), 500):
+                chunk = player_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                players += conn.execute(
+                    f'SELECT *, LOWER(full_name) AS name_key FROM players WHERE id IN ({placeholders})', chunk
+                ).fetchall()
+                if has_seasons:
+                    season_rows += conn.execute(
+                        f'SELECT * FROM seasons WHERE player_id IN ({placeholders}) ORDER BY player_id, id', chunk
+                    ).fetchall()
+    finally:
+        conn.row_factory = None
+
+    seasons = {}
+    for row in season_rows:
+        seasons.setdefault(row['player_id'], []).append(dict(row))
+    stats = load_player_stats(conn, [player['id'] for player in players], SEASON_SCOPE)
+    return [(dict(player), seasons.get(player['id'], []), stats.get(player['id']))
+            for player in players]
+
+def profile_rows(sources):
+    return [(player['id'], player['name_key'] or '',
+             json.dumps(build_profile(player, seasons, stats), separators=(',', ':')))
+            for player, seasons, stats in sources]
+
+def build_profiles(db_path=None, full=False):
+    """Build the profiles of players that have none (of every player with full), dropping deleted players'.
+
+    Writers invalidate a player's profile in the transaction that changes
+    the player, so the missing profiles are exactly the stale ones.
+    """
+    db_path = db_path or APP_DB
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            init_player_stats_table(conn)
+            init_profile_table(conn)
+        if full:
+            missing = None
+        else:
+            missing = [player_id for (player_id,) in conn.execute('''
+                SELECT id FROM players
+                WHERE id NOT IN (SELECT player_id FROM player_profiles)
+            ''')]
+        rows = profile_rows(load_profile_sources(conn, missing)) if missing != [] else []
+        with conn:
+            if full:
+                conn.execute('DELETE FROM player_profiles')
+            conn.executemany(PROFILE_UPSERT_SQL, rows)
+            removed = conn.execute(
+                'DELETE FROM player_profiles WHERE player_id NOT IN (SELECT id FROM players)'
+            ).rowcount
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Profile cache: {len(rows)} profiles built, {removed} removed in {elapsed:.3f}s")
+        return len(rows)
+    finally:
+        conn.close()
+
+def get_profile(conn, player_id):
+    """A player's profile as JSON text in one key lookup, built and stored on a miss; None for unknown players."""
+    row = conn.execute('SELECT profile FROM player_profiles WHERE player_id = ?', (player_id,)).fetchone()
+    if row is not None:
+        return row[0]
+    rows = profile_rows(load_profile_sources(conn, [player_id]))
+    if not rows:
+        return None
+    with conn:
+        conn.executemany(PROFILE_UPSERT_SQL, rows)
+    return rows[0][2]
+
+def find_profile(conn, name):
+    """The profile of the one player with this name, or None if there is none or the name is ambiguous."""
+    rows = conn.execute(
+        'SELECT profile FROM player_profiles WHERE name_key = LOWER(?) LIMIT 2', (name,)
+    ).fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        paths = [arg for arg in sys.argv[1:] if arg != '--full']
+        build_profiles(paths[0] if paths else None, full='--full' in sys.argv)
+    except Exception as e:
+        logging.error(f"Profile cache build failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,97 @@
+import threading
+import time
+import logging
+
+# Request rate bounds, in requests per second
+DEFAULT_RATE = 1.0
+MIN_RATE = 0.05
+MAX_RATE = 4.0
+DEFAULT_BURST = 4
+
+# AIMD tuning: grow slowly after a run of successes, halve on throttling
+INCREASE_STEP = 0.1
+SUCCESSES_BEFORE_INCREASE = 10
+DECREASE_FACTOR = 0.5
+THROTTLE_COOLDOWN = 30
+
+THROTTLE_MARKERS = ('429', 'too many requests', 'timeout', 'timed out', 'rate limit')
+
+def is_throttle_error(error):
+    """Whether an error looks like the API pushing back rather than a bad request."""
+    name = type(error).__name__.lower()
+    if 'timeout' in name or 'connectionerror' in name:
+        return True
+    # nba_api parses the body without checking the status, so a 429 or block
+    # page surfaces as a JSON decode error
+    if 'jsondecodeerror' in name:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+class AdaptiveTokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to 429s and timeouts.
+
+    Every request calls acquire() first. Successes nudge the rate up additively,
+    throttling responses halve it and pause all callers for a cooldown.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=MIN_RATE,
+                 max_rate=MAX_RATE, cooldown=THROTTLE_COOLDOWN, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.last_refill = clock()
+        self.paused_until = 0.0
+        self.success_streak = 0
+        self.throttle_count = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a request may be sent; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                if now < self.paused_until:
+                    wait_time = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait_time = (1 - self.tokens) / self.rate
+            self.sleep(wait_time)
+            waited += wait_time
+
+    def record_success(self):
+        with self.lock:
+            self.success_streak += 1
+            if self.success_streak >= SUCCESSES_BEFORE_INCREASE:
+                self.success_streak = 0
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+    def record_throttle(self):
+        with self.lock:
+            self.success_streak = 0
+            self.throttle_count += 1
+            now = self.clock()
+            # Requests already in flight when we backed off fail together; count
+            # that as one congestion event instead of halving once per failure
+            if now < self.paused_until:
+                return
+            self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+            self.tokens = 0.0
+            self.paused_until = now + self.cooldown
+            rate = self.rate
+        logging.warning(f"Throttled by API. Rate lowered to {rate:.2f} req/s, pausing {self.cooldown}s")
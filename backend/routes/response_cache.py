@@ -0,0 +1,211 @@
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from nba_api.stats.static import players
+
+CACHE_FILE = "http_cache.db"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+
+# Seconds a cached response is served without asking the API again.
+# None means forever; used for players who are no longer active.
+ENDPOINT_TTLS = {
+    'playercareerstats': 12 * 3600,
+    'commonplayerinfo': 24 * 3600,
+    'playerprofilev2': 6 * 3600,
+}
+DEFAULT_TTL = 3600
+INACTIVE_PLAYER_TTL = None
+
+class ResponseCache:
+    """On-disk, zlib-compressed, size-capped LRU cache of NBA stats API responses."""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_CACHE_BYTES, ttls=None, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                endpoint TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL,
+                size INTEGER
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+        self.conn.commit()
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self.inactive_ids = {p['id'] for p in players.get_players() if not p.get('is_active')}
+        self.counters = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+
+    def ttl_for(self, endpoint, params):
+        try:
+            player_id = int(params.get('PlayerID'))
+        except (TypeError, ValueError):
+            player_id = None  # Missing or malformed; the endpoint's TTL applies
+        if player_id is not None and player_id in self.inactive_ids:
+            return INACTIVE_PLAYER_TTL
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def lookup(self, cache_key):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM responses WHERE cache_key = ?',
+                (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return {
+            'body': zlib.decompress(body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': fetched_at,
+        }
+
+    def is_fresh(self, entry, ttl):
+        return ttl is None or self.clock() - entry['fetched_at'] < ttl
+
+    def touch(self, cache_key, refreshed=False):
+        """Mark an entry as recently used; a 304 also restarts its TTL."""
+        now = self.clock()
+        with self.lock:
+            if refreshed:
+                self.conn.execute(
+                    'UPDATE responses SET last_access = ?, fetched_at = ? WHERE cache_key = ?',
+                    (now, now, cache_key)
+                )
+            else:
+                self.conn.execute('UPDATE responses SET last_access = ? WHERE cache_key = ?', (now, cache_key))
+            self.conn.commit()
+
+    def store(self, cache_key, endpoint, body, etag=None, last_modified=None):
+        compressed = zlib.compress(body, COMPRESSION_LEVEL)
+        now = self.clock()
+        with self.lock:
+            previous = self.conn.execute(
+                'SELECT size FROM responses WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+            self.conn.execute('''
+                INSERT OR REPLACE INTO responses
+                (cache_key, endpoint, body, etag, last_modified, fetched_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (cache_key, endpoint, compressed, etag, last_modified, now, now, len(compressed)))
+            self.total_bytes += len(compressed) - (previous[0] if previous else 0)
+            self.counters['stores'] += 1
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its cap."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute('SELECT cache_key, size FROM responses ORDER BY last_access ASC')
+        doomed = []
+        for cache_key, size in rows:
+            if self.total_bytes <= target:
+                break
+            doomed.append((cache_key,))
+            self.total_bytes -= size
+        self.conn.executemany('DELETE FROM responses WHERE cache_key = ?', doomed)
+        self.counters['evictions'] += len(doomed)
+
+    def record(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        stats['bytes'] = self.total_bytes
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def cached_response(url, body, headers=None):
+    """Build a requests.Response for a body served from the cache."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+class CachingSession(requests.Session):
+    """Session for nba_api that answers from ResponseCache and revalidates stale entries.
+
+    before_request runs only when a request actually goes to the network, so
+    cache hits don't spend rate limiter tokens.
+    """
+
+    def __init__(self, cache, before_request=None):
+        super().__init__()
+        self.cache = cache
+        self.before_request = before_request
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        params = list(params.items()) if isinstance(params, dict) else list(params or [])
+        endpoint = url.rstrip('/').rsplit('/', 1)[-1].lower()
+        cache_key = f"{endpoint}?{urlencode(sorted(params))}"
+        full_url = f"{url}?{urlencode(params)}"
+        ttl = self.cache.ttl_for(endpoint, dict(params))
+
+        entry = self.cache.lookup(cache_key)
+        if entry is not None and self.cache.is_fresh(entry, ttl):
+            self.cache.record('hits')
+            self.cache.touch(cache_key)
+            return cached_response(full_url, entry['body'])
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        if self.before_request:
+            self.before_request()
+        response = super().get(url, params=params, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record('revalidated')
+            self.cache.touch(cache_key, refreshed=True)
+            return cached_response(response.url or full_url, entry['body'], response.headers)
+
+        self.cache.record('misses')
+        # Only keep real payloads; block pages and errors must be retried next time
+        if response.status_code == 200 and response.content.lstrip().startswith(b'{'):
+            self.cache.store(
+                cache_key, endpoint, response.content,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return response
+
+def install_cache(http_class, cache, before_request=None):
+    """Route every request made through an nba_api HTTP class via the cache."""
+    session = CachingSession(cache, before_request)
+    http_class.set_session(session)
+    logging.info(f"Using response cache at {cache.path}")
+    return session
@@ -0,0 +1,266 @@
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+import csv_cache
+from projection_model import TARGETS, PERCENT_TARGETS, one_row_per_season
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+ALL_POSITIONS = 'ALL'  # Curve over every position, the fallback for thin position/age cells
+POSITION_GROUPS = {'PG': 'G', 'SG': 'G', 'G': 'G', 'SF': 'F', 'PF': 'F', 'F': 'F', 'C': 'C'}
+MIN_PAIRS = 25  # Fewer season pairs than this at an age and the ALL curve is used instead
+OPEN_END = 0  # Stored first_season/last_season of a range without that bound
+
+# (csv path, size, mtime, first season, last season, min pairs) -> curves
+_curve_cache = {}
+
+def position_group(positions):
+    """G, F or C from a listed position; hyphenated ones like 'F-C' count as their first."""
+    return positions.fillna('').str.split('-').str[0].map(POSITION_GROUPS)
+
+def season_pairs(per_game, first_season=None, last_season=None):
+    """Consecutive seasons of every player as (age, position, deltas, weights), without Python loops.
+
+    A pair's weight is the harmonic mean of the minutes played in its two
+    seasons, so a 30-minute starter's change counts more than a cameo's.
+    """
+    seasons = one_row_per_season(per_game).sort_values(['player_id', 'season'], kind='stable')
+    columns = list(TARGETS.values())
+    following = seasons.groupby('player_id', sort=False)[columns + ['season', 'g']].shift(-1)
+
+    minutes = seasons['g'] * seasons['mp_per_game']
+    next_minutes = following['g'] * following['mp_per_game']
+    pairs = (following['season'] == seasons['season'] + 1) & seasons['age'].notna()
+    if first_season is not None:
+        pairs &= seasons['season'] >= first_season
+    if last_season is not None:
+        pairs &= following['season'] <= last_season
+
+    deltas = following.loc[pairs, columns].to_numpy(float) - seasons.loc[pairs, columns].to_numpy(float)
+    weight = (2 * minutes * next_minutes / (minutes + next_minutes)).loc[pairs].fillna(0).to_numpy()
+    return pd.DataFrame({
+        'age': seasons.loc[pairs, 'age'].astype(int).to_numpy(),
+        'position': position_group(seasons.loc[pairs, 'pos']).to_numpy(),
+    }), pd.DataFrame(deltas, columns=list(TARGETS)), weight
+
+def weighted_deltas(keys, deltas, weight):
+    """Weighted mean delta and total weight per key group, each stat ignoring its own missing deltas."""
+    weights = np.where(np.isnan(deltas.to_numpy()), 0.0, weight[:, None])
+    weighted = pd.DataFrame(np.nan_to_num(deltas.to_numpy()) * weights, columns=deltas.columns)
+    totals = weighted.groupby([keys[name] for name in keys.columns]).sum()
+    weight_totals = pd.DataFrame(weights, columns=deltas.columns).groupby(
+        [keys[name] for name in keys.columns]).sum()
+    counts = keys.groupby(list(keys.columns)).size()
+    return totals / weight_totals.where(weight_totals > 0), weight_totals, counts
+
+def compute_curves(per_game, first_season=None, last_season=None, min_pairs=MIN_PAIRS):
+    """Delta-method aging curves: mean change from age a to a+1, per position group and stat.
+
+    Returns a frame indexed by (position, age) with a delta and a cumulative
+    column per stat; cumulative is the change since the youngest age, so its
+    maximum marks the peak. Cells with fewer than min_pairs pairs borrow the
+    ALL curve's delta.
+    """
+    keys, deltas, weight = season_pairs(per_game, first_season, last_season)
+    by_position, _, position_counts = weighted_deltas(keys, deltas, weight)
+    overall, _, overall_counts = weighted_deltas(keys[['age']], deltas, weight)
+
+    ages = np.arange(keys['age'].min(), keys['age'].max() + 1)
+    overall = overall.reindex(ages)
+    frames = {ALL_POSITIONS: overall.where(overall_counts.reindex(ages, fill_value=0) >= min_pairs, axis=0)}
+    paired_positions = set(keys['position'].dropna())
+    for position in sorted(set(POSITION_GROUPS.values())):
+        if position not in paired_positions:
+            # No pairs at all in this range, e.g. a short span of seasons
+            frames[position] = frames[ALL_POSITIONS]
+            continue
+        curve =by_position.xs(position, level='position').reindex(ages)
+        enough = position_counts.xs(position, level='position').reindex(ages, fill_value=0) >= min_pairs
+        frames[position] = curve.where(enough, frames[ALL_POSITIONS], axis=0)
+
+    curves = pd.concat(frames, names=['position', 'age']).fillna(0.0)
+    cumulative = curves.groupby(level='position').cumsum().add_suffix('_cumulative')
+    return pd.concat([curves, cumulative], axis=1)
+
+def source_stamp(data_dir=None):
+    """(path, size, mtime) of the CSV the curves come from; stored curves are only reused for the same one."""
+    csv_path = os.path.join(data_dir or DATA_DIR, 'Player Per Game.csv')
+    stat = os.stat(csv_path)
+    return csv_path, stat.st_size, stat.st_mtime_ns
+
+def init_aging_tables(conn):
+    """Create the curve tables; call inside a transaction so replacing an old-layout table is atomic."""
+    # Tables from before ranges were stored hold one unkeyed range; they are derived, so start over
+    has_ranges = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aging_curve_ranges'"
+    ).fetchone() is not None
+    if not has_ranges:
+        conn.execute('DROP TABLE IF EXISTS aging_curves')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS aging_curve_ranges (
+            first_season INTEGER NOT NULL,
+            last_season INTEGER NOT NULL,
+            min_pairs INTEGER NOT NULL,
+            source_size INTEGER NOT NULL,
+            source_mtime_ns INTEGER NOT NULL,
+            built_at DATETIME,
+            PRIMARY KEY (first_season, last_season)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS aging_curves (
+            first_season INTEGER NOT NULL,
+            last_season INTEGER NOT NULL,
+            position TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            stat TEXT NOT NULL,
+            delta REAL,
+            cumulative REAL,
+            PRIMARY KEY (first_season, last_season, position, age, stat)
+        ) WITHOUT ROWID
+    ''')
+
+def range_key(first_season, last_season):
+    return (OPEN_END if first_season is None else first_season,
+            OPEN_END if last_season is None else last_season)
+
+def read_aging_curves(conn, first_season=None, last_season=None, min_pairs=MIN_PAIRS, stamp=None):
+    """Stored curves of a season range, or None if there are none built from this CSV with these settings."""
+    key = range_key(first_season, last_season)
+    try:
+        built = conn.execute('''
+            SELECT min_pairs, source_size, source_mtime_ns FROM aging_curve_ranges
+            WHERE first_season = ? AND last_season = ?
+        ''', key).fetchone()
+    except sqlite3.OperationalError:
+        return None  # Nothing stored in this database yet
+    if built is None or (stamp is not None and tuple(built) != (min_pairs, *stamp[1:])):
+        return None
+    rows = pd.read_sql_query('''
+        SELECT position, age, stat, delta, cumulative FROM aging_curves
+        WHERE first_season = ? AND last_season = ?
+    ''', conn, params=list(key))
+    if rows.empty:
+        return None
+    curves = rows.pivot(index=['position', 'age'], columns='stat', values=['delta', 'cumulative'])
+    stats = list(TARGETS)
+    return pd.concat([curves['delta'][stats], curves['cumulative'][stats].add_suffix('_cumulative')], axis=1)
+
+def aging_curves(first_season=None, last_season=None, data_dir=None, min_pairs=MIN_PAIRS, db_path=None):
+    """Curves for a season range, computed once per range while the CSV is unchanged.
+
+    A range built by build_aging_curves is read back from the database
+    instead of being recomputed in each new process.
+    """
+    stamp = source_stamp(data_dir)
+    key = (*stamp, first_season, last_season, min_pairs)
+    curves = _curve_cache.get(key)
+    if curves is None:
+        db_path = db_path or APP_DB
+        # Don't let sqlite3 create an empty database just to look for curves
+        if os.path.exists(db_path):
+            conn = sqlite3.connect(db_path)
+            try:
+                curves = read_aging_curves(conn, first_season, last_season, min_pairs, stamp)
+            finally:
+                conn.close()
+        if curves is None:
+            curves = compute_curves(csv_cache.read_csv(stamp[0]), first_season, last_season, min_pairs)
+        _curve_cache[key] = curves
+    return curves
+
+def age_adjustments(curves, positions, ages, stats=None, years=1):
+    """Expected change of each stat for players of the given positions aging `years` from `ages`.
+
+    positions are listed positions ('SG', 'F-C', ...) or groups; unknown
+    positions use the ALL curve, and ages outside the curve change nothing.
+    """
+    stats = list(stats or TARGETS)
+    groups = position_group(pd.Series(positions, dtype=object)).fillna(ALL_POSITIONS).to_numpy()
+    ages = np.asarray(ages, dtype=float)
+    total = np.zeros((len(groups), len(stats)))
+    for step in range(years):
+        index = pd.MultiIndex.from_arrays([groups, np.floor(ages) + step], names=['position', 'age'])
+        total += curves[stats].reindex(index).fillna(0.0).to_numpy()
+    return pd.DataFrame(total, columns=stats)
+
+def apply_aging(projections, positions, ages, curves=None, years=1):
+    """Projections (a frame with stat columns) shifted by the aging curve; the input is not modified."""
+    curves = aging_curves() if curves is None else curves
+    stats = [stat for stat in TARGETS if stat in projections.columns]
+    adjusted = projections.copy()
+    adjusted[stats] = projections[stats].to_numpy(float) + age_adjustments(curves, positions, ages, stats,
+                                                                          years).to_numpy()
+    adjusted[stats] = adjusted[stats].clip(lower=0)
+    percent = [stat for stat in stats if stat in PERCENT_TARGETS]
+    adjusted[percent] = adjusted[percent].clip(upper=1)
+    return adjusted
+
+def peak_ages(curves):
+    """Age at which each position's cumulative curve tops out, per stat."""
+    cumulative = curves[[f'{stat}_cumulative' for stat in TARGETS]]
+    # The cumulative curve gives the level entering age + 1
+    peaks = cumulative.groupby(level='position').idxmax().map(lambda index: index[1] + 1)
+    peaks.columns = list(TARGETS)
+    return peaks
+
+def write_aging_curves(conn, curves, first_season=None, last_season=None, min_pairs=MIN_PAIRS, stamp=None):
+    """Store the curves of one season range, replacing only that range's rows."""
+    key = range_key(first_season, last_season)
+    _, size, mtime_ns = stamp or source_stamp()
+    rows = [
+        (*key, position, int(age), stat, float(values[stat]), float(values[f'{stat}_cumulative']))
+        for (position, age), values in curves.iterrows()
+        for stat in TARGETS
+    ]
+    with conn:
+        # sqlite3 would autocommit the DDL; one explicit transaction covers the schema change and the rows
+        conn.execute('BEGIN')
+        init_aging_tables(conn)
+        conn.execute('DELETE FROM aging_curves WHERE first_season = ? AND last_season = ?', key)
+        conn.executemany('INSERT INTO aging_curves VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.execute('''
+            INSERT OR REPLACE INTO aging_curve_ranges
+            (first_season, last_season, min_pairs, source_size, source_mtime_ns, built_at)
+            VALUES (?, ?, ?, ?, ?, datetime('now'))
+        ''', (*key, min_pairs, size, mtime_ns))
+    return len(rows)
+
+def build_aging_curves(db_path=None, first_season=None, last_season=None, data_dir=None):
+    started = time.perf_counter()
+    stamp = source_stamp(data_dir)
+    curves = compute_curves(csv_cache.read_csv(stamp[0]), first_season, last_season)
+    _curve_cache[(*stamp, first_season, last_season, MIN_PAIRS)] = curves
+    computed = time.perf_counter()
+    conn = sqlite3.connect(db_path or APP_DB)
+    try:
+        count = write_aging_curves(conn, curves, first_season, last_season, MIN_PAIRS, stamp)
+    finally:
+        conn.close()
+    logging.info(f"Peak ages:\n{peak_ages(curves).to_string()}")
+    logging.info(f"Aging curves: {len(curves)} position/age cells in {computed - started:.3f}s, "
+                 f"{count} rows written")
+    return curves
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute delta-method aging curves and store them.")
+    parser.add_argument('--first', type=int, help="First season of the pairs (default: all history)")
+    parser.add_argument('--last', type=int, help="Last season of the pairs")
+    args = parser.parse_args()
+    try:
+        build_aging_curves(first_season=args.first, last_season=args.last)
+    except Exception as e:
+        logging.error(f"Aging curves failed: {e}")
+        sys.exit(1)
@@ -2,6 +2,8 @@ import pandas as pd
 import os
 import logging
 
+import csv_cache
+
 logging.basicConfig(level=logging.INFO)
 
 def analyze_dataset(base_path):
@@ -23,7 +25,7 @@ def analyze_dataset(base_path):
                 continue  # Skip this file if it doesn't exist
             
             # Read the CSV file
-            df = pd.read_csv(file_path)
+            df = csv_cache.read_csv(file_path)
             print(f"\nAnalyzing {name}:")
             print("Columns:", df.columns.tolist())
             print("Sample data:")
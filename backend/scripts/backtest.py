@@ -0,0 +1,198 @@
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from feature_store import STAT_COLUMNS, RECENT_WEIGHTS, RATE_STATS, load_seasons, weighted_means, trends
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+# First season of each era the errors are broken down by
+ERAS = {
+    1947: 'early',
+    1955: 'shot clock',
+    1980: 'three-point line',
+    2005: 'hand-check rules',
+    2015: 'pace and space',
+}
+WEIGHT_STEP = 0.1  # Grid spacing of the recency weights
+PERCENT_STATS = [stat for stat in STAT_COLUMNS if stat not in RATE_STATS]
+
+# Lag matrices of the seasons being replayed, shared with the worker processes
+_history = {}
+
+def lag_matrices(seasons, depth=len(RECENT_WEIGHTS)):
+    """Every player-season as a prediction target with the seasons before it.
+
+    Returns the target rows (player_id, season, actual stat values) and, per
+    stat, a (targets x depth) matrix of the player's previous seasons, most
+    recent first and NaN where there are fewer. This is exactly what
+    generatePredictions would have seen when the target season was next, so
+    one pass over the table replays every season at once.
+    """
+    seasons = seasons.sort_values(['player_id', 'season'], kind='stable').reset_index(drop=True)
+    by_player = seasons.groupby('player_id', sort=False)
+    columns = list(STAT_COLUMNS.values())
+    lags = [by_player[columns].shift(lag) for lag in range(1, depth + 1)]
+    # A player's first season has nothing to predict it from
+    has_history = lags[0][columns[0]].notna().to_numpy()
+    targets = seasons.loc[has_history, ['player_id', 'season'] + columns].reset_index(drop=True)
+    matrices = {
+        stat: np.column_stack([lag.loc[has_history, column].to_numpy(float) for lag in lags])
+        for stat, column in STAT_COLUMNS.items()
+    }
+    return targets, matrices
+
+def weight_grid(step=WEIGHT_STEP, depth=len(RECENT_WEIGHTS)):
+    """Every weight vector on a step grid whose weights sum to 1, most recent season weighted at least step."""
+    steps = int(round(1 / step))
+    grid = [np.array(counts) * step
+            for counts in itertools.product(range(steps + 1), repeat=depth)
+            if sum(counts) == steps and counts[0] > 0]
+    # Also check the weights in use, in case they are off the grid
+    if not any(np.allclose(weights, RECENT_WEIGHTS) for weights in grid):
+        grid.append(RECENT_WEIGHTS.copy())
+    return grid
+
+def era_of(seasons):
+    starts = np.array(sorted(ERAS))
+    return np.array([ERAS[start] for start in starts])[np.searchsorted(starts, seasons, side='right') - 1]
+
+def init_worker(targets, matrices):
+    _history['targets'] = targets
+    _history['matrices'] = matrices
+
+def run_seasons(season_list, configs):
+    """Absolute and squared error sums of each config, per season and stat, over some target seasons.
+
+    The migration stores unrecorded stats as 0, so percentage targets of 0
+    are skipped, as are counting stats that are 0 in the target season and
+    every season before it (blocks and steals before they were tracked).
+    """
+    targets, matrices = _history['targets'], _history['matrices']
+    rows = np.flatnonzero(targets['season'].isin(season_list).to_numpy())
+    seasons = targets['season'].to_numpy()[rows]
+    labels, codes = np.unique(seasons, return_inverse=True)
+
+    results = []
+    for stat, column in STAT_COLUMNS.items():
+        matrix = matrices[stat][rows]
+        actual = targets[column].to_numpy(float)[rows]
+        valid = ~np.isnan(actual)
+        if stat in PERCENT_STATS:
+            valid &= actual > 0
+        else:
+            valid &= (actual != 0) | (np.nan_to_num(matrix) != 0).any(axis=1)
+        trend = trends(matrix)
+        counts = np.bincount(codes[valid], minlength=len(labels))
+        for index, (weights, use_trend) in enumerate(configs):
+            predicted = weighted_means(matrix, weights)
+            if use_trend:
+                predicted = predicted * (1 + trend)
+            errors = (predicted - actual)[valid]
+            absolute = np.bincount(codes[valid], weights=np.abs(errors), minlength=len(labels))
+            squared = np.bincount(codes[valid], weights=errors ** 2, minlength=len(labels))
+            results.append(pd.DataFrame({
+                'config': index, 'season': labels, 'stat': stat,
+                'count': counts, 'abs_error': absolute, 'sq_error': squared,
+            }))
+    return pd.concat(results, ignore_index=True)
+
+def error_sums(targets, matrices, configs, workers=None):
+    """run_seasons over every target season, split into one chunk per worker process."""
+    all_seasons = np.unique(targets['season'].to_numpy())
+    workers = max(1, min(workers or os.cpu_count() or 1, len(all_seasons)))
+    # Interleave the seasons so every chunk gets a share of the large modern ones
+    chunks = [all_seasons[start::workers].tolist() for start in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(targets, matrices)) as pool:
+        futures = [pool.submit(run_seasons, chunk, configs) for chunk in chunks]
+        return pd.concat([future.result() for future in futures], ignore_index=True)
+
+def summarize(sums, keys):
+    """MAE and RMSE from error sums grouped by keys."""
+    totals = sums.groupby(keys)[['count', 'abs_error', 'sq_error']].sum()
+    totals = totals[totals['count'] > 0]
+    return pd.DataFrame({
+        'count': totals['count'].astype(int),
+        'mae': totals['abs_error'] / totals['count'],
+        'rmse': np.sqrt(totals['sq_error'] / totals['count']),
+    })
+
+def config_label(weights, use_trend):
+    return '/'.join(f'{weight:g}' for weight in weights) + (' +trend' if use_trend else '')
+
+def run_backtest(db_path=None, first_season=None, last_season=None, step=WEIGHT_STEP, workers=None):
+    """Replay every target season for every weight vector with and without trend.
+
+    Returns (per_era, by_config): MAE/RMSE of the generatePredictions
+    configuration per era and stat, and of every configuration per stat.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path or APP_DB)
+    try:
+        seasons = load_seasons(conn)
+    finally:
+        conn.close()
+    targets, matrices = lag_matrices(seasons)
+    in_range = np.ones(len(targets), dtype=bool)
+    if first_season is not None:
+        in_range &= targets['season'].to_numpy() >= first_season
+    if last_season is not None:
+        in_range &= targets['season'].to_numpy() <= last_season
+    targets = targets[in_range].reset_index(drop=True)
+    matrices = {stat: matrix[in_range] for stat, matrix in matrices.items()}
+    prepared = time.perf_counter()
+
+    configs = [(weights, use_trend) for weights in weight_grid(step) for use_trend in (True, False)]
+    sums = error_sums(targets, matrices, configs, workers)
+    labels = [config_label(weights, use_trend) for weights, use_trend in configs]
+    sums['config'] = np.array(labels)[sums['config'].to_numpy()]
+    sums['era'] = era_of(sums['season'].to_numpy())
+
+    current = config_label(RECENT_WEIGHTS, True)
+    per_era = summarize(sums[sums['config'] == current], ['era', 'stat'])
+    by_config = summarize(sums, ['stat', 'config'])
+    elapsed = time.perf_counter() - started
+    logging.info(f"Backtest: {len(targets)} player-seasons x {len(configs)} configs in {elapsed:.2f}s "
+                 f"({prepared - started:.2f}s loading)")
+    return per_era, by_config
+
+def print_report(per_era, by_config, top=5):
+    current = config_label(RECENT_WEIGHTS, True)
+    eras = list(dict.fromkeys(ERAS.values()))
+    table = per_era.reset_index()
+    table['era'] = pd.Categorical(table['era'], categories=eras, ordered=True)
+    logging.info(f"\ngeneratePredictions ({current}) by era:")
+    logging.info(table.sort_values(['era', 'stat']).to_string(index=False, float_format='%.4f'))
+    for stat in STAT_COLUMNS:
+        ranked = by_config.loc[stat].sort_values('mae')
+        rank = ranked.index.get_loc(current) + 1
+        logging.info(f"\n{stat}: generatePredictions ranks {rank} of {len(ranked)} by MAE")
+        logging.info(ranked.head(top).to_string(float_format='%.4f'))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the recency-weighted prediction heuristic.")
+    parser.add_argument('--first', type=int, help="First target season (default: all history)")
+    parser.add_argument('--last', type=int, help="Last target season")
+    parser.add_argument('--step', type=float, default=WEIGHT_STEP, help="Weight grid spacing")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--top', type=int, default=5, help="Best configurations listed per stat")
+    args = parser.parse_args()
+    try:
+        per_era, by_config = run_backtest(first_season=args.first, last_season=args.last, step=args.step,
+                                          workers=args.workers)
+        print_report(per_era, by_config, args.top)
+    except Exception as e:
+        logging.error(f"Backtest failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,90 @@
+import sys
+import time
+import sqlite3
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+from feature_store import STAT_COLUMNS, load_seasons, compute_features
+import projection_model
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+PREDICTION_COLUMNS = list(STAT_COLUMNS)
+
+def init_predictions_table(conn):
+    columns = ',\n'.join(f'            {stat} REAL' for stat in PREDICTION_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS predictions (
+            player_id INTEGER PRIMARY KEY,
+            season INTEGER,
+{columns},
+            generated_at DATETIME
+        )
+    ''')
+
+def predict_all(seasons):
+    """Next-season predictions for every player in one pass, same formula as generatePredictions.
+
+    These are the feature store's *_predicted columns, so the two tables can't
+    disagree. `seasons` must be ordered by player, most recent season first
+    (see load_seasons).
+    """
+    features = compute_features(seasons)
+    predictions = pd.DataFrame(index=features.index)
+    predictions['season'] = features['last_season'].astype(np.int64) + 1
+    for stat in PREDICTION_COLUMNS:
+        predictions[stat] = features[f'{stat}_predicted']
+    return predictions
+
+def write_predictions(conn, predictions):
+    rows = list(zip(
+        predictions.index.astype(int).tolist(),
+        predictions['season'].astype(int).tolist(),
+        *(predictions[stat].astype(float).tolist() for stat in PREDICTION_COLUMNS)
+    ))
+    placeholders = ', '.join('?' for _ in range(len(PREDICTION_COLUMNS) + 2))
+    with conn:
+        init_predictions_table(conn)
+        conn.execute('DELETE FROM predictions')
+        conn.executemany(
+            f"INSERT INTO predictions (player_id, season, {', '.join(PREDICTION_COLUMNS)}, generated_at) "
+            f"VALUES ({placeholders}, datetime('now'))",
+            rows
+        )
+    return len(rows)
+
+def run_batch_predictions(db_path=None):
+    """Predict every player's next season and replace the predictions table."""
+    db_path = db_path or APP_DB
+    conn = sqlite3.connect(db_path)
+    try:
+        started = time.perf_counter()
+        seasons = load_seasons(conn)
+        loaded = time.perf_counter()
+        predictions = predict_all(seasons)
+        computed = time.perf_counter()
+        count = write_predictions(conn, predictions)
+        finished = time.perf_counter()
+
+        logging.info(f"Predicted {count} players from {len(seasons)} seasons in {finished - started:.3f}s "
+                     f"(load {loaded - started:.3f}s, compute {computed - loaded:.3f}s, "
+                     f"write {finished - computed:.3f}s)")
+    finally:
+        conn.close()
+    # Alongside the heuristic, once a model has been trained (projection_model.py train)
+    projection_model.score_players(db_path)
+    return count
+
+if __name__ == "__main__":
+    try:
+        run_batch_predictions()
+    except Exception as e:
+        logging.error(f"Batch predictions failed: {e}")
+        sys.exit(1)
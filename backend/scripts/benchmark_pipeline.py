@@ -0,0 +1,505 @@
+import sys
+import os
+import json
+import time
+import shutil
+import sqlite3
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks')  # One JSON file per run
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'routes'))
+
+# Configure logging before any pipeline module can point it at its own log file
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+import csv_cache
+import migrate_nba_stats
+import migrate_from_csv
+import clean_nba_data
+import index_audit
+import name_search
+
+DEFAULT_REPEAT = 3
+ID_STRIDE = 1_000_000  # Offset for player_id/seas_id of each extra copy when scaling up
+SCALED_FILES = ['Player Per Game.csv', 'Player Career Info.csv']
+INCREMENTAL_PLAYERS = 100  # Active players fed to run_incremental_update at scale 1
+GAME_DATE = '2025-04-13'
+
+class Workspace:
+    """A scratch copy of the CSVs and every database the benchmarks write.
+
+    The bundled data is copied, never modified, and nothing outside the
+    workspace directory is written to: while it is open, the column caches of
+    every CSV read, the bundled ones included, live under it too.
+    """
+
+    def __init__(self, scale):
+        self.root = tempfile.mkdtemp(prefix='nba_benchmark_')
+        self.data_dir = os.path.join(self.root, 'nbastats')
+        self.scale = scale
+        self.cache_root = csv_cache.CACHE_ROOT
+        csv_cache.CACHE_ROOT = os.path.join(self.root, 'column_cache')
+        try:
+            self.rows = build_scaled_data(self.data_dir, scale)
+        except Exception:
+            self.close()
+            raise
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def remove(self, *names):
+        for name in names:
+            for suffix in ('', '-wal', '-shm', '-journal', '.previous'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.path(name) + suffix)
+
+    def close(self):
+        csv_cache.CACHE_ROOT = self.cache_root
+        shutil.rmtree(self.root, ignore_errors=True)
+
+def scale_frame(df, scale, sampled_ids=None):
+    """Shrink to a share of the players, or repeat every player under new ids and names."""
+    if scale < 1:
+        return df[df['player_id'].isin(sampled_ids)]
+    copies = []
+    for copy in range(int(scale)):
+        scaled = df.copy()
+        if copy:
+            scaled['player_id'] += copy * ID_STRIDE
+            if 'seas_id' in scaled:
+                scaled['seas_id'] += copy * ID_STRIDE
+            scaled['player'] = scaled['player'] + f' {copy + 1}'
+        copies.append(scaled)
+    return pd.concat(copies, ignore_index=True)
+
+def build_scaled_data(data_dir, scale):
+    """Copy the bundled CSVs, resizing the per-player files by the scale multiplier."""
+    os.makedirs(data_dir)
+    for file_name in os.listdir(DATA_DIR):
+        if file_name.endswith('.csv') and file_name not in SCALED_FILES:
+            shutil.copy2(os.path.join(DATA_DIR, file_name), data_dir)
+
+    per_game = csv_cache.read_csv(os.path.join(DATA_DIR, 'Player Per Game.csv'))
+    player_ids = per_game['player_id'].unique()
+    sampled_ids = set(player_ids[:max(1, int(len(player_ids) * scale))])
+    rows = {}
+    for file_name in SCALED_FILES:
+        df = per_game if file_name == 'Player Per Game.csv' else csv_cache.read_csv(os.path.join(DATA_DIR, file_name))
+        scaled = scale_frame(df, scale, sampled_ids)
+        scaled.to_csv(os.path.join(data_dir, file_name), index=False)
+        rows[file_name] = len(scaled)
+    return rows
+
+@contextlib.contextmanager
+def patched(module, **values):
+    """Point a script's module-level path constants at the workspace for one run."""
+    original = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+@contextlib.contextmanager
+def quiet():
+    """Keep per-row progress output from the scripts out of the report."""
+    logging.disable(logging.INFO)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+def table_count(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+# Canned NBA API responses
+
+def result_set(name, headers, rows):
+    return {'name': name, 'headers': headers, 'rowSet': rows}
+
+CAREER_HEADERS = ['PLAYER_ID', 'SEASON_ID', 'LEAGUE_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'PLAYER_AGE', 'GP', 'GS',
+                  'MIN', 'FG_PCT', 'FG3_PCT', 'FT_PCT', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PTS']
+
+def career_payload(player_id, resource):
+    seasons = [[player_id, f'{year}-{str(year + 1)[2:]}', '00', 1610612747, 'LAL', 20 + year - 2018,
+                70, 60, 30.5, 0.48, 0.36, 0.81, 5.1, 4.2, 1.1, 0.5, 2.2, 18.4]
+               for year in range(2018, 2025)]
+    totals = [[player_id, '00', 1610612747, 490, 420, 2135.0, 0.48, 0.36, 0.81, 357, 294, 77, 35, 154, 1288]]
+    return {'resource': resource, 'parameters': {}, 'resultSets': [
+        result_set('SeasonTotalsRegularSeason', CAREER_HEADERS, seasons),
+        result_set('CareerTotalsRegularSeason',
+                   [h for h in CAREER_HEADERS if h not in ('SEASON_ID', 'TEAM_ABBREVIATION', 'PLAYER_AGE')], totals),
+    ]}
+
+def info_payload(player_id):
+    return {'resource': 'commonplayerinfo', 'parameters': {}, 'resultSets': [
+        result_set('CommonPlayerInfo', ['PERSON_ID', 'DISPLAY_FIRST_LAST', 'TEAM_NAME', 'POSITION', 'JERSEY'],
+                   [[player_id, 'Benchmark Player', 'Lakers', 'Guard', '23']]),
+    ]}
+
+def game_log_payload(player_ids):
+    return {'resource': 'leaguegamelog', 'parameters': {}, 'resultSets': [
+        result_set('LeagueGameLog', ['PLAYER_ID', 'GAME_DATE'],
+                   [[player_id, GAME_DATE] for player_id in player_ids]),
+    ]}
+
+class CannedNBAStats:
+    """Local HTTP server answering the stats.nba.com endpoints the updater calls."""
+
+    def __init__(self, player_ids):
+        game_log = json.dumps(game_log_payload(player_ids)).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.rstrip('/').rsplit('/', 1)[-1].lower()
+                player_id = int(parse_qs(url.query).get('PlayerID', ['0'])[0])
+                if endpoint == 'leaguegamelog':
+                    body = game_log
+                elif endpoint == 'commonplayerinfo':
+                    body = json.dumps(info_payload(player_id)).encode()
+                elif endpoint in ('playercareerstats', 'playerprofilev2'):
+                    body = json.dumps(career_payload(player_id, endpoint)).encode()
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}/stats/{{endpoint}}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+# Benchmarks. Each returns (setup, run): setup is untimed, run is timed and returns rows processed.
+
+def bench_migrate_nba_stats(ws):
+    db_path = ws.path('nba_stats.db')
+
+    def setup():
+        ws.remove('nba_stats.db')
+
+    def run():
+        with patched(migrate_nba_stats, APP_DB=db_path, DATA_DIR=ws.data_dir), quiet():
+            migrate_nba_stats.migrate_data()
+        return table_count(db_path, 'players') + table_count(db_path, 'seasons')
+    return setup, run
+
+def bench_migrate_from_csv(ws):
+    db_path = ws.path('from_csv.db')
+
+    def setup():
+        ws.remove('from_csv.db')
+
+    def run():
+        with patched(migrate_from_csv, DEST_DB=db_path, DATA_DIR=ws.data_dir), quiet():
+            migrate_from_csv.migrate_data()
+        return table_count(db_path, 'players') + table_count(db_path, 'seasons')
+    return setup, run
+
+def bench_clean_nba_data(ws):
+    source = os.path.join(ws.data_dir, 'Player Per Game.csv')
+    destination = ws.path('cleaned.csv')
+
+    def run():
+        with quiet():
+            clean_nba_data.clean_nba_data(source, destination)
+        return ws.rows['Player Per Game.csv']
+    return None, run
+
+def api_player_data(data_dir):
+    """Per-game rows shaped like the player_data dicts fetch_player builds from the API."""
+    per_game = csv_cache.read_csv(os.path.join(data_dir, 'Player Per Game.csv'))
+    player_data = {}
+    for row in per_game.itertuples(index=False):
+        player = player_data.setdefault(row.player_id, {
+            'id': int(row.player_id),
+            'full_name': row.player,
+            'team': row.tm,
+            'position': row.pos,
+            'stats': None,
+            'seasons': [],
+        })
+        season = {
+            'SEASON_ID': f'{row.season - 1}-{str(row.season)[2:]}',
+            'TEAM_ABBREVIATION': row.tm,
+            'GP': int(row.g),
+            'MIN': float(row.mp_per_game),
+            'PTS': float(row.pts_per_game),
+            'AST': float(row.ast_per_game),
+            'REB': float(row.trb_per_game),
+            'STL': float(row.stl_per_game),
+            'BLK': float(row.blk_per_game),
+            'FG_PCT': float(row.fg_percent) if pd.notna(row.fg_percent) else 0,
+            'FG3_PCT': float(row.x3p_percent) if pd.notna(row.x3p_percent) else 0,
+            'FT_PCT': float(row.ft_percent) if pd.notna(row.ft_percent) else 0,
+        }
+        player['seasons'].append(season)
+        # fetch_player stores the first PlayerCareerStats row as the player's stats
+        player['stats'] = player['stats'] or season
+    return list(player_data.values())
+
+def bench_save_player_data(ws):
+    import fetch_nba_stats
+    db_path = ws.path('fetch.db')
+    players = api_player_data(ws.data_dir)
+
+    def setup():
+        ws.remove('fetch.db')
+        conn = sqlite3.connect(db_path)
+        fetch_nba_stats.init_database(conn)
+        conn.close()
+
+    def run():
+        conn = sqlite3.connect(db_path)
+        try:
+            for player_data in players:
+                fetch_nba_stats.save_player_data(conn, player_data)
+        finally:
+            conn.close()
+        return len(players) + sum(len(player['seasons']) for player in players)
+    return setup, run
+
+def bench_group_commit_writer(ws):
+    import fetch_nba_stats
+    from db_writer import GroupCommitWriter
+    db_path = ws.path('fetch_writer.db')
+    players = api_player_data(ws.data_dir)
+
+    def setup():
+        ws.remove('fetch_writer.db')
+        conn = sqlite3.connect(db_path)
+        fetch_nba_stats.init_database(conn)
+        conn.close()
+
+    def run():
+        writer = GroupCommitWriter(db_path)
+        try:
+            for player_data in players:
+                writer.submit(fetch_nba_stats.player_write_ops(player_data))
+        finally:
+            writer.close()
+        return len(players) + sum(len(player['seasons']) for player in players)
+    return setup, run
+
+def bench_incremental_update(ws):
+    import incremental_update
+    from nba_api.stats.static import players
+    from nba_api.stats.library.http import NBAStatsHTTP
+    db_path = ws.path('updates.db')
+    active = [player for player in players.get_players() if player.get('is_active')]
+    active = active[:max(1, int(INCREMENTAL_PLAYERS * ws.scale))]
+    updater = None
+
+    def setup():
+        nonlocal updater
+        ws.remove('updates.db')
+        # No response cache, so every run goes over the wire to the canned server
+        updater = incremental_update.NBADatabaseUpdater(db_path, cache_path=None)
+        updater.rate_limit_delay = 0
+        updater.setup_database()
+
+        async def get_active_players():
+            return active
+        updater.get_active_players = get_active_players
+
+    def run():
+        api = CannedNBAStats([player['id'] for player in active])
+        try:
+            with patched(NBAStatsHTTP, base_url=api.base_url), quiet():
+                asyncio.run(updater.run_incremental_update())
+        finally:
+            api.close()
+        return table_count(db_path, 'players')
+    return setup, run
+
+BENCHMARKS = {
+    'migrate_nba_stats': bench_migrate_nba_stats,
+    'migrate_from_csv': bench_migrate_from_csv,
+    'clean_nba_data': bench_clean_nba_data,
+    'save_player_data': bench_save_player_data,
+    'group_commit_writer': bench_group_commit_writer,
+    'incremental_update': bench_incremental_update,
+}
+
+def run_benchmark(ws, factory, repeat):
+    try:
+        setup, run = factory(ws)
+    except ImportError as e:
+        return {'skipped': f'missing dependency: {e.name or e}'}
+    runs = []
+    rows = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        rows = run()
+        runs.append(time.perf_counter() - started)
+    median = statistics.median(runs)
+    return {
+        'runs_s': runs,
+        'median_s': median,
+        'min_s': min(runs),
+        'rows': rows,
+        'rows_per_sec': rows / median if median else None,
+    }
+
+def read_queries(ws, repeat):
+    """Median latency (ms) of the app's hot read queries against the migrated database."""
+    db_path = ws.path('nba_stats.db')
+    if not os.path.exists(db_path):
+        with patched(migrate_nba_stats, APP_DB=db_path, DATA_DIR=ws.data_dir), quiet():
+            migrate_nba_stats.migrate_data()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        params = index_audit.sample_parameters(conn)
+        results = {}
+        for name, _, sql in index_audit.QUERY_CATALOG:
+            try:
+                results[name] = index_audit.time_query(conn, sql, params)
+            except sqlite3.OperationalError:
+                continue  # Written for the API schema
+        results['player_features lookup'] = index_audit.time_query(
+            conn, 'SELECT * FROM player_features WHERE player_id = :player_id', params
+        )
+        results['player profile lookup'] = index_audit.time_query(
+            conn, 'SELECT profile FROM player_profiles WHERE name_key = LOWER(:full_name) LIMIT 2', params
+        )
+    finally:
+        conn.close()
+
+    search = name_search.PlayerNameSearch(db_path)
+    try:
+        results['name typeahead'], _ = name_search.benchmark(search, repeat=repeat)
+    finally:
+        search.close()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run_suite(scale=1.0, repeat=DEFAULT_REPEAT, only=None):
+    """Run the selected benchmarks on a scratch workspace and return the results document."""
+    names = list(BENCHMARKS) if not only else [name for name in BENCHMARKS if name in only]
+    ws = Workspace(scale)
+    cwd = os.getcwd()
+    # Some scripts log to a file in the working directory
+    os.chdir(ws.root)
+    try:
+        results = {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'scale': scale,
+            'repeat': repeat,
+            'input_rows': ws.rows,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'benchmarks': {},
+        }
+        for name in names:
+            logging.info(f"Running {name}...")
+            results['benchmarks'][name] = run_benchmark(ws, BENCHMARKS[name], repeat)
+        if not only or 'read_queries' in only:
+            logging.info("Running read_queries...")
+            results['read_queries_ms'] = read_queries(ws, repeat)
+        return results
+    finally:
+        os.chdir(cwd)
+        ws.close()
+
+def percent_change(new, old):
+    return f'{(new - old) / old * 100:+.1f}%' if old else ''
+
+def print_report(results, baseline=None):
+    baseline = baseline or {}
+    print(f"\nBenchmarks at {results['commit']}, scale {results['scale']}, "
+          f"median of {results['repeat']}"
+          + (f" (vs {baseline['commit']})" if baseline else ''))
+    if baseline and baseline.get('scale') != results['scale']:
+        print(f"  Warning: baseline was run at scale {baseline.get('scale')}, changes are not comparable")
+    old_benchmarks = baseline.get('benchmarks', {})
+    for name, result in results['benchmarks'].items():
+        if 'skipped' in result:
+            print(f"  {name:24} skipped, {result['skipped']}")
+            continue
+        old = old_benchmarks.get(name, {})
+        print(f"  {name:24} {result['median_s']:>9.3f}s {result['rows_per_sec'] or 0:>12,.0f} rows/sec  "
+              f"{percent_change(result['median_s'], old['median_s']) if 'median_s' in old else ''}")
+    old_queries = baseline.get('read_queries_ms', {})
+    for name, ms in results.get('read_queries_ms', {}).items():
+        print(f"  {name:32} {ms:>9.3f} ms  "
+              f"{percent_change(ms, old_queries[name]) if name in old_queries else ''}")
+
+def write_results(results, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{results['commit']}-x{results['scale']:g}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    return output
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the data pipeline offline on a scratch copy of the CSVs')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Data size multiplier; below 1 samples players, above 1 adds renamed copies')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed runs per benchmark')
+    parser.add_argument('--only', default=None,
+                        help=f"Comma separated subset of: {', '.join(list(BENCHMARKS) + ['read_queries'])}")
+    parser.add_argument('--output', default=None, help=f'Results file (default: {RESULTS_DIR}/<commit>-x<scale>.json)')
+    parser.add_argument('--compare', default=None, help='Earlier results file to report changes against')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+        only = set(args.only.split(',')) if args.only else None
+        results = run_suite(args.scale, args.repeat, only)
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print_report(results, baseline)
+        logging.info(f"\nResults written to {write_results(results, args.output)}")
+    except Exception as e:
+        logging.error(f"Benchmark failed: {e}")
+        sys.exit(1)
@@ -1,57 +1,167 @@
-import pandas as pd
 import os
-import numpy as np
+import csv
+import sys
+import heapq
+import math
+import shutil
+import resource
+import tempfile
 
 # Get the correct paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')
 CSV_FILE = os.path.join(DATA_DIR, 'Player Per Game.csv')
+CLEANED_FILE = os.path.join(DATA_DIR, 'Player Per Game_cleaned.csv')
+
+CHUNK_ROWS = 5000  # Rows held in memory at once; bounds peak memory regardless of file size
+MAX_FAN_IN = 64  # Runs merged (and files open) at once; more runs are merged in several passes
+FIRST_PLAYER_ID = 10000  # Base ID to avoid conflicts with existing IDs
+ID_COLUMN = 'new_player_id'
+
+def sort_key(player_index, season_index, minutes_index):
+    """Order rows by player, then season, then minutes per game descending (missing minutes last)."""
+    def key(row):
+        try:
+            minutes = float(row[minutes_index])
+        except ValueError:
+            minutes = math.nan
+        return (row[player_index], int(row[season_index]), -minutes if not math.isnan(minutes) else math.inf)
+    return key
+
+def dedupe_sorted(rows, group_key):
+    """Keep the first row of each (player, season) run in already sorted rows."""
+    previous = None
+    for row in rows:
+        current = group_key(row)
+        if current != previous:
+            previous = current
+            yield row
+
+def write_run(rows, temp_dir, run_number):
+    path = os.path.join(temp_dir, f'run_{run_number:05d}.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+def read_run(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+def merge_runs(paths, key, group_key):
+    """Sorted, deduplicated rows of several sorted runs."""
+    return dedupe_sorted(heapq.merge(*(read_run(path) for path in paths), key=key), group_key)
+
+def reduce_runs(runs, temp_dir, key, group_key, fan_in=MAX_FAN_IN):
+    """Merge runs fan_in at a time into longer ones until one final merge can take them all."""
+    next_run = len(runs)
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            merged.append(write_run(merge_runs(group, key, group_key), temp_dir, next_run))
+            next_run += 1
+            for path in group:
+                os.remove(path)
+        runs = merged
+    return runs
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def clean_nba_data(source=CSV_FILE, destination=CLEANED_FILE, chunk_rows=CHUNK_ROWS, fan_in=MAX_FAN_IN):
+    """Clean NBA data and assign unique IDs for each player's season.
+
+    Streams the source through an external merge sort so memory stays bounded
+    by chunk_rows: sorted, deduplicated runs are spilled to disk, then merged
+    at most fan_in at a time, keeping the highest mp_per_game row per
+    (player, season). Statistics are kept as running counts. The source file
+    is never modified; the result is written to a temp file and renamed into
+    place.
+    """
+    print(f"Streaming {source} in chunks of {chunk_rows} rows...")
+    temp_dir = tempfile.mkdtemp(prefix='clean_nba_data_', dir=os.path.dirname(os.path.abspath(destination)))
+    try:
+        with open(source, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            # Re-cleaning an already cleaned file replaces its IDs instead of adding a second column
+            keep = [i for i, name in enumerate(header) if name != ID_COLUMN]
+            header = [header[i] for i in keep] + [ID_COLUMN]
+            player_index, season_index = header.index('player'), header.index('season')
+            key = sort_key(player_index, season_index, header.index('mp_per_game'))
+            group_key = lambda row: (row[player_index], row[season_index])
+
+            runs = []
+            input_rows = 0
+            chunk = []
+            for row in reader:
+                chunk.append([row[i] for i in keep])
+                if len(chunk) >= chunk_rows:
+                    runs.append(write_run(dedupe_sorted(sorted(chunk, key=key), group_key), temp_dir, len(runs)))
+                    input_rows += len(chunk)
+                    chunk = []
+            if chunk:
+                runs.append(write_run(dedupe_sorted(sorted(chunk, key=key), group_key), temp_dir, len(runs)))
+                input_rows += len(chunk)
+
+        print(f"Merging {len(runs)} sorted runs...")
+        runs = reduce_runs(runs, temp_dir, key, group_key, fan_in)
+        partial = os.path.join(temp_dir, 'cleaned.csv')
+        # Rows come out sorted by player, so a change of name is a new player
+        players = 0
+        previous_player = None
+        first_season = last_season = None
+        output_rows = 0
+        with open(partial, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for output_rows, row in enumerate(merge_runs(runs, key, group_key), start=1):
+                writer.writerow(row + [FIRST_PLAYER_ID + output_rows - 1])
+                if row[player_index] != previous_player:
+                    players += 1
+                    previous_player = row[player_index]
+                season = int(row[season_index])
+                first_season = season if first_season is None else min(first_season, season)
+                last_season = season if last_season is None else max(last_season, season)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, destination)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
-def clean_nba_data():
-    """Clean NBA data and assign unique IDs for each player's season."""
-    print("Reading CSV file...")
-    df = pd.read_csv(CSV_FILE)
-    
-    # Sort by player name, season, and minutes per game (descending)
-    df = df.sort_values(['player', 'season', 'mp_per_game'], ascending=[True, True, False])
-    
-    # For each player and season, keep only the row with the highest minutes per game
-    df = df.groupby(['player', 'season']).first().reset_index()
-    
-    # Create new unique IDs for each player's season
-    # Start with a base ID of 10000 to avoid conflicts with existing IDs
-    df['new_player_id'] = np.arange(10000, 10000 + len(df))
-    
-    # Create a backup of the original file
-    backup_file = os.path.join(DATA_DIR, 'Player Per Game_backup.csv')
-    print(f"Creating backup at {backup_file}...")
-    df_original = pd.read_csv(CSV_FILE)
-    df_original.to_csv(backup_file, index=False)
-    
-    # Save the cleaned data
-    print("Saving cleaned data...")
-    df.to_csv(CSV_FILE, index=False)
-    
     # Print some statistics
     print("\nData cleaning statistics:")
-    print(f"Total number of player-seasons: {len(df)}")
-    print(f"Number of unique players: {df['player'].nunique()}")
-    print(f"Seasons covered: {df['season'].min()} to {df['season'].max()}")
-    
-    # Verify the data for specific players
-    def print_player_stats(player_name):
+    print(f"Rows read: {input_rows}")
+    print(f"Total number of player-seasons: {output_rows}")
+    print(f"Number of unique players: {players}")
+    if first_season is not None:
+        print(f"Seasons covered: {first_season} to {last_season}")
+    print(f"Written to {destination}")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+
+    print("\nVerifying cleaned data for specific players:")
+    print_player_stats(destination, ["Luka Dončić", "Dario Šarić"])
+    return output_rows
+
+def print_player_stats(path, player_names):
+    """Print a few stats for the given players, streaming the file rather than loading it."""
+    found = {name: [] for name in player_names}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['player'] in found:
+                found[row['player']].append(row)
+
+    for player_name, rows in found.items():
         print(f"\nStats for {player_name}:")
-        player_df = df[df['player'] == player_name].sort_values('season')
-        if len(player_df) == 0:
+        if not rows:
             print(f"No data found for {player_name}")
-        else:
-            print("Season, Team, MPG, PPG, APG, RPG")
-            for _, row in player_df.iterrows():
-                print(f"{row['season']}, {row['tm']}, {row['mp_per_game']:.1f}, {row['pts_per_game']:.1f}, {row['ast_per_game']:.1f}, {row['trb_per_game']:.1f}")
-    
-    print("\nVerifying cleaned data for specific players:")
-    print_player_stats("Luka Dončić")
-    print_player_stats("Dario Šarić")
+            continue
+        print("Season, Team, MPG, PPG, APG, RPG")
+        for row in sorted(rows, key=lambda r: int(r['season'])):
+            print(f"{row['season']}, {row['tm']}, {float(row['mp_per_game'] or 0):.1f}, "
+                  f"{float(row['pts_per_game'] or 0):.1f}, {float(row['ast_per_game'] or 0):.1f}, "
+                  f"{float(row['trb_per_game'] or 0):.1f}")
 
 if __name__ == "__main__":
-    clean_nba_data()
+    clean_nba_data(*sys.argv[1:3])
@@ -0,0 +1,208 @@
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+import csv_cache
+from names import normalize_name
+from projection_model import one_row_per_season
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+INDEX_FILE = os.path.join(BASE_DIR, 'data', 'comparables_index.npz')  # Persisted index
+
+INDEX_FORMAT = 1  # Bump when the features change; older index files are rebuilt
+SOURCE_FILES = ['Per 100 Poss.csv', 'Player Shooting.csv']
+
+RATE_FEATURES = [
+    'pts_per_100_poss', 'orb_per_100_poss', 'drb_per_100_poss', 'ast_per_100_poss', 'stl_per_100_poss',
+    'blk_per_100_poss', 'tov_per_100_poss', 'pf_per_100_poss', 'fga_per_100_poss', 'x3pa_per_100_poss',
+    'fta_per_100_poss', 'fg_percent', 'x3p_percent', 'ft_percent',
+]
+SHOOTING_FEATURES = [
+    'avg_dist_fga', 'percent_fga_from_x0_3_range', 'percent_fga_from_x3_10_range',
+    'percent_fga_from_x10_16_range', 'percent_fga_from_x16_3p_range', 'percent_fga_from_x3p_range',
+    'fg_percent_from_x0_3_range', 'fg_percent_from_x3_10_range', 'fg_percent_from_x10_16_range',
+    'fg_percent_from_x16_3p_range', 'percent_assisted_x2p_fg', 'percent_dunks_of_fga',
+    'percent_corner_3s_of_3pa',
+]
+FEATURES = RATE_FEATURES + SHOOTING_FEATURES
+
+MIN_MINUTES = 250  # Seasons with fewer minutes are too noisy to be anyone's comp, but can still be queried
+QUERY_BLOCK = 256  # Queries per matrix multiply; bounds the distance block at QUERY_BLOCK x index rows
+
+def sources_digest(data_dir=None):
+    data_dir = data_dir or DATA_DIR
+    digest = hashlib.sha256(str(INDEX_FORMAT).encode())
+    for file_name in SOURCE_FILES:
+        digest.update(csv_cache.file_sha256(os.path.join(data_dir, file_name)).encode())
+    return digest.hexdigest()
+
+def profile_vectors(per_100, shooting):
+    """One row per player-season: identity columns plus the raw rate and shooting profile."""
+    rates = one_row_per_season(per_100)[['player_id', 'player', 'season', 'tm', 'pos', 'mp'] + RATE_FEATURES]
+    shots = one_row_per_season(shooting)[['player_id', 'season'] + SHOOTING_FEATURES]
+    # Shot locations are tracked from 1997; earlier seasons are compared on their rates alone
+    return (rates.merge(shots, on=['player_id', 'season'], how='left')
+            .sort_values(['player_id', 'season'], kind='stable').reset_index(drop=True))
+
+def top_k(queries, vectors, norms, k, exclude=None, block=QUERY_BLOCK):
+    """Indexes and distances of the k nearest vectors to each query, by blocked matrix multiply.
+
+    ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x, so each block of queries costs one
+    GEMM against the whole index. exclude, if given, is called with a block's
+    query range and returns a (block x index) mask of vectors to skip.
+    """
+    k = min(k, len(vectors))
+    indexes = np.empty((len(queries), k), dtype=np.int64)
+    distances = np.empty((len(queries), k), dtype=np.float32)
+    for start in range(0, len(queries), block):
+        chunk = queries[start:start + block]
+        squared = (chunk * chunk).sum(axis=1)[:, None] + norms[None, :] - 2 * (chunk @ vectors.T)
+        if exclude is not None:
+            squared[exclude(start, start + len(chunk))] = np.inf
+        nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(squared, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1)
+        indexes[start:start + len(chunk)] = np.take_along_axis(nearest, order, axis=1)
+        nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+        distances[start:start + len(chunk)] = np.sqrt(np.maximum(nearest_distances, 0))
+    return indexes, distances
+
+class ComparablesIndex:
+    """Standardized profile vectors of every player-season, searchable for nearest neighbours."""
+
+    def __init__(self, seasons, vectors, mean, scale, digest):
+        self.seasons = seasons.reset_index(drop=True)  # player_id, player, season, tm, pos, mp
+        self.vectors = vectors  # float32, standardized, missing features at the mean (0)
+        self.mean = mean
+        self.scale = scale
+        self.digest = digest
+        self.searchable = np.flatnonzero(self.seasons['mp'].to_numpy() >= MIN_MINUTES)
+        self.candidates = vectors[self.searchable]
+        # The source gives some players a new player_id mid-career, so "the same player" is the folded name
+        self.player_keys = self.seasons['player'].map(normalize_name).to_numpy()
+        self.candidate_players = self.player_keys[self.searchable]
+        self.norms = (self.candidates ** 2).sum(axis=1)
+        self.rows = {key: row for row, key in enumerate(zip(self.seasons['player_id'], self.seasons['season']))}
+
+    @classmethod
+    def build(cls, data_dir=None):
+        data_dir = data_dir or DATA_DIR
+        per_100, shooting = (csv_cache.read_csv(os.path.join(data_dir, name)) for name in SOURCE_FILES)
+        profiles = profile_vectors(per_100, shooting)
+        raw = profiles[FEATURES].to_numpy(dtype=float)
+        mean = np.nanmean(raw, axis=0)
+        scale = np.nanstd(raw, axis=0)
+        scale[~(scale > 0)] = 1.0
+        vectors = np.nan_to_num((raw - mean) / scale).astype(np.float32)
+        return cls(profiles[['player_id', 'player', 'season', 'tm', 'pos', 'mp']], vectors, mean, scale,
+                   sources_digest(data_dir))
+
+    def save(self, path=None):
+        path = path or INDEX_FILE
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, vectors=self.vectors, mean=self.mean, scale=self.scale,
+                 player_id=self.seasons['player_id'].to_numpy(), season=self.seasons['season'].to_numpy(),
+                 mp=self.seasons['mp'].to_numpy(float),
+                 labels=np.array(json.dumps({
+                     'format': INDEX_FORMAT, 'digest': self.digest, 'features': FEATURES,
+                     'player': self.seasons['player'].tolist(), 'tm': self.seasons['tm'].tolist(),
+                     'pos': self.seasons['pos'].tolist(),
+                 })))
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        with np.load(path or INDEX_FILE) as saved:
+            labels = json.loads(str(saved['labels']))
+            if labels.get('format') != INDEX_FORMAT or labels.get('features') != FEATURES:
+                return None
+            seasons = pd.DataFrame({
+                'player_id': saved['player_id'], 'player': labels['player'], 'season': saved['season'],
+                'tm': labels['tm'], 'pos': labels['pos'], 'mp': saved['mp'],
+            })
+            return cls(seasons, saved['vectors'], saved['mean'], saved['scale'], labels['digest'])
+
+    def row_of(self, player_id, season):
+        try:
+            return self.rows[(player_id, season)]
+        except KeyError:
+            raise KeyError(f"No profile for player {player_id} in {season}") from None
+
+    def query_batch(self, keys, k=10, include_self=False):
+        """k nearest comps of each (player_id, season) key, as one frame with the query's key columns.
+
+        A player's own other seasons are left out unless include_self is set.
+        """
+        rows = np.array([self.row_of(player_id, season) for player_id, season in keys], dtype=np.int64)
+        exclude = None
+        if not include_self:
+            query_players = self.player_keys[rows]
+            exclude = lambda start, stop: query_players[start:stop, None] == self.candidate_players[None, :]
+        indexes, distances = top_k(self.vectors[rows], self.candidates, self.norms, k, exclude)
+
+        comps = self.seasons.iloc[self.searchable[indexes.ravel()]].reset_index(drop=True)
+        comps.insert(0, 'rank', np.tile(np.arange(1, indexes.shape[1] + 1), len(rows)))
+        comps.insert(0, 'query_season', np.repeat(self.seasons['season'].to_numpy()[rows], indexes.shape[1]))
+        comps.insert(0, 'query_player_id', np.repeat(self.seasons['player_id'].to_numpy()[rows], indexes.shape[1]))
+        comps['distance'] = distances.ravel()
+        return comps[np.isfinite(comps['distance'])].reset_index(drop=True)
+
+    def query(self, player_id, season, k=10, include_self=False):
+        """The k player-seasons most like this one, nearest first."""
+        return self.query_batch([(player_id, season)], k, include_self).drop(
+            columns=['query_player_id', 'query_season'])
+
+    def find(self, name, season=None):
+        """(player_id, season) of a player's named season, their latest by default."""
+        matches = self.seasons[self.seasons['player'].str.lower() == name.lower()]
+        if season is not None:
+            matches = matches[matches['season'] == season]
+        if matches.empty:
+            raise KeyError(f"No profile for {name}" + (f" in {season}" if season else ''))
+        latest = matches.sort_values('season', kind='stable').iloc[-1]
+        return int(latest['player_id']), int(latest['season'])
+
+def load_index(path=None, data_dir=None):
+    """The persisted index, rebuilt and saved only when it is missing or the CSVs changed."""
+    path = path or INDEX_FILE
+    started = time.perf_counter()
+    digest = sources_digest(data_dir)
+    index = ComparablesIndex.load(path) if os.path.exists(path) else None
+    if index is not None and index.digest == digest:
+        logging.info(f"Loaded comparables index of {len(index.seasons)} seasons in "
+                     f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        return index
+    index = ComparablesIndex.build(data_dir)
+    index.save(path)
+    logging.info(f"Built comparables index of {len(index.seasons)} seasons "
+                 f"({len(index.searchable)} searchable) in {time.perf_counter() - started:.3f}s")
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the historical seasons most like a player's season.")
+    parser.add_argument('player', help="Player name as in the CSVs, e.g. 'Nikola Jokić'")
+    parser.add_argument('season', type=int, nargs='?', help="Season (default: the player's latest)")
+    parser.add_argument('-k', type=int, default=10, help="Number of comps")
+    args = parser.parse_args()
+    try:
+        index = load_index()
+        player_id, season = index.find(args.player, args.season)
+        started = time.perf_counter()
+        comps = index.query(player_id, season, args.k)
+        logging.info(f"Comps for {args.player} {season} ({(time.perf_counter() - started) * 1000:.2f} ms):")
+        logging.info(comps[['rank', 'player', 'season', 'tm', 'pos', 'distance']].to_string(index=False))
+    except Exception as e:
+        logging.error(f"Comparables lookup failed: {e}")
+        sys.exit(1)
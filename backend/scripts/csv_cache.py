@@ -0,0 +1,175 @@
+import sys
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+
+CACHE_DIR_NAME = '.column_cache'  # Created next to the CSVs it caches
+CACHE_ROOT = None  # When set, caches go under this directory instead, e.g. to keep a read-only data dir clean
+MANIFEST_FILE = 'manifest.json'
+CACHE_VERSION = 2
+CHUNK_SIZE = 1 << 20
+DICTIONARY_MAX_RATIO = 0.25  # Dictionary encode columns with fewer distinct values than this share of rows
+
+def cache_dir_for(csv_path):
+    directory, file_name = os.path.split(os.path.abspath(csv_path))
+    if CACHE_ROOT is not None:
+        # One subdirectory per source directory, so same-named CSVs of different copies don't collide
+        directory = os.path.join(CACHE_ROOT, hashlib.sha256(directory.encode()).hexdigest()[:16])
+    return os.path.join(directory, CACHE_DIR_NAME, os.path.splitext(file_name)[0])
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(cache_dir, manifest):
+    temp_path = os.path.join(cache_dir, MANIFEST_FILE + '.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, os.path.join(cache_dir, MANIFEST_FILE))
+
+def is_current(manifest, csv_path, cache_dir):
+    """Whether the cache still matches the CSV; size and mtime first, content hash only if they moved."""
+    if not manifest or manifest.get('version') != CACHE_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if manifest['source_size'] == stat.st_size and manifest['source_mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if manifest['source_size'] != stat.st_size or manifest['source_sha256'] != file_sha256(csv_path):
+        return False
+    # Touched but unchanged (e.g. a fresh checkout); remember the new mtime
+    manifest['source_mtime_ns'] = stat.st_mtime_ns
+    write_manifest(cache_dir, manifest)
+    return True
+
+def code_dtype(count):
+    """Smallest signed integer type that holds codes 0..count-1 plus -1 for missing."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def is_text(column):
+    return not (pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column))
+
+def save_column(cache_dir, index, column):
+    """Write one column and return its manifest entry."""
+    entry = {'name': column.name, 'index': index, 'dtype': str(column.dtype)}
+    codes, uniques = pd.factorize(column)
+    if is_text(column) or len(uniques) < len(column) * DICTIONARY_MAX_RATIO:
+        np.save(os.path.join(cache_dir, f'{index}.codes.npy'), codes.astype(code_dtype(len(uniques))))
+        if is_text(column):
+            with open(os.path.join(cache_dir, f'{index}.values.json'), 'w') as f:
+                json.dump([value.item() if isinstance(value, np.generic) else value for value in uniques], f)
+        else:
+            np.save(os.path.join(cache_dir, f'{index}.values.npy'), np.asarray(uniques))
+        entry['kind'] = 'dictionary'
+        entry['text'] = is_text(column)
+    else:
+        np.save(os.path.join(cache_dir, f'{index}.npy'), column.to_numpy())
+        entry['kind'] = 'array'
+    return entry
+
+def build_cache(csv_path, cache_dir=None):
+    """Parse a CSV once and store it column by column.
+
+    High-cardinality numeric columns become plain .npy files that are memory
+    mapped on load. Everything else (text, seasons, teams, most per-game
+    stats) is dictionary encoded as the narrowest integer codes plus the
+    distinct values, which is where the space savings come from.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    started = time.perf_counter()
+    stat = os.stat(csv_path)
+    df = pd.read_csv(csv_path)
+
+    temp_dir = cache_dir + '.tmp'
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    columns = [save_column(temp_dir, index, df[name]) for index, name in enumerate(df.columns)]
+
+    write_manifest(temp_dir, {
+        'version': CACHE_VERSION,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': file_sha256(csv_path),
+        'rows': len(df),
+        'columns': columns,
+    })
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(temp_dir, cache_dir)
+    logging.info(f"Cached {os.path.basename(csv_path)}: {len(df)} rows, {len(columns)} columns "
+                 f"in {time.perf_counter() - started:.3f}s")
+    return read_manifest(cache_dir)
+
+def load_column(cache_dir, column, mmap=True):
+    """Rebuild a column with the dtype pd.read_csv gave it."""
+    index = column['index']
+    if column['kind'] == 'array':
+        return np.load(os.path.join(cache_dir, f'{index}.npy'), mmap_mode='r' if mmap else None)
+    # Codes are a few KB; mapping them costs more than reading them
+    codes = np.load(os.path.join(cache_dir, f'{index}.codes.npy'))
+    if not column['text']:
+        values = np.load(os.path.join(cache_dir, f'{index}.values.npy'))
+        if codes.min(initial=0) < 0:
+            # Missing values were factorized to -1, which picks the trailing NaN
+            values = np.append(values.astype(float), np.nan)
+        return values[codes]
+    with open(os.path.join(cache_dir, f'{index}.values.json')) as f:
+        categories = json.load(f)
+    return pd.Categorical.from_codes(codes, categories).astype(column['dtype'])
+
+def read_csv(csv_path, columns=None, mmap=True):
+    """Drop-in for pd.read_csv(csv_path, usecols=columns) served from the column cache.
+
+    The cache is (re)built on first use and whenever the CSV changes.
+    """
+    cache_dir = cache_dir_for(csv_path)
+    manifest = read_manifest(cache_dir)
+    if not is_current(manifest, csv_path, cache_dir):
+        manifest = build_cache(csv_path, cache_dir)
+
+    by_name = {column['name']: column for column in manifest['columns']}
+    names = list(by_name) if columns is None else list(columns)
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise ValueError(f"Columns not in {os.path.basename(csv_path)}: {missing}")
+    return pd.DataFrame({name: load_column(cache_dir, by_name[name], mmap) for name in names})
+
+def warm_cache(data_dir=None):
+    """Build or refresh the cache of every CSV in the data directory."""
+    data_dir = data_dir or DATA_DIR
+    for file_name in sorted(os.listdir(data_dir)):
+        if file_name.endswith('.csv'):
+            csv_path = os.path.join(data_dir, file_name)
+            cache_dir = cache_dir_for(csv_path)
+            if not is_current(read_manifest(cache_dir), csv_path, cache_dir):
+                build_cache(csv_path, cache_dir)
+
+if __name__ == "__main__":
+    try:
+        warm_cache(sys.argv[1] if len(sys.argv) > 1 else None)
+    except Exception as e:
+        logging.error(f"Column cache build failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,171 @@
+import sys
+import time
+import sqlite3
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+# Prediction stat names used by statsController, mapped to seasons columns
+STAT_COLUMNS = {
+    'pts': 'pts_per_game',
+    'ast': 'ast_per_game',
+    'reb': 'reb_per_game',
+    'stl': 'stl_per_game',
+    'blk': 'blk_per_game',
+    'fg_pct': 'fg_percent',
+    'fg3_pct': 'fg3_percent',
+    'ft_pct': 'ft_percent',
+}
+RATE_STATS = ['pts', 'ast', 'reb', 'stl', 'blk']  # Counting stats that get per-minute rates
+
+# Same recency weights as generatePredictions, most recent season first
+RECENT_WEIGHTS = np.array([0.5, 0.3, 0.2])
+
+FEATURE_COLUMNS = (
+    ['seasons_count', 'last_season', 'weighted_minutes']
+    + [f'{stat}_weighted' for stat in STAT_COLUMNS]
+    + [f'{stat}_trend' for stat in STAT_COLUMNS]
+    + [f'{stat}_predicted' for stat in STAT_COLUMNS]
+    + [f'{stat}_per_min' for stat in RATE_STATS]
+    + [f'{stat}_career_high' for stat in STAT_COLUMNS]
+)
+
+def init_feature_table(conn):
+    columns = ',\n'.join(f'            {name} REAL' for name in FEATURE_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS player_features (
+            player_id INTEGER PRIMARY KEY,
+{columns},
+            seasons_hash INTEGER NOT NULL,
+            last_updated DATETIME
+        )
+    ''')
+
+def load_seasons(conn):
+    """All seasons, each player's most recent season first."""
+    columns = ', '.join(['minutes_per_game'] + list(STAT_COLUMNS.values()))
+    return pd.read_sql_query(f'''
+        SELECT player_id, CAST(season_id AS INTEGER) AS season, {columns}
+        FROM seasons
+        ORDER BY player_id, CAST(season_id AS INTEGER) DESC, id
+    ''', conn)
+
+def seasons_hashes(seasons):
+    """One order-independent fingerprint of every player's season rows."""
+    row_hashes = pd.util.hash_pandas_object(seasons, index=False).to_numpy().view(np.int64)
+    # Wrapping int64 sum; any changed, added or removed row changes it
+    return pd.Series(row_hashes, index=seasons['player_id'].to_numpy()).groupby(level=0).sum()
+
+def recent_matrix(values, player_codes, ranks, n_players, depth):
+    """Scatter a season column into a (players, depth) matrix, NaN where a player has fewer seasons."""
+    matrix = np.full((n_players, depth), np.nan)
+    keep = ranks < depth
+    matrix[player_codes[keep], ranks[keep]] = values[keep]
+    return matrix
+
+def weighted_means(matrix, weights=RECENT_WEIGHTS):
+    """Weighted sum over the recent seasons; missing seasons add nothing, like the JS reduce."""
+    return np.nansum(matrix * weights[:matrix.shape[1]], axis=1)
+
+def trends(matrix):
+    """Mean season-over-season relative change across the recent seasons, as calculateTrend does.
+
+    Changes with a zero or missing base season are skipped rather than
+    producing Infinity/NaN; players with no usable change get 0.
+    """
+    newer, older = matrix[:, :-1], matrix[:, 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = (newer - older) / older
+    valid = np.isfinite(changes)
+    counts = valid.sum(axis=1)
+    totals = np.where(valid, changes, 0).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros(len(matrix)), where=counts > 0)
+
+def compute_features(seasons):
+    """Feature rows for every player present in `seasons`, indexed by player_id."""
+    player_ids, player_codes = np.unique(seasons['player_id'].to_numpy(), return_inverse=True)
+    ranks = seasons.groupby('player_id').cumcount().to_numpy()
+    n_players, depth = len(player_ids), len(RECENT_WEIGHTS)
+
+    features = pd.DataFrame(index=player_ids)
+    features['seasons_count'] = np.bincount(player_codes, minlength=n_players)
+    features['last_season'] = seasons.groupby('player_id')['season'].max().to_numpy()
+
+    minutes = recent_matrix(seasons['minutes_per_game'].to_numpy(float), player_codes, ranks, n_players, depth)
+    weighted_minutes = weighted_means(minutes)
+    features['weighted_minutes'] = weighted_minutes
+
+    career_highs = seasons.groupby('player_id')[list(STAT_COLUMNS.values())].max()
+    for stat, column in STAT_COLUMNS.items():
+        matrix = recent_matrix(seasons[column].to_numpy(float), player_codes, ranks, n_players, depth)
+        weighted = weighted_means(matrix)
+        trend = trends(matrix)
+        features[f'{stat}_weighted'] = weighted
+        features[f'{stat}_trend'] = trend
+        features[f'{stat}_predicted'] = weighted * (1 + trend)
+        features[f'{stat}_career_high'] = career_highs[column].to_numpy()
+        if stat in RATE_STATS:
+            features[f'{stat}_per_min'] = np.divide(
+                weighted, weighted_minutes, out=np.zeros(n_players), where=weighted_minutes > 0
+            )
+
+    return features[FEATURE_COLUMNS]
+
+def build_feature_store(db_path=None, full=False):
+    """Materialize player_features, recomputing only players whose seasons changed."""
+    db_path = db_path or APP_DB
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            init_feature_table(conn)
+        seasons = load_seasons(conn)
+        current = seasons_hashes(seasons)
+        stored = dict(conn.execute('SELECT player_id, seasons_hash FROM player_features').fetchall())
+
+        changed_ids = [player_id for player_id, digest in current.items()
+                       if full or stored.get(player_id) != digest]
+        removed_ids = sorted(set(stored) - set(current.index))
+
+        changed = seasons[seasons['player_id'].isin(changed_ids)]
+        features = compute_features(changed) if len(changed) else pd.DataFrame(columns=FEATURE_COLUMNS)
+        rows = list(zip(
+            features.index.astype(int).tolist(),
+            *(features[name].astype(float).tolist() for name in FEATURE_COLUMNS),
+            current.reindex(features.index).astype(int).tolist()
+        ))
+
+        column_list = ', '.join(['player_id'] + FEATURE_COLUMNS + ['seasons_hash'])
+        placeholders = ', '.join('?' for _ in range(len(FEATURE_COLUMNS) + 2))
+        with conn:
+            if full:
+                conn.execute('DELETE FROM player_features')
+            conn.executemany(
+                f"INSERT OR REPLACE INTO player_features ({column_list}, last_updated) "
+                f"VALUES ({placeholders}, datetime('now'))",
+                rows
+            )
+            conn.executemany('DELETE FROM player_features WHERE player_id = ?',
+                             [(int(player_id),) for player_id in removed_ids])
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Feature store: {len(rows)} players rebuilt, {len(removed_ids)} removed, "
+                     f"{len(current) - len(rows)} unchanged in {elapsed:.3f}s")
+        return len(rows)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    try:
+        build_feature_store(full='--full' in sys.argv)
+    except Exception as e:
+        logging.error(f"Feature store build failed: {e}")
+        sys.exit(1)
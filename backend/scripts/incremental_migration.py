@@ -0,0 +1,267 @@
+import sys
+import time
+import hashlib
+import logging
+import sqlite3
+import os
+import numpy as np
+import pandas as pd
+
+import migrate_nba_stats
+import csv_cache
+from migrate_nba_stats import build_season_rows, canonicalize_names
+import metrics  # On the path via migrate_nba_stats
+from profile_cache import init_profile_table, invalidate_profiles
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Source files that feed the players/seasons tables
+PER_GAME_FILE = 'Player Per Game.csv'
+SOURCE_FILES = [PER_GAME_FILE]
+
+# Natural key of a row in Player Per Game.csv
+ROW_KEY = ['seas_id', 'player_id', 'tm']
+
+# Columns that end up in players/seasons; a change in any of them re-upserts the row
+TRACKED_COLUMNS = [
+    'player', 'season', 'birth_year', 'pos', 'tm', 'g', 'gs', 'mp_per_game',
+    'pts_per_game', 'ast_per_game', 'trb_per_game', 'stl_per_game', 'blk_per_game',
+    'fg_percent', 'x3p_percent', 'ft_percent', 'tov_per_game'
+]
+
+SEASON_FIELDS = [
+    'player_id', 'season_id', 'season', 'team',
+    'games', 'games_started', 'minutes_per_game',
+    'pts_per_game', 'ast_per_game', 'reb_per_game',
+    'stl_per_game', 'blk_per_game',
+    'fg_percent', 'fg3_percent', 'ft_percent',
+    'turnover_per_game'
+]
+
+FIRST_PLAYER_ID = 10000
+CHUNK_SIZE = 1 << 20
+
+METRICS_JOB = 'incremental_migration'
+
+def fingerprint_file(path):
+    """Return the sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def init_tracking_tables(conn):
+    """Create the bookkeeping tables used to detect changed source data."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS source_files (
+            file_name TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            last_migrated DATETIME
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS season_sources (
+            seas_id INTEGER NOT NULL,
+            source_player_id INTEGER NOT NULL,
+            tm TEXT NOT NULL,
+            row_hash INTEGER NOT NULL,
+            season_row_id INTEGER,
+            PRIMARY KEY (seas_id, source_player_id, tm)
+        )
+    ''')
+
+def tables_exist(conn):
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('players', 'seasons')"
+    ).fetchall()
+    return len(rows) == 2
+
+def load_fingerprints(conn):
+    return dict(conn.execute('SELECT file_name, content_hash FROM source_files').fetchall())
+
+def hash_rows(df):
+    """Hash the tracked columns of every row in one vectorized pass."""
+    hashes = pd.util.hash_pandas_object(df[TRACKED_COLUMNS], index=False)
+    # sqlite integers are signed 64-bit
+    return hashes.to_numpy().view(np.int64)
+
+def diff_rows(source, conn):
+    """Split source rows into changed/new rows and keys that disappeared."""
+    tracked = pd.read_sql_query(
+        'SELECT seas_id, source_player_id AS player_id, tm, row_hash, season_row_id FROM season_sources',
+        conn
+    )
+    merged = source.merge(tracked, on=ROW_KEY, how='outer', suffixes=('', '_old'), indicator=True)
+    present = merged['_merge'] != 'right_only'
+    changed = merged[present & (merged['row_hash'] != merged['row_hash_old'])]
+    removed = merged[merged['_merge'] == 'right_only']
+    return changed.drop(columns=['row_hash_old', '_merge']), removed, tracked.empty
+
+def match_existing_seasons(conn, changed, player_ids):
+    """Find seasons rows for untracked keys, e.g. on the first run after a full rebuild."""
+    existing = pd.read_sql_query('SELECT id, player_id, season_id, team FROM seasons', conn)
+    existing = existing.drop_duplicates(['player_id', 'season_id', 'team'])
+    lookup = pd.DataFrame({
+        'player_id': changed['player'].map(player_ids).to_numpy(),
+        'season_id': changed['season'].astype(str).to_numpy(),
+        'team': changed['tm'].to_numpy()
+    })
+    matched = lookup.merge(existing, on=['player_id', 'season_id', 'team'], how='left')
+    return matched['id'].to_numpy()
+
+def resolve_player_ids(conn, names):
+    """Map player names to ids, keeping existing ids stable and appending new ones."""
+    player_ids = {name: pid for pid, name in conn.execute('SELECT id, full_name FROM players')}
+    next_id = max(max(player_ids.values(), default=FIRST_PLAYER_ID - 1) + 1, FIRST_PLAYER_ID)
+    new_names = sorted(set(names) - set(player_ids))
+    for offset, name in enumerate(new_names):
+        player_ids[name] = next_id + offset
+    return player_ids, new_names
+
+def build_player_upserts(per_game_stats, names, player_ids):
+    """Recompute player rows the same way the full migration does, for the given names only."""
+    affected = per_game_stats[per_game_stats['player'].isin(names)]
+    players = affected.sort_values('season', ascending=False).groupby('player').first().reset_index()
+    return migrate_nba_stats.build_player_rows(players, player_ids)
+
+def incremental_migrate(force=False):
+    """Upsert only the rows of the source CSVs that changed since the last run."""
+    db_path = migrate_nba_stats.APP_DB
+    data_dir = migrate_nba_stats.DATA_DIR
+    started = time.perf_counter()
+
+    if not os.path.exists(db_path):
+        logging.info("No existing database, running a full migration first")
+        migrate_nba_stats.migrate_data()
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        # WAL lets API readers keep using the last committed snapshot while we write
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        if not tables_exist(conn):
+            raise RuntimeError(f"{db_path} has no players/seasons tables; run migrate_nba_stats.py first")
+        with conn:
+            init_tracking_tables(conn)
+
+        fingerprints = {name: fingerprint_file(os.path.join(data_dir, name)) for name in SOURCE_FILES}
+        previous = load_fingerprints(conn)
+        if not force and all(previous.get(name) == digest for name, digest in fingerprints.items()):
+            logging.info("Source CSVs unchanged, nothing to migrate")
+            return {'changed': 0, 'removed': 0, 'players': 0}
+
+        per_game_stats = canonicalize_names(csv_cache.read_csv(os.path.join(data_dir, PER_GAME_FILE)))
+        source = per_game_stats[ROW_KEY].copy()
+        source['row_hash'] = hash_rows(per_game_stats)
+        source['row_index'] = np.arange(len(per_game_stats))
+
+        changed, removed, bootstrap = diff_rows(source, conn)
+        changed_stats = per_game_stats.iloc[changed['row_index'].astype(int).to_numpy()]
+        logging.info(f"{len(changed)} changed rows, {len(removed)} removed rows")
+
+        player_ids, new_names = resolve_player_ids(conn, changed_stats['player'].unique())
+        player_rows = build_player_upserts(per_game_stats, changed_stats['player'].unique(), player_ids)
+        season_rows = build_season_rows(changed_stats, player_ids)
+
+        row_ids = changed['season_row_id'].to_numpy(dtype=float, copy=True)
+        if bootstrap and len(changed):
+            row_ids = np.where(np.isnan(row_ids), match_existing_seasons(conn, changed_stats, player_ids), row_ids)
+
+        updates = [row + (int(row_id),) for row, row_id in zip(season_rows, row_ids) if not np.isnan(row_id)]
+        inserts = [row for row, row_id in zip(season_rows, row_ids) if np.isnan(row_id)]
+        next_row_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM seasons').fetchone()[0]
+        inserted_ids = list(range(next_row_id, next_row_id + len(inserts)))
+        row_ids[np.isnan(row_ids)] = inserted_ids
+
+        assignments = ', '.join(f'{field} = ?' for field in SEASON_FIELDS)
+        placeholders = ', '.join('?' for _ in range(len(SEASON_FIELDS) + 1))
+
+        # Everything below commits atomically; readers see the old or new data, never a mix
+        write_started = time.perf_counter()
+        with conn:
+            # Touched players lose their cached profile; build_derived_tables rebuilds it
+            init_profile_table(conn)
+            invalidate_profiles(conn, [row[0] for row in player_rows])
+            conn.executemany('''
+                INSERT INTO players (id, full_name, birth_year, position)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    birth_year = excluded.birth_year,
+                    position = excluded.position
+            ''', player_rows)
+            conn.executemany(f'UPDATE seasons SET {assignments} WHERE id = ?', updates)
+            conn.executemany(
+                f"INSERT INTO seasons (id, {', '.join(SEASON_FIELDS)}) VALUES ({placeholders})",
+                [(row_id,) + row for row_id, row in zip(inserted_ids, inserts)]
+            )
+            stale_ids = removed['season_row_id'].dropna().astype(int).tolist()
+            if bootstrap:
+                # Rows no source row matched, e.g. seasons filed under an old spelling of a name
+                tracked_ids = set(row_ids.astype(int).tolist())
+                stale_ids += [row_id for (row_id,) in conn.execute('SELECT id FROM seasons')
+                              if row_id not in tracked_ids]
+            conn.executemany(
+                'DELETE FROM player_profiles WHERE player_id = (SELECT player_id FROM seasons WHERE id = ?)',
+                [(row_id,) for row_id in stale_ids]
+            )
+            conn.executemany('DELETE FROM seasons WHERE id = ?', [(row_id,) for row_id in stale_ids])
+            # Players left without seasons whose name no longer appears in the source
+            source_names = set(per_game_stats['player'])
+            orphaned = [(player_id,) for player_id, name in conn.execute('''
+                SELECT id, full_name FROM players
+                WHERE id NOT IN (SELECT DISTINCT player_id FROM seasons)
+            ''') if name not in source_names]
+            conn.executemany('DELETE FROM players WHERE id = ?', orphaned)
+            conn.executemany(
+                'DELETE FROM season_sources WHERE seas_id = ? AND source_player_id = ? AND tm = ?',
+                list(zip(removed['seas_id'].astype(int).tolist(),
+                         removed['player_id'].astype(int).tolist(),
+                         removed['tm'].tolist()))
+            )
+            conn.executemany('''
+                INSERT OR REPLACE INTO season_sources (seas_id, source_player_id, tm, row_hash, season_row_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', list(zip(
+                changed['seas_id'].astype(int).tolist(),
+                changed['player_id'].astype(int).tolist(),
+                changed['tm'].tolist(),
+                changed['row_hash'].astype(np.int64).tolist(),
+                row_ids.astype(int).tolist()
+            )))
+            conn.executemany('''
+                INSERT OR REPLACE INTO source_files (file_name, content_hash, last_migrated)
+                VALUES (?, ?, datetime('now'))
+            ''', list(fingerprints.items()))
+
+        finished = time.perf_counter()
+        elapsed = finished - started
+        metrics.observe('db_commit_seconds', finished - write_started, job=METRICS_JOB, writer='transaction')
+        metrics.inc('rows_written_total', len(player_rows), job=METRICS_JOB, table='players')
+        metrics.inc('rows_written_total', len(updates) + len(inserts), job=METRICS_JOB, table='seasons')
+        metrics.set_gauge('rows_per_second', (len(player_rows) + len(updates) + len(inserts)) / max(elapsed, 1e-9),
+                          job=METRICS_JOB, phase='end_to_end')
+        metrics.set_gauge('phase_seconds', write_started - started, job=METRICS_JOB, phase='diff')
+        metrics.set_gauge('phase_seconds', finished - write_started, job=METRICS_JOB, phase='write')
+        logging.info(
+            f"Incremental migration done in {elapsed:.3f}s: {len(updates)} seasons updated, "
+            f"{len(inserts)} inserted, {len(stale_ids)} deleted, {len(player_rows)} players upserted "
+            f"({len(new_names)} new)"
+        )
+        # Also gives databases built before a derived table existed their first copy
+        migrate_nba_stats.build_derived_tables(db_path)
+        metrics.set_gauge('phase_seconds', time.perf_counter() - finished, job=METRICS_JOB, phase='derived')
+        metrics.set_gauge('last_run_timestamp_seconds', time.time(), job=METRICS_JOB)
+        metrics.flush()
+        return {'changed': len(changed), 'removed': len(removed), 'players': len(player_rows)}
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    try:
+        logging.info("Starting incremental data migration...")
+        incremental_migrate(force='--force' in sys.argv)
+    except Exception as e:
+        logging.error(f"Incremental migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,175 @@
+import sys
+import time
+import sqlite3
+import logging
+import os
+import statistics
+
+from names import normalize_name
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+REPEAT = 50  # Timed runs per query; the median is reported
+
+# The queries the app actually runs, with where they come from.
+# :player_id, :season_id, :full_name and :name_key are filled from sample data.
+QUERY_CATALOG = [
+    ('getPlayerSeasons', 'models/Player.js',
+     'SELECT * FROM seasons WHERE player_id = :player_id ORDER BY season_id DESC'),
+    ('getSeasonStats', 'models/Player.js',
+     'SELECT * FROM seasons WHERE player_id = :player_id AND season_id = :season_id'),
+    ('check_player_data', 'scripts/check_data.py', '''
+        SELECT p.full_name, s.season, s.team, s.minutes_per_game, s.pts_per_game, s.ast_per_game, s.reb_per_game
+        FROM players p
+        JOIN seasons s ON s.player_id = p.id
+        WHERE p.full_name = :full_name
+        ORDER BY s.season ASC
+    '''),
+    ('exact name search', 'routes/playerRoutes.js', '''
+        SELECT p.id, COUNT(s.id)
+        FROM players p
+        LEFT JOIN seasons s ON p.id = s.player_id
+        WHERE LOWER(p.full_name) = LOWER(:full_name)
+        GROUP BY p.id
+    '''),
+    ('normalized name lookup', 'scripts/names.py normalize_name',
+     'SELECT id, full_name FROM players WHERE name_key = :name_key'),
+    ('season fetch (API schema)', 'routes/fetch_nba_stats.py',
+     'SELECT COUNT(*) FROM seasons WHERE player_id = :player_id AND season_id = :season_id'),
+]
+
+# (name, table, indexed columns or expressions, columns that must exist)
+INDEXES = [
+    # getPlayerSeasons / getSeasonStats / API schema upserts
+    ('idx_seasons_player_season', 'seasons', 'player_id, season_id', ['player_id', 'season_id']),
+    # Covers check_player_data so it never touches the seasons table itself
+    ('idx_seasons_player_summary', 'seasons',
+     'player_id, season, team, minutes_per_game, pts_per_game, ast_per_game, reb_per_game',
+     ['player_id', 'season', 'team', 'minutes_per_game', 'pts_per_game', 'ast_per_game', 'reb_per_game']),
+    ('idx_players_full_name', 'players', 'full_name', ['full_name']),
+    # Expression index for the case-insensitive exact match in playerRoutes.js
+    ('idx_players_lower_name', 'players', 'LOWER(full_name)', ['full_name']),
+    ('idx_players_name_key', 'players', 'name_key', ['name_key']),
+]
+
+def table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+def fill_name_keys(conn):
+    """Store normalize_name(full_name) in players.name_key.
+
+    SQLite can only maintain an index on a function every writer knows about,
+    and the Node API writes to players too, so the normalized name is kept as a
+    plain column instead of an index on a Python function.
+    """
+    if 'full_name' not in table_columns(conn, 'players'):
+        return 0
+    if 'name_key' not in table_columns(conn, 'players'):
+        conn.execute('ALTER TABLE players ADD COLUMN name_key TEXT')
+    rows = conn.execute('SELECT id, full_name FROM players WHERE name_key IS NULL AND full_name IS NOT NULL')
+    updates = [(normalize_name(name), player_id) for player_id, name in rows]
+    conn.executemany('UPDATE players SET name_key = ? WHERE id = ?', updates)
+    return len(updates)
+
+def ensure_indexes(conn):
+    """Create every catalog index whose columns exist; returns the names created."""
+    created = []
+    with conn:
+        fill_name_keys(conn)
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for name, table, definition, required in INDEXES:
+            if name in existing or not set(required) <= table_columns(conn, table):
+                continue
+            conn.execute(f'CREATE INDEX {name} ON {table}({definition})')
+            created.append(name)
+    if created:
+        # Give the planner fresh statistics for the new indexes
+        conn.execute('ANALYZE')
+    return created
+
+def sample_parameters(conn):
+    player_id, season_id = conn.execute('''
+        SELECT player_id, season_id FROM seasons
+        WHERE player_id = (SELECT player_id FROM seasons GROUP BY player_id ORDER BY COUNT(*) DESC LIMIT 1)
+        LIMIT 1
+    ''').fetchone()
+    full_name = conn.execute('SELECT full_name FROM players WHERE id = ?', (player_id,)).fetchone()
+    full_name = full_name[0] if full_name else ''
+    return {
+        'player_id': player_id,
+        'season_id': season_id,
+        'full_name': full_name,
+        'name_key': normalize_name(full_name),
+    }
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+def is_full_scan(plan):
+    return any(step.startswith('SCAN') and 'INDEX' not in step for step in plan)
+
+def time_query(conn, sql, params, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def measure(conn, params):
+    """Plan and median latency (ms) of every catalog query that fits this schema."""
+    results = {}
+    for name, _, sql in QUERY_CATALOG:
+        try:
+            plan = query_plan(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            results[name] = {'skipped': str(e)}
+            continue
+        results[name] = {'plan': plan, 'ms': time_query(conn, sql, params)}
+    return results
+
+def audit(db_path=None, apply=True):
+    """Replay the query catalog before and after creating the missing indexes."""
+    db_path = db_path or APP_DB
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        if apply:
+            # name_key must exist before the baseline, or its query can't be planned at all
+            with conn:
+                fill_name_keys(conn)
+        params = sample_parameters(conn)
+        before = measure(conn, params)
+        created = ensure_indexes(conn) if apply else []
+        after = measure(conn, params) if apply else before
+
+        print(f"\nQuery plan audit of {db_path}")
+        for name, source, _ in QUERY_CATALOG:
+            old, new = before[name], after[name]
+            if 'skipped' in old:
+                print(f"\n{name} ({source}): skipped, {old['skipped']}")
+                continue
+            print(f"\n{name} ({source})")
+            print(f"  before: {old['ms']:.3f} ms  {'FULL SCAN  ' if is_full_scan(old['plan']) else ''}"
+                  f"{' | '.join(old['plan'])}")
+            if apply:
+                speedup = old['ms'] / new['ms'] if new['ms'] else float('inf')
+                print(f"  after:  {new['ms']:.3f} ms  {'FULL SCAN  ' if is_full_scan(new['plan']) else ''}"
+                      f"{' | '.join(new['plan'])}  ({speedup:.1f}x)")
+
+        print(f"\nCreated indexes: {', '.join(created) if created else 'none'}")
+        return {'before': before, 'after': after, 'created': created}
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    try:
+        audit(sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith('--') else None,
+              apply='--dry-run' not in sys.argv)
+    except Exception as e:
+        logging.error(f"Index audit failed: {e}")
+        sys.exit(1)
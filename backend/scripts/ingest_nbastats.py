@@ -0,0 +1,203 @@
+import sys
+import time
+import sqlite3
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+import csv_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+PLAYER_SEASON_KEY = ['seas_id', 'player_id', 'tm']
+TEAM_SEASON_KEY = ['season', 'lg', 'team']
+
+# CSV file -> (table, key columns, whether the key is unique)
+INGEST_TABLES = {
+    'Player Per Game.csv': ('player_per_game', PLAYER_SEASON_KEY, True),
+    'Per 100 Poss.csv': ('player_per_100_poss', PLAYER_SEASON_KEY, True),
+    'Player Shooting.csv': ('player_shooting', PLAYER_SEASON_KEY, True),
+    'Player Play By Play.csv': ('player_play_by_play', PLAYER_SEASON_KEY, False),
+    'Player Season Info.csv': ('player_season_info', PLAYER_SEASON_KEY, True),
+    'Player Career Info.csv': ('player_career_info', ['player_id'], True),
+    'Player Directory.csv': ('player_directory', ['slug'], True),
+    'Player Award Shares.csv': ('player_award_shares', ['seas_id', 'player_id', 'award'], True),
+    'All-Star Selections.csv': ('all_star_selections', ['season', 'lg', 'player'], False),
+    'End of Season Teams.csv': ('end_of_season_teams', ['season', 'lg', 'type', 'number_tm', 'player_id'], True),
+    'End of Season Teams (Voting).csv': (
+        'end_of_season_teams_voting', ['season', 'lg', 'type', 'number_tm', 'player_id'], True
+    ),
+    'Team Abbrev.csv': ('team_abbrev', TEAM_SEASON_KEY, True),
+    'Team Summaries.csv': ('team_summaries', TEAM_SEASON_KEY, True),
+    'Team Totals.csv': ('team_totals', TEAM_SEASON_KEY, True),
+    'Team Stats Per Game.csv': ('team_stats_per_game', TEAM_SEASON_KEY, True),
+    'Team Stats Per 100 Poss.csv': ('team_stats_per_100_poss', TEAM_SEASON_KEY, True),
+    'Opponent Totals.csv': ('opponent_totals', TEAM_SEASON_KEY, True),
+    'Opponent Stats Per Game.csv': ('opponent_stats_per_game', TEAM_SEASON_KEY, True),
+    'Opponent Stats Per 100 Poss.csv': ('opponent_stats_per_100_poss', TEAM_SEASON_KEY, True),
+}
+
+def sqlite_type(column):
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_integer_dtype(column):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(column):
+        return 'REAL'
+    return 'TEXT'
+
+def create_table_sql(table, df):
+    columns = ', '.join(f'"{name}" {sqlite_type(df[name])}' for name in df.columns)
+    return f'CREATE TABLE {table} ({columns})'
+
+def column_values(column):
+    """Python values for sqlite, NaN as NULL and numpy scalars unwrapped."""
+    if pd.api.types.is_bool_dtype(column):
+        column = column.astype(int)
+    return column.astype(object).where(column.notna(), None).tolist()
+
+def load_table(csv_path, table, temp_dir):
+    """Worker: read one CSV and write it to its own scratch database, so workers never share a writer."""
+    started = time.perf_counter()
+    df = csv_cache.read_csv(csv_path)
+    read_done = time.perf_counter()
+
+    scratch_path = os.path.join(temp_dir, f'{table}.db')
+    conn = sqlite3.connect(scratch_path)
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        ddl = create_table_sql(table, df)
+        placeholders = ', '.join('?' for _ in df.columns)
+        with conn:
+            conn.execute(ddl)
+            conn.executemany(
+                f'INSERT INTO {table} VALUES ({placeholders})',
+                zip(*(column_values(df[name]) for name in df.columns))
+            )
+    finally:
+        conn.close()
+    finished = time.perf_counter()
+    return {
+        'table': table,
+        'scratch_path': scratch_path,
+        'ddl': ddl,
+        'rows': len(df),
+        'read_seconds': read_done - started,
+        'write_seconds': finished - read_done,
+    }
+
+def init_ingest_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            file_name TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            row_count INTEGER,
+            ingested_at DATETIME
+        )
+    ''')
+
+def pending_files(conn, data_dir, force):
+    """CSV files whose content changed since they were last ingested."""
+    ingested = dict(conn.execute('SELECT file_name, content_hash FROM ingested_files').fetchall())
+    pending = {}
+    for file_name in INGEST_TABLES:
+        csv_path = os.path.join(data_dir, file_name)
+        if not os.path.exists(csv_path):
+            logging.warning(f"Skipping missing {file_name}")
+            continue
+        content_hash = csv_cache.file_sha256(csv_path)
+        if force or ingested.get(file_name) != content_hash:
+            pending[file_name] = content_hash
+    return pending
+
+def merge_table(conn, result, key, unique):
+    """Swap a worker's table into the main database in one transaction."""
+    table = result['table']
+    conn.execute("ATTACH DATABASE ? AS scratch", (result['scratch_path'],))
+    try:
+        with conn:
+            # sqlite3 leaves DDL in autocommit; BEGIN first so readers never see the table missing or empty
+            conn.execute('BEGIN')
+            conn.execute(f'DROP TABLE IF EXISTS main.{table}')
+            conn.execute(result['ddl'])
+            conn.execute(f'INSERT INTO main.{table} SELECT * FROM scratch.{table}')
+            key_columns = ', '.join(f'"{name}"' for name in key)
+            conn.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX idx_{table}_key ON {table}({key_columns})"
+            )
+            if 'player_id' in key and key[0] != 'player_id':
+                conn.execute(f'CREATE INDEX idx_{table}_player ON {table}(player_id)')
+    finally:
+        conn.execute('DETACH DATABASE scratch')
+
+def ingest_all(db_path=None, data_dir=None, workers=None, force=False):
+    """Load every nbastats CSV into its own typed table, parsing them in parallel."""
+    db_path = db_path or APP_DB
+    data_dir = data_dir or DATA_DIR
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    temp_dir = tempfile.mkdtemp(prefix='nbastats_ingest_')
+    report = []
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        with conn:
+            init_ingest_table(conn)
+        pending = pending_files(conn, data_dir, force)
+        if not pending:
+            logging.info("All nbastats tables are up to date")
+            return report
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(load_table, os.path.join(data_dir, file_name), INGEST_TABLES[file_name][0], temp_dir):
+                file_name
+                for file_name in pending
+            }
+            # SQLite has one writer, so merges run here as workers finish
+            for future in as_completed(futures):
+                file_name = futures[future]
+                result = future.result()
+                merge_started = time.perf_counter()
+                _, key, unique = INGEST_TABLES[file_name]
+                merge_table(conn, result, key, unique)
+                with conn:
+                    conn.execute('''
+                        INSERT OR REPLACE INTO ingested_files
+                        (file_name, table_name, content_hash, row_count, ingested_at)
+                        VALUES (?, ?, ?, ?, datetime('now'))
+                    ''', (file_name, result['table'], pending[file_name], result['rows']))
+                result['merge_seconds'] = time.perf_counter() - merge_started
+                report.append(result)
+
+        print_report(report, time.perf_counter() - started)
+        return report
+    finally:
+        conn.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def print_report(report, elapsed):
+    print(f"\n{'Table':32} {'Rows':>7} {'Read':>8} {'Write':>8} {'Merge':>8}")
+    for result in sorted(report, key=lambda r: r['table']):
+        print(f"{result['table']:32} {result['rows']:>7} {result['read_seconds']:>7.3f}s "
+              f"{result['write_seconds']:>7.3f}s {result['merge_seconds']:>7.3f}s")
+    total_rows = sum(result['rows'] for result in report)
+    serial = sum(result['read_seconds'] + result['write_seconds'] + result['merge_seconds'] for result in report)
+    print(f"\n{len(report)} tables, {total_rows} rows in {elapsed:.3f}s end to end "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} rows/sec, {serial:.3f}s of work)")
+
+if __name__ == "__main__":
+    try:
+        ingest_all(force='--force' in sys.argv)
+    except Exception as e:
+        logging.error(f"Ingestion failed: {e}")
+        sys.exit(1)
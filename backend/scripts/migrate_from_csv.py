@@ -1,9 +1,17 @@
 import pandas as pd
 import sqlite3
-import json
 import logging
 from datetime import datetime
 import os
+import sys
+import time
+
+import csv_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'routes'))
+import metrics
+from player_stats import init_player_stats_table, stats_row, STATS_UPSERT_SQL, SEASON_SCOPE, PER_GAME
+from profile_cache import init_profile_table, build_profiles
 
 # Set up logging
 logging.basicConfig(
@@ -16,6 +24,7 @@ logging.basicConfig(
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data', 'nbastats')
 DEST_DB = os.path.join(SCRIPT_DIR, '..', 'data', 'nba_stats.db')
+METRICS_JOB = 'migrate_from_csv'
 
 def init_destination_db():
     """Initialize the destination database with proper schema."""
@@ -25,6 +34,8 @@ def init_destination_db():
     # Drop existing tables if they exist
     cursor.execute('DROP TABLE IF EXISTS seasons')
     cursor.execute('DROP TABLE IF EXISTS players')
+    cursor.execute('DROP TABLE IF EXISTS player_stats')
+    cursor.execute('DROP TABLE IF EXISTS player_profiles')
     
     # Create players table
     cursor.execute('''
@@ -59,6 +70,8 @@ def init_destination_db():
             FOREIGN KEY(player_id) REFERENCES players(id)
         )
     ''')
+    init_player_stats_table(cursor)
+    init_profile_table(cursor)
     
     conn.commit()
     return conn
@@ -71,8 +84,8 @@ def migrate_data():
         career_info_file = os.path.join(DATA_DIR, 'Player Career Info.csv')
         
         logging.info(f"Reading data from: {per_game_file}")
-        per_game_df = pd.read_csv(per_game_file)
-        career_info_df = pd.read_csv(career_info_file)
+        per_game_df = csv_cache.read_csv(per_game_file)
+        career_info_df = csv_cache.read_csv(career_info_file)
         
         # Initialize database
         dest_conn = init_destination_db()
@@ -84,6 +97,8 @@ def migrate_data():
         
         logging.info(f"Found {len(player_ids)} active players")
         
+        started = time.perf_counter()
+        rows_written = 0
         for player_id in player_ids:
             try:
                 # Get player's data
@@ -92,6 +107,10 @@ def migrate_data():
                 
                 # Current season stats
                 current_stats = {
+                    'season_id': str(int(latest_season['season'])),
+                    'team': latest_season['tm'],
+                    'games': int(latest_season['g']),
+                    'minutes_per_game': float(latest_season['mp_per_game']),
                     'pts_per_game': float(latest_season['pts_per_game']),
                     'ast_per_game': float(latest_season['ast_per_game']),
                     'reb_per_game': float(latest_season['trb_per_game']),
@@ -104,15 +123,16 @@ def migrate_data():
                 
                 # Insert into players table
                 dest_cursor.execute('''
-                    INSERT INTO players (id, full_name, team, position, stats, last_updated)
-                    VALUES (?, ?, ?, ?, ?, datetime('now'))
+                    INSERT INTO players (id, full_name, team, position, last_updated)
+                    VALUES (?, ?, ?, ?, datetime('now'))
                 ''', (
                     int(player_id),
                     latest_season['player'],
                     latest_season['tm'],
-                    latest_season['pos'],
-                    json.dumps(current_stats)
+                    latest_season['pos']
                 ))
+                dest_cursor.execute(STATS_UPSERT_SQL,
+                                    stats_row(int(player_id), SEASON_SCOPE, current_stats, PER_GAME))
                 
                 # Insert all seasons for this player
                 for _, season in player_games.iterrows():
@@ -140,13 +160,22 @@ def migrate_data():
                         float(season['tov_per_game'])
                     ))
                 
-                dest_conn.commit()
+                with metrics.timer('db_commit_seconds', job=METRICS_JOB, writer='per_player'):
+                    dest_conn.commit()
+                rows_written += 1 + len(player_games)
+                metrics.inc('rows_written_total', 1, job=METRICS_JOB, table='players')
+                metrics.inc('rows_written_total', len(player_games), job=METRICS_JOB, table='seasons')
                 logging.info(f"Processed player: {latest_season['player']}")
                 
             except Exception as e:
                 logging.error(f"Error processing player {player_id}: {str(e)}")
                 continue
         
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        build_profiles(DEST_DB, full=True)
+        metrics.set_gauge('rows_per_second', rows_written / elapsed, job=METRICS_JOB, phase='end_to_end')
+        metrics.set_gauge('last_run_timestamp_seconds', time.time(), job=METRICS_JOB)
+        metrics.flush()
         logging.info("Migration completed successfully")
         
     except Exception as e:
@@ -1,11 +1,25 @@
 import sys
+import time
+import numpy as np
 import pandas as pd
 import sqlite3
 import json
 import logging
-import unicodedata
 from datetime import datetime
 import os
+import shutil
+
+from feature_store import build_feature_store
+import index_audit
+from names import normalize_name
+import name_search
+import csv_cache
+import ingest_nbastats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'routes'))
+import metrics
+from player_stats import init_player_stats_table
+from profile_cache import init_profile_table, build_profiles
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -15,20 +29,33 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets b
 DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
 APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
 
-def init_database():
-    """Initialize the application database."""
+# Bulk load tuning
+BATCH_SIZE = 5000
+BULK_CACHE_SIZE = -64000  # Negative values are KiB, so ~64 MB of page cache
+
+METRICS_JOB = 'migrate_nba_stats'
+
+def shadow_path(db_path):
+    return db_path + '.shadow'
+
+def previous_path(db_path):
+    return db_path + '.previous'
+
+def init_database(db_path=None):
+    """Initialize the application database (or a shadow copy of it) from scratch."""
+    db_path = db_path or APP_DB
     try:
         # Ensure the data directory exists
-        os.makedirs(os.path.dirname(APP_DB), exist_ok=True)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
-        logging.info(f"Creating database at: {APP_DB}")
+        logging.info(f"Creating database at: {db_path}")
         logging.info(f"Looking for CSV files in: {DATA_DIR}")
         
         # Remove existing database if it exists
-        if os.path.exists(APP_DB):
-            os.remove(APP_DB)
+        if os.path.exists(db_path):
+            os.remove(db_path)
         
-        conn = sqlite3.connect(APP_DB)
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         # Create players table
@@ -67,6 +94,8 @@ def init_database():
                 FOREIGN KEY(player_id) REFERENCES players(id)
             )
         ''')
+        init_player_stats_table(cursor)
+        init_profile_table(cursor)
         
         conn.commit()
         logging.info("Database initialized successfully")
@@ -86,56 +115,184 @@ def safe_float(value, default=0.0):
     except (ValueError, TypeError):
         return default
 
-def normalize_name(name):
-    """Normalize unicode characters in player names to handle accented characters."""
-    # Normalize to NFKD form and encode as ASCII, ignoring non-ASCII characters
-    normalized = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore')
-    # Decode back to string and convert to lowercase for case-insensitive comparison
-    return normalized.decode('ASCII').lower()
-
-def get_player_id_mapping():
-    """Create a mapping of player names to their correct IDs."""
-    return {
-        'Luka Dončić': 4653,  # Use 4653 as the canonical ID for all seasons
-        'Dario Šarić': 4389,  # Use 4389 as the canonical ID for all seasons
-        'Dāvis Bertāns': 4392,  # Use 4392 as the canonical ID for all seasons
-        'Alperen Şengün': 4972,  # Use 4972 as the canonical ID for all seasons
-        'Luka Šamanić': 4683,  # Use 4683 as the canonical ID for all seasons
-        'Nikola Jokić': 4674,  # Use 4674 as the canonical ID for all seasons
-        'Bojan Bogdanović': 4380,  # Use 4380 as the canonical ID for all seasons
-        'Bogdan Bogdanović': 4379,  # Use 4379 as the canonical ID for all seasons
-        'Goran Dragić': 4391,  # Use 4391 as the canonical ID for all seasons
-        'Jusuf Nurkić': 4436,  # Use 4436 as the canonical ID for all seasons
-        'Nikola Vučević': 4452,  # Use 4452 as the canonical ID for all seasons
-    }
-
-def fix_player_data(per_game_stats):
-    """Fix player data by applying correct IDs and handling accented names."""
-    # Get the player ID mapping
-    player_id_mapping = get_player_id_mapping()
-    
-    # Create a copy of the dataframe
-    fixed_stats = per_game_stats.copy()
-    
-    # Update player IDs based on the mapping
-    for player_name, correct_id in player_id_mapping.items():
-        # Find all rows for this player (exact match)
-        mask = fixed_stats['player'] == player_name
-        # Update the player_id for all matching rows
-        fixed_stats.loc[mask, 'player_id'] = correct_id
-    
-    # Group by player_id, season, and team to get the correct stats
-    # For each group, take the row with the highest minutes per game
-    fixed_stats = fixed_stats.sort_values('mp_per_game', ascending=False)
-    fixed_stats = fixed_stats.groupby(['player_id', 'season', 'player', 'tm']).first().reset_index()
-    
-    return fixed_stats
+def canonicalize_names(per_game_stats):
+    """Use one spelling per accent-folded name, e.g. 'Alperen Sengun' and 'Alperen Şengün'.
+
+    The spelling from the player's most recent season wins, so every row of a
+    player maps to the same players row however the source spelled it.
+    """
+    name_keys = per_game_stats['player'].map(normalize_name)
+    latest = (per_game_stats.assign(name_key=name_keys)
+              .sort_values('season', ascending=False)
+              .drop_duplicates('name_key')
+              .set_index('name_key')['player'])
+    canonical = per_game_stats.copy()
+    canonical['player'] = name_keys.map(latest).to_numpy()
+    return canonical
+
+def normalize_percent(column, default=0.0):
+    """Vectorized safe_float: strip % signs, scale values above 1 down to decimals."""
+    if column.dtype == object or pd.api.types.is_string_dtype(column):
+        column = column.astype(str).str.replace('%', '', regex=False)
+    values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+    values = np.where(values > 1, values / 100, values)
+    return np.where(np.isnan(values), default, values)
+
+def fill_numeric(column, default=0, dtype=float):
+    """Replace NaN with a default for a whole column and cast it in one pass."""
+    return pd.to_numeric(column, errors='coerce').fillna(default).to_numpy(dtype=dtype)
+
+def nullable(column):
+    """Convert a column to Python objects with NaN mapped to None for sqlite."""
+    return column.astype(object).where(column.notna(), None).tolist()
+
+def tune_for_bulk_load(conn):
+    """Relax durability while the freshly created database is being filled."""
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute(f'PRAGMA cache_size = {BULK_CACHE_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+
+def insert_batches(conn, sql, rows, batch_size=BATCH_SIZE):
+    """Write rows with executemany in fixed-size batches, returning the row count."""
+    total = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        conn.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+def build_player_rows(players, player_base_ids):
+    base_ids = players['player'].map(player_base_ids).astype(int).tolist()
+    birth_years = players['birth_year'].astype('Int64').astype(object)
+    birth_years = birth_years.where(players['birth_year'].notna(), None).tolist()
+    return list(zip(
+        base_ids,
+        players['player'].tolist(),
+        birth_years,
+        nullable(players['pos'])
+    ))
+
+def build_season_rows(per_game_stats, player_base_ids):
+    seasons = per_game_stats['season'].astype(str).tolist()
+    return list(zip(
+        per_game_stats['player'].map(player_base_ids).astype(int).tolist(),
+        seasons,
+        seasons,
+        nullable(per_game_stats['tm']),
+        fill_numeric(per_game_stats['g'], dtype=int).tolist(),
+        fill_numeric(per_game_stats['gs'], dtype=int).tolist(),
+        fill_numeric(per_game_stats['mp_per_game']).tolist(),
+        fill_numeric(per_game_stats['pts_per_game']).tolist(),
+        fill_numeric(per_game_stats['ast_per_game']).tolist(),
+        fill_numeric(per_game_stats['trb_per_game']).tolist(),
+        fill_numeric(per_game_stats['stl_per_game']).tolist(),
+        fill_numeric(per_game_stats['blk_per_game']).tolist(),
+        normalize_percent(per_game_stats['fg_percent']).tolist(),
+        normalize_percent(per_game_stats['x3p_percent']).tolist(),
+        normalize_percent(per_game_stats['ft_percent']).tolist(),
+        fill_numeric(per_game_stats['tov_per_game']).tolist()
+    ))
+
+def build_derived_tables(db_path, full=False):
+    """Rebuild everything computed from players/seasons: features, indexes, name search and profiles."""
+    build_feature_store(db_path, full=full)
+    # Indexes are built after the bulk load, which is much cheaper than maintaining them row by row
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        index_audit.ensure_indexes(conn)
+    finally:
+        conn.close()
+    name_search.build_search_index(db_path, DATA_DIR)
+    build_profiles(db_path, full=full)
+
+def verify_database(db_path, expected_players, expected_seasons):
+    """Check a freshly built database before it is swapped in; raises on any problem."""
+    conn = sqlite3.connect(db_path)
+    try:
+        integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        if integrity != 'ok':
+            raise RuntimeError(f"Integrity check failed: {integrity}")
+
+        player_count = conn.execute('SELECT COUNT(*) FROM players').fetchone()[0]
+        season_count = conn.execute('SELECT COUNT(*) FROM seasons').fetchone()[0]
+        if player_count != expected_players or season_count != expected_seasons:
+            raise RuntimeError(
+                f"Row count mismatch: {player_count}/{expected_players} players, "
+                f"{season_count}/{expected_seasons} seasons"
+            )
+        if player_count == 0 or season_count == 0:
+            raise RuntimeError("Refusing to publish an empty database")
+
+        # Same shape of queries the API runs
+        sample = conn.execute('''
+            SELECT p.id, p.full_name, s.season_id, s.pts_per_game
+            FROM players p
+            JOIN seasons s ON p.id = s.player_id
+            LIMIT 5
+        ''').fetchall()
+        if not sample:
+            raise RuntimeError("Sample players/seasons join returned no rows")
+        seasons = conn.execute(
+            'SELECT * FROM seasons WHERE player_id = ? ORDER BY season_id DESC',
+            (sample[0][0],)
+        ).fetchall()
+        if not seasons:
+            raise RuntimeError(f"No seasons found for sample player {sample[0][1]}")
+
+        logging.info(f"Verified {db_path}: {player_count} players, {season_count} seasons")
+    finally:
+        conn.close()
+
+def checkpoint_live_database(db_path):
+    """Fold any WAL content into the live file so a stale -wal can't be replayed onto its replacement."""
+    try:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Could not checkpoint {db_path}: {e}")
+
+def swap_in(new_path, db_path):
+    """Atomically replace db_path with new_path, keeping the old file as db_path.previous."""
+    previous = previous_path(db_path)
+    if os.path.exists(db_path):
+        checkpoint_live_database(db_path)
+        if os.path.exists(previous):
+            os.remove(previous)
+        # A hard link keeps the old file around without copying it, and open
+        # readers keep their handle on it until they reconnect
+        try:
+            os.link(db_path, previous)
+        except OSError:
+            shutil.copy2(db_path, previous)
+    os.replace(new_path, db_path)
+    logging.info(f"Swapped {new_path} into {db_path} (previous copy at {previous})")
+
+def rollback_database(db_path=None):
+    """Put the previous database back; running it again undoes the rollback."""
+    db_path = db_path or APP_DB
+    previous = previous_path(db_path)
+    if not os.path.exists(previous):
+        raise FileNotFoundError(f"No previous database at {previous}")
+    restoring = db_path + '.rollback'
+    os.replace(previous, restoring)
+    swap_in(restoring, db_path)
 
 def migrate_data():
+    conn = None
+    shadow = shadow_path(APP_DB)
     try:
-        conn = init_database()
+        # Build into a shadow file so the live database stays readable throughout
+        conn = init_database(shadow)
+        tune_for_bulk_load(conn)
+        started = time.perf_counter()
+
         print("Reading CSV files...")
-        per_game_stats = pd.read_csv(os.path.join(DATA_DIR, 'Player Per Game.csv'))
+        per_game_stats = canonicalize_names(csv_cache.read_csv(os.path.join(DATA_DIR, 'Player Per Game.csv')))
+        read_done = time.perf_counter()
         
         # Process and insert each player's data
         print("\nProcessing players...")
@@ -143,68 +300,59 @@ def migrate_data():
         # Get unique players and assign a base ID for each player
         players = per_game_stats.sort_values('season', ascending=False).groupby('player').first().reset_index()
         player_base_ids = {player: idx + 10000 for idx, player in enumerate(players['player'])}
+
+        player_rows = build_player_rows(players, player_base_ids)
+        season_rows = build_season_rows(per_game_stats, player_base_ids)
         
-        # Insert players with their base IDs
-        for _, player in players.iterrows():
-            try:
-                base_id = player_base_ids[player['player']]
-                conn.execute('''
-                    INSERT INTO players (id, full_name, birth_year, position)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    base_id,
-                    player['player'],
-                    int(player['birth_year']) if pd.notna(player['birth_year']) else None,
-                    player['pos']
-                ))
-            except sqlite3.IntegrityError as e:
-                print(f"Error inserting player {player['player']}: {e}")
-                continue
-        
-        # Insert seasons
-        print("\nInserting seasons...")
-        for _, season in per_game_stats.iterrows():
-            try:
-                # Convert percentages from string to float
-                fg_percent = safe_float(season['fg_percent'])
-                fg3_percent = safe_float(season['x3p_percent'])
-                ft_percent = safe_float(season['ft_percent'])
-
-                # Use the player's base ID
-                base_id = player_base_ids[season['player']]
-                conn.execute('''
-                    INSERT INTO seasons (
-                        player_id, season_id, season, team,
-                        games, games_started, minutes_per_game,
-                        pts_per_game, ast_per_game, reb_per_game,
-                        stl_per_game, blk_per_game,
-                        fg_percent, fg3_percent, ft_percent,
-                        turnover_per_game
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    base_id,  # Use the base ID for all seasons
-                    str(season['season']),
-                    str(season['season']),
-                    season['tm'],
-                    int(season['g']) if pd.notna(season['g']) else 0,
-                    int(season['gs']) if pd.notna(season['gs']) else 0,
-                    float(season['mp_per_game']) if pd.notna(season['mp_per_game']) else 0,
-                    float(season['pts_per_game']) if pd.notna(season['pts_per_game']) else 0,
-                    float(season['ast_per_game']) if pd.notna(season['ast_per_game']) else 0,
-                    float(season['trb_per_game']) if pd.notna(season['trb_per_game']) else 0,
-                    float(season['stl_per_game']) if pd.notna(season['stl_per_game']) else 0,
-                    float(season['blk_per_game']) if pd.notna(season['blk_per_game']) else 0,
-                    fg_percent,
-                    fg3_percent,
-                    ft_percent,
-                    float(season['tov_per_game']) if pd.notna(season['tov_per_game']) else 0
-                ))
-            except (sqlite3.IntegrityError, ValueError) as e:
-                print(f"Error inserting season for player {season['player']}, season {season['season']}: {e}")
-                continue
-        
-        # Commit all changes
-        conn.commit()
+        # Write everything in a single transaction
+        write_started = time.perf_counter()
+        with conn:
+            player_count = insert_batches(conn, '''
+                INSERT INTO players (id, full_name, birth_year, position)
+                VALUES (?, ?, ?, ?)
+            ''', player_rows)
+
+            print("\nInserting seasons...")
+            season_count = insert_batches(conn, '''
+                INSERT INTO seasons (
+                    player_id, season_id, season, team,
+                    games, games_started, minutes_per_game,
+                    pts_per_game, ast_per_game, reb_per_game,
+                    stl_per_game, blk_per_game,
+                    fg_percent, fg3_percent, ft_percent,
+                    turnover_per_game
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', season_rows)
+        finished = time.perf_counter()
+
+        total_rows = player_count + season_count
+        write_elapsed = max(finished - write_started, 1e-9)
+        total_elapsed = max(finished - started, 1e-9)
+        print(f"Inserted {player_count} players and {season_count} seasons")
+        print(f"Write phase: {write_elapsed:.3f}s ({total_rows / write_elapsed:,.0f} rows/sec)")
+        print(f"End to end: {total_elapsed:.3f}s ({total_rows / total_elapsed:,.0f} rows/sec)")
+        conn.close()
+        conn = None
+        metrics.observe('db_commit_seconds', write_elapsed, job=METRICS_JOB, writer='bulk')
+        metrics.inc('rows_written_total', player_count, job=METRICS_JOB, table='players')
+        metrics.inc('rows_written_total', season_count, job=METRICS_JOB, table='seasons')
+        metrics.set_gauge('rows_per_second', total_rows / write_elapsed, job=METRICS_JOB, phase='write')
+        metrics.set_gauge('rows_per_second', total_rows / total_elapsed, job=METRICS_JOB, phase='end_to_end')
+
+        # Derived tables ship in the same file, so they swap in together with the seasons
+        build_derived_tables(shadow, full=True)
+        derived_done = time.perf_counter()
+        ingest_nbastats.ingest_all(shadow, data_dir=DATA_DIR, force=True)
+        ingest_done = time.perf_counter()
+        verify_database(shadow, player_count, season_count)
+        swap_in(shadow, APP_DB)
+        for phase, seconds in (('read', read_done - started), ('transform', write_started - read_done),
+                               ('write', write_elapsed), ('derived', derived_done - finished),
+                               ('ingest', ingest_done - derived_done),
+                               ('verify_swap', time.perf_counter() - ingest_done)):
+            metrics.set_gauge('phase_seconds', seconds, job=METRICS_JOB, phase=phase)
+        metrics.set_gauge('last_run_timestamp_seconds', time.time(), job=METRICS_JOB)
+        metrics.flush()
         print("Data migration completed successfully")
         
     except Exception as e:
@@ -215,11 +363,16 @@ def migrate_data():
     finally:
         if conn:
             conn.close()
+        if os.path.exists(shadow):
+            os.remove(shadow)
 
 if __name__ == "__main__":
     try:
-        logging.info("Starting data migration process...")
-        migrate_data()
+        if '--rollback' in sys.argv:
+            rollback_database()
+        else:
+            logging.info("Starting data migration process...")
+            migrate_data()
     except Exception as e:
         logging.error(f"Migration failed: {e}")
         sys.exit(1)
\ No newline at end of file
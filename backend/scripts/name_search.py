@@ -0,0 +1,172 @@
+import sys
+import re
+import time
+import sqlite3
+import logging
+import os
+import difflib
+
+from names import DATA_DIR, normalize_name
+import csv_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+DIRECTORY_FILE = 'Player Directory.csv'
+CAREER_FILE = 'Player Career Info.csv'
+
+TYPEAHEAD_LIMIT = 10
+FUZZY_CUTOFF = 0.75  # difflib ratio a misspelling needs to count as a match
+ALIAS_SEPARATOR = ' | '
+
+def fold(name):
+    """Accent-folded, lowercase form used for every key in the index."""
+    return normalize_name(name or '').strip()
+
+def tokens(text):
+    return re.findall(r'[a-z0-9]+', fold(text))
+
+def load_aliases(data_dir=None):
+    """Alternate spellings from Player Directory.csv, keyed by the folded stats name.
+
+    The directory often uses nicknames ('Walt Byrd', 'JJ Redick') where the
+    stats files use full names; those are linked through the career span and
+    last name in Player Career Info.csv.
+    """
+    data_dir = data_dir or DATA_DIR
+    directory = csv_cache.read_csv(os.path.join(data_dir, DIRECTORY_FILE), columns=['player', 'from', 'to'])
+    careers = csv_cache.read_csv(os.path.join(data_dir, CAREER_FILE), columns=['player', 'first_seas', 'last_seas'])
+    directory['name_key'] = directory['player'].map(fold)
+    careers['name_key'] = careers['player'].map(fold)
+
+    unmatched = directory[~directory['name_key'].isin(careers['name_key'])].copy()
+    unmatched['last_name'] = unmatched['name_key'].str.split().str[-1]
+    careers['last_name'] = careers['name_key'].str.split().str[-1]
+    linked = unmatched.merge(
+        careers, left_on=['from', 'to', 'last_name'], right_on=['first_seas', 'last_seas', 'last_name'],
+        suffixes=('_alias', '')
+    ).drop_duplicates('name_key_alias', keep=False)  # Ambiguous links are worse than none
+
+    aliases = {}
+    for name_key, alias in zip(linked['name_key'], linked['name_key_alias']):
+        aliases.setdefault(name_key, []).append(alias)
+    return aliases
+
+def build_search_index(db_path=None, data_dir=None):
+    """(Re)build the player_search FTS5 table from players and the player directory."""
+    db_path = db_path or APP_DB
+    started = time.perf_counter()
+    aliases = load_aliases(data_dir)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        players = conn.execute('''
+            SELECT p.id, p.full_name, MAX(CAST(s.season_id AS INTEGER))
+            FROM players p
+            LEFT JOIN seasons s ON s.player_id = p.id
+            GROUP BY p.id
+        ''').fetchall()
+        rows = []
+        for player_id, full_name, last_season in players:
+            name_key = fold(full_name)
+            alias_keys = ALIAS_SEPARATOR.join(aliases.get(name_key, []))
+            rows.append((name_key, alias_keys, player_id, full_name, last_season))
+
+        # Explicit BEGIN: sqlite3 autocommits DDL, which would leave readers without an index mid-rebuild
+        with conn:
+            conn.execute('BEGIN')
+            conn.execute('DROP TABLE IF EXISTS player_search')
+            conn.execute('''
+                CREATE VIRTUAL TABLE player_search USING fts5(
+                    name_key, alias_keys,
+                    player_id UNINDEXED, full_name UNINDEXED, last_season UNINDEXED,
+                    tokenize = "unicode61 remove_diacritics 2",
+                    prefix = '1 2 3'
+                )
+            ''')
+            conn.executemany(
+                'INSERT INTO player_search (name_key, alias_keys, player_id, full_name, last_season) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.execute("INSERT INTO player_search (player_search) VALUES ('optimize')")
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Name search index: {len(rows)} players, "
+                     f"{sum(len(names) for names in aliases.values())} aliases in {elapsed:.3f}s")
+        return len(rows)
+    finally:
+        conn.close()
+
+class PlayerNameSearch:
+    """Accent-insensitive typeahead, exact and fuzzy player lookups over player_search."""
+
+    def __init__(self, db_path=None):
+        self.conn = sqlite3.connect(db_path or APP_DB, check_same_thread=False)
+        self.ids_by_key = {}
+        for player_id, name_key, alias_keys in self.conn.execute(
+            'SELECT player_id, name_key, alias_keys FROM player_search'
+        ):
+            self.ids_by_key.setdefault(name_key, player_id)
+            for alias in alias_keys.split(ALIAS_SEPARATOR) if alias_keys else []:
+                self.ids_by_key.setdefault(alias, player_id)
+        self.keys = list(self.ids_by_key)
+
+    def typeahead(self, query, limit=TYPEAHEAD_LIMIT):
+        """Players whose name or alias has a word starting with every typed word."""
+        words = tokens(query)
+        if not words:
+            return []
+        match = ' AND '.join(f'"{word}"*' for word in words)
+        return self.conn.execute('''
+            SELECT player_id, full_name FROM player_search
+            WHERE player_search MATCH ?
+            ORDER BY rank, last_season DESC
+            LIMIT ?
+        ''', (match, limit)).fetchall()
+
+    def resolve(self, name):
+        """Player id for a full name in any spelling or accent form, or None."""
+        return self.ids_by_key.get(fold(name))
+
+    def fuzzy(self, query, limit=TYPEAHEAD_LIMIT):
+        """Closest names for a misspelled query, e.g. 'nikola jokc'."""
+        matches = difflib.get_close_matches(fold(query), self.keys, n=limit, cutoff=FUZZY_CUTOFF)
+        return [self.conn.execute(
+            'SELECT player_id, full_name FROM player_search WHERE player_id = ?', (self.ids_by_key[key],)
+        ).fetchone() for key in matches]
+
+    def search(self, query, limit=TYPEAHEAD_LIMIT):
+        return self.typeahead(query, limit) or self.fuzzy(query, limit)
+
+    def close(self):
+        self.conn.close()
+
+def benchmark(search, repeat=5):
+    """Mean typeahead latency over 1-4 letter prefixes of every indexed name."""
+    prefixes = sorted({key[:length] for key in search.keys for length in (1, 2, 3, 4)})
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for prefix in prefixes:
+            search.typeahead(prefix)
+    elapsed = time.perf_counter() - started
+    return elapsed / (repeat * len(prefixes)) * 1000, len(prefixes)
+
+if __name__ == "__main__":
+    try:
+        if len(sys.argv) > 1:
+            search = PlayerNameSearch()
+            for player_id, full_name in search.search(' '.join(sys.argv[1:])):
+                print(f"{player_id}\t{full_name}")
+        else:
+            build_search_index()
+            search = PlayerNameSearch()
+            mean_ms, count = benchmark(search)
+            logging.info(f"Typeahead: {mean_ms:.3f} ms mean over {count} prefixes")
+        search.close()
+    except Exception as e:
+        logging.error(f"Name search failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,13 @@
+import os
+import unicodedata
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+
+def normalize_name(name):
+    """Normalize unicode characters in player names to handle accented characters."""
+    # Normalize to NFKD form and encode as ASCII, ignoring non-ASCII characters
+    normalized = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore')
+    # Decode back to string and convert to lowercase for case-insensitive comparison
+    return normalized.decode('ASCII').lower()
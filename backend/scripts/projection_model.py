@@ -0,0 +1,393 @@
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import csv_cache
+from names import normalize_name
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+MODEL_DIR = os.path.join(BASE_DIR, 'data', 'projection_models')  # Versioned model artifacts
+LATEST_FILE = 'LATEST'  # Holds the version batch scoring loads by default
+
+MODEL_FORMAT = 1  # Bump when features or the artifact layout change; older artifacts then refuse to load
+SOURCE_FILES = ['Player Per Game.csv', 'Per 100 Poss.csv', 'Player Season Info.csv']
+
+# Projected stat -> Player Per Game column; the stat names of feature_store.STAT_COLUMNS, plus minutes
+TARGETS = {
+    'min': 'mp_per_game',
+    'pts': 'pts_per_game',
+    'ast': 'ast_per_game',
+    'reb': 'trb_per_game',
+    'stl': 'stl_per_game',
+    'blk': 'blk_per_game',
+    'fg_pct': 'fg_percent',
+    'fg3_pct': 'x3p_percent',
+    'ft_pct': 'ft_percent',
+}
+PERCENT_TARGETS = {'fg_pct', 'fg3_pct', 'ft_pct'}
+
+PER_GAME_FEATURES = [
+    'g', 'gs', 'mp_per_game', 'pts_per_game', 'ast_per_game', 'trb_per_game', 'orb_per_game',
+    'stl_per_game', 'blk_per_game', 'tov_per_game', 'pf_per_game', 'fga_per_game', 'x3pa_per_game',
+    'fta_per_game', 'fg_percent', 'x3p_percent', 'ft_percent', 'e_fg_percent',
+]
+PER_100_FEATURES = [
+    'pts_per_100_poss', 'ast_per_100_poss', 'trb_per_100_poss', 'stl_per_100_poss',
+    'blk_per_100_poss', 'tov_per_100_poss', 'o_rtg', 'd_rtg',
+]
+HISTORY_FEATURES = [
+    'mp_per_game', 'pts_per_game', 'ast_per_game', 'trb_per_game', 'stl_per_game', 'blk_per_game',
+    'fg_percent', 'x3p_percent', 'ft_percent',
+]
+FEATURES = (
+    ['age', 'age_squared', 'experience', 'season', 'guard', 'forward', 'center', 'has_per_100', 'has_prev']
+    + PER_GAME_FEATURES
+    + PER_100_FEATURES
+    + [f'prev_{column}' for column in HISTORY_FEATURES]
+)
+
+ALPHAS = np.logspace(-2, 4, 13)  # Ridge penalties tried by cross-validation
+DEFAULT_FOLDS = 5
+RANDOM_SEED = 2025
+
+def load_sources(data_dir=None):
+    """The three source CSVs, through the column cache."""
+    data_dir = data_dir or DATA_DIR
+    return [csv_cache.read_csv(os.path.join(data_dir, file_name)) for file_name in SOURCE_FILES]
+
+def sources_digest(data_dir=None):
+    """Fingerprint of the training data, part of every model version."""
+    data_dir = data_dir or DATA_DIR
+    digest = hashlib.sha256(str(MODEL_FORMAT).encode())
+    for file_name in SOURCE_FILES:
+        digest.update(csv_cache.file_sha256(os.path.join(data_dir, file_name)).encode())
+    return digest.hexdigest()
+
+def one_row_per_season(df):
+    """A player's whole season: traded players' combined row has the most games."""
+    if 'g' in df:
+        df = df.sort_values('g', ascending=False, kind='stable')
+    return df.drop_duplicates(['player_id', 'season'])
+
+def player_seasons(per_game, per_100, season_info):
+    """One row per player-season with every feature column, ordered by player and season.
+
+    A player is the accent-folded name, as in the app's players table: the
+    source gives some players a new player_id partway through a career.
+    """
+    seasons = one_row_per_season(per_game)
+    info = one_row_per_season(season_info)[['player_id', 'season', 'age', 'experience', 'pos']]
+    seasons = seasons.merge(info, on=['player_id', 'season'], how='left', suffixes=('', '_info'))
+    # Season Info is the fuller source of age, experience and position
+    for column in ('age', 'experience', 'pos'):
+        seasons[column] = seasons[f'{column}_info'].combine_first(seasons[column])
+
+    rates = one_row_per_season(per_100)[['player_id', 'season'] + PER_100_FEATURES]
+    seasons = seasons.merge(rates.assign(has_per_100=1.0), on=['player_id', 'season'], how='left')
+    seasons['has_per_100'] = seasons['has_per_100'].fillna(0.0)
+    seasons['player_key'] = seasons['player'].map(normalize_name)
+    seasons = seasons.sort_values(['player_key', 'season'], kind='stable').reset_index(drop=True)
+
+    seasons['age_squared'] = seasons['age'] ** 2
+    positions = seasons['pos'].fillna('')
+    seasons['guard'] = positions.str.contains('G').astype(float)
+    seasons['forward'] = positions.str.contains('F').astype(float)
+    seasons['center'] = positions.str.contains('C').astype(float)
+
+    previous = seasons.groupby('player_key', sort=False)[HISTORY_FEATURES + ['season']].shift(1)
+    consecutive = previous['season'] == seasons['season'] - 1
+    for column in HISTORY_FEATURES:
+        seasons[f'prev_{column}'] = previous[column].where(consecutive)
+    seasons['has_prev'] = consecutive.astype(float)
+    return seasons
+
+def training_pairs(seasons):
+    """Feature matrix of season N and target matrix of the same players' season N+1."""
+    following = seasons.groupby('player_key', sort=False)[list(TARGETS.values()) + ['season']].shift(-1)
+    pairs = following['season'] == seasons['season'] + 1
+    X = seasons.loc[pairs, FEATURES].to_numpy(dtype=float)
+    Y = following.loc[pairs, list(TARGETS.values())].to_numpy(dtype=float)
+    groups = seasons.loc[pairs, 'player_key'].to_numpy()
+    return X, Y, groups
+
+def fit_preprocessing(X):
+    """Fill values for missing features and the standardization of the filled matrix."""
+    fill = np.nanmean(X, axis=0)
+    fill = np.where(np.isnan(fill), 0.0, fill)
+    filled = np.where(np.isnan(X), fill, X)
+    mean = filled.mean(axis=0)
+    scale = filled.std(axis=0)
+    scale[scale == 0] = 1.0
+    return fill, mean, scale
+
+def standardize(X, fill, mean, scale):
+    return (np.where(np.isnan(X), fill, X) - mean) / scale
+
+def ridge_path(Z, y, alphas):
+    """Ridge coefficients for every alpha from one eigendecomposition of Z'Z; Z standardized, y centered."""
+    eigenvalues, eigenvectors = np.linalg.eigh(Z.T @ Z)
+    projected = eigenvectors.T @ (Z.T @ y)
+    return np.stack([eigenvectors @ (projected / (eigenvalues + alpha)) for alpha in alphas])
+
+# Set once per worker process, so each fold task ships only its row indexes
+_training = {}
+
+def init_worker(X, Y):
+    _training['X'] = X
+    _training['Y'] = Y
+
+def run_fold(train_index, test_index):
+    """Squared errors of every target and alpha on one held-out fold, plus the last-season baseline's."""
+    X, Y = _training['X'], _training['Y']
+    fill, mean, scale = fit_preprocessing(X[train_index])
+    Z_train = standardize(X[train_index], fill, mean, scale)
+    Z_test = standardize(X[test_index], fill, mean, scale)
+    filled_test = np.where(np.isnan(X[test_index]), fill, X[test_index])
+
+    errors = np.zeros((len(TARGETS), len(ALPHAS)))
+    baseline = np.zeros(len(TARGETS))
+    counts = np.zeros(len(TARGETS), dtype=np.int64)
+    for target, column in enumerate(TARGETS.values()):
+        y_train, y_test = Y[train_index, target], Y[test_index, target]
+        train_rows, test_rows = ~np.isnan(y_train), ~np.isnan(y_test)
+        intercept = y_train[train_rows].mean()
+        coefficients = ridge_path(Z_train[train_rows], y_train[train_rows] - intercept, ALPHAS)
+        predictions = Z_test[test_rows] @ coefficients.T + intercept
+        errors[target] = ((predictions - y_test[test_rows, None]) ** 2).sum(axis=0)
+        last_season = filled_test[test_rows, FEATURES.index(column)]
+        baseline[target] = ((last_season - y_test[test_rows]) ** 2).sum()
+        counts[target] = test_rows.sum()
+    return errors, baseline, counts
+
+def player_folds(groups, folds):
+    """Fold number of every row; all of a player's seasons land in the same fold."""
+    players = np.unique(groups)
+    assignment = np.random.default_rng(RANDOM_SEED).permutation(len(players)) % folds
+    return assignment[np.searchsorted(players, groups)]
+
+def cross_validate(X, Y, groups, folds=DEFAULT_FOLDS, workers=None):
+    """Mean squared error per target and alpha, with folds trained in a process pool."""
+    fold_of_row = player_folds(groups, folds)
+    errors = np.zeros((len(TARGETS), len(ALPHAS)))
+    baseline = np.zeros(len(TARGETS))
+    counts = np.zeros(len(TARGETS), dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(X, Y)) as pool:
+        futures = [pool.submit(run_fold, np.flatnonzero(fold_of_row != fold), np.flatnonzero(fold_of_row == fold))
+                   for fold in range(folds)]
+        for future in futures:
+            fold_errors, fold_baseline, fold_counts = future.result()
+            errors += fold_errors
+            baseline += fold_baseline
+            counts += fold_counts
+    return errors / counts[:, None], baseline / counts
+
+class ProjectionModel:
+    """Per-target ridge regressions on a shared standardized feature matrix."""
+
+    def __init__(self, coefficients, intercepts, fill, mean, scale, metadata):
+        self.coefficients = coefficients  # targets x features
+        self.intercepts = intercepts
+        self.fill = fill
+        self.mean = mean
+        self.scale = scale
+        self.metadata = metadata
+
+    @property
+    def version(self):
+        return self.metadata['version']
+
+    def predict(self, seasons):
+        """Next-season projections for each row of a player_seasons frame, one column per target."""
+        Z = standardize(seasons[FEATURES].to_numpy(dtype=float), self.fill, self.mean, self.scale)
+        predictions = pd.DataFrame(Z @ self.coefficients.T + self.intercepts, index=seasons.index,
+                                   columns=list(TARGETS))
+        predictions = predictions.clip(lower=0)
+        for stat in PERCENT_TARGETS:
+            predictions[stat] = predictions[stat].clip(upper=1)
+        return predictions
+
+    def save(self, model_dir=None):
+        """Write the artifact next to earlier versions and point LATEST at it."""
+        model_dir = model_dir or MODEL_DIR
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, f'{self.version}.npz')
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, coefficients=self.coefficients, intercepts=self.intercepts,
+                 fill=self.fill, mean=self.mean, scale=self.scale,
+                 metadata=np.array(json.dumps(self.metadata)))
+        os.replace(temp_path, path)
+        latest_temp = os.path.join(model_dir, LATEST_FILE + '.tmp')
+        with open(latest_temp, 'w') as f:
+            f.write(self.version + '\n')
+        os.replace(latest_temp, os.path.join(model_dir, LATEST_FILE))
+        return path
+
+def latest_version(model_dir=None):
+    try:
+        with open(os.path.join(model_dir or MODEL_DIR, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_model(version=None, model_dir=None):
+    """A saved model, the latest one by default; None if nothing has been trained yet."""
+    model_dir = model_dir or MODEL_DIR
+    version = version or latest_version(model_dir)
+    if version is None:
+        return None
+    with np.load(os.path.join(model_dir, f'{version}.npz')) as artifact:
+        metadata = json.loads(str(artifact['metadata']))
+        if metadata.get('format') != MODEL_FORMAT or metadata.get('features') != FEATURES:
+            raise ValueError(f"Model {version} was trained with different features; retrain it")
+        return ProjectionModel(artifact['coefficients'], artifact['intercepts'], artifact['fill'],
+                               artifact['mean'], artifact['scale'], metadata)
+
+def fit_model(X, Y, alphas, metadata):
+    """Refit every target on all rows with its cross-validated alpha."""
+    fill, mean, scale = fit_preprocessing(X)
+    Z = standardize(X, fill, mean, scale)
+    coefficients = np.zeros((len(TARGETS), len(FEATURES)))
+    intercepts = np.zeros(len(TARGETS))
+    for target in range(len(TARGETS)):
+        rows = ~np.isnan(Y[:, target])
+        intercepts[target] = Y[rows, target].mean()
+        coefficients[target] = ridge_path(Z[rows], Y[rows, target] - intercepts[target], [alphas[target]])[0]
+    return ProjectionModel(coefficients, intercepts, fill, mean, scale, metadata)
+
+def train(data_dir=None, model_dir=None, folds=DEFAULT_FOLDS, workers=None):
+    """Build the design matrix, pick each target's penalty by cross-validation and save a new version."""
+    started = time.perf_counter()
+    seasons = player_seasons(*load_sources(data_dir))
+    X, Y, groups = training_pairs(seasons)
+    prepared = time.perf_counter()
+    logging.info(f"Design matrix: {X.shape[0]} season pairs x {X.shape[1]} features "
+                 f"({seasons['season'].min()}-{seasons['season'].max()}) in {prepared - started:.3f}s")
+
+    cv_mse, baseline_mse = cross_validate(X, Y, groups, folds, workers)
+    best = cv_mse.argmin(axis=1)
+    alphas = ALPHAS[best]
+    validated = time.perf_counter()
+
+    version = f"{time.strftime('%Y%m%d%H%M%S')}-{sources_digest(data_dir)[:8]}"
+    metadata = {
+        'version': version,
+        'format': MODEL_FORMAT,
+        'features': FEATURES,
+        'targets': list(TARGETS),
+        'alphas': alphas.tolist(),
+        'cv_rmse': dict(zip(TARGETS, np.sqrt(cv_mse[np.arange(len(TARGETS)), best]).tolist())),
+        'baseline_rmse': dict(zip(TARGETS, np.sqrt(baseline_mse).tolist())),
+        'folds': folds,
+        'training_rows': int(X.shape[0]),
+        'seasons': [int(seasons['season'].min()), int(seasons['season'].max())],
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    model = fit_model(X, Y, alphas, metadata)
+    path = model.save(model_dir)
+    finished = time.perf_counter()
+
+    load_started = time.perf_counter()
+    load_model(version, model_dir)
+    load_ms = (time.perf_counter() - load_started) * 1000
+
+    logging.info(f"\n{'Stat':8} {'Alpha':>8} {'CV RMSE':>9} {'Last season':>12}")
+    for stat in TARGETS:
+        index = list(TARGETS).index(stat)
+        logging.info(f"{stat:8} {alphas[index]:>8g} {metadata['cv_rmse'][stat]:>9.4f} "
+                     f"{metadata['baseline_rmse'][stat]:>12.4f}")
+    logging.info(f"\nTrained {version} in {finished - started:.2f}s (features {prepared - started:.2f}s, "
+                 f"{folds}-fold CV {validated - prepared:.2f}s, fit and save {finished - validated:.2f}s); "
+                 f"artifact {path} loads in {load_ms:.1f} ms")
+    return model
+
+def project_latest_seasons(model, seasons):
+    """Each player's projection for the season after their most recent one."""
+    latest = seasons.drop_duplicates('player_key', keep='last')
+    projections = model.predict(latest)
+    projections.insert(0, 'season', latest['season'].to_numpy() + 1)
+    projections.insert(0, 'player_key', latest['player_key'].to_numpy())
+    projections.insert(0, 'player', latest['player'].to_numpy())
+    return projections.reset_index(drop=True)
+
+def init_model_predictions_table(conn):
+    columns = ',\n'.join(f'            {stat} REAL' for stat in TARGETS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS model_predictions (
+            player_id INTEGER PRIMARY KEY,
+            season INTEGER,
+{columns},
+            model_version TEXT,
+            generated_at DATETIME
+        )
+    ''')
+
+def write_model_predictions(conn, model, projections):
+    """Replace model_predictions, keyed by app player id through the accent-folded name."""
+    # Folded here rather than read from players.name_key, which only exists once index_audit has run
+    player_ids = {normalize_name(full_name): player_id for player_id, full_name
+                  in conn.execute('SELECT id, full_name FROM players WHERE full_name IS NOT NULL')}
+    keyed = projections.assign(player_id=projections['player_key'].map(player_ids))
+    keyed = keyed.dropna(subset=['player_id']).drop_duplicates('player_id', keep='last')
+    rows = list(zip(
+        keyed['player_id'].astype(int).tolist(),
+        keyed['season'].astype(int).tolist(),
+        *(keyed[stat].astype(float).tolist() for stat in TARGETS)
+    ))
+    placeholders = ', '.join('?' for _ in range(len(TARGETS) + 2))
+    with conn:
+        init_model_predictions_table(conn)
+        conn.execute('DELETE FROM model_predictions')
+        conn.executemany(
+            f"INSERT INTO model_predictions (player_id, season, {', '.join(TARGETS)}, model_version, generated_at) "
+            f"VALUES ({placeholders}, ?, datetime('now'))",
+            [row + (model.version,) for row in rows]
+        )
+    return len(rows)
+
+def score_players(db_path=None, data_dir=None, model=None):
+    """Project every player with the latest trained model; returns None when there is no model."""
+    started = time.perf_counter()
+    model = model or load_model()
+    if model is None:
+        logging.info("No trained projection model, skipping model predictions")
+        return None
+    loaded = time.perf_counter()
+    projections = project_latest_seasons(model, player_seasons(*load_sources(data_dir)))
+    conn = sqlite3.connect(db_path or APP_DB)
+    try:
+        count = write_model_predictions(conn, model, projections)
+    finally:
+        conn.close()
+    logging.info(f"Model {model.version}: projected {count} players in {time.perf_counter() - started:.3f}s "
+                 f"(model load {(loaded - started) * 1000:.1f} ms)")
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or apply the next-season projection model.")
+    parser.add_argument('command', choices=['train', 'score'])
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help="Cross-validation folds")
+    parser.add_argument('--workers', type=int, default=None, help="Processes for the folds (default: CPU count)")
+    parser.add_argument('--version', help="Model version to score with (default: latest)")
+    args = parser.parse_args()
+    try:
+        if args.command == 'train':
+            train(folds=args.folds, workers=args.workers)
+        else:
+            score_players(model=load_model(args.version))
+    except Exception as e:
+        logging.error(f"Projection model {args.command} failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,257 @@
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+import csv_cache
+from names import normalize_name
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Get the correct paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+DATA_DIR = os.path.join(BASE_DIR, 'data', 'nbastats')  # Path to nbastats folder
+APP_DB = os.path.join(BASE_DIR, 'data', 'nba_stats.db')  # Path to database file
+
+TEAM_MINUTES = 240.0  # Five players for 48 minutes
+CALIBRATION_SEASONS = 3  # Recent seasons whose calibration factors are averaged for a projection
+LEAGUES = ('NBA', 'BAA')  # Calibrated against the league the projections are for
+MULTI_TEAM = r'^(?:\dTM|TOT)$'  # Combined rows of traded players, not a team
+
+def roll_up(players, keys=('team',)):
+    """Team totals from player rows of minutes, pts, reb, net and net weight, grouped by keys.
+
+    Minutes are scaled so the roster plays exactly 240 a game, so counting
+    stats become Σ stat × 240 / Σ minutes. Net rating is the minutes-weighted
+    mean of the players' on-court ratings, over players that have one.
+    """
+    players = players.assign(
+        net_weighted=players['net'] * players['net_weight'],
+        net_weight=players['net_weight'].where(players['net'].notna(), 0.0),
+    )
+    totals = players.groupby(list(keys)).agg(
+        players=('minutes', 'size'), minutes=('minutes', 'sum'), pts=('pts', 'sum'), reb=('reb', 'sum'),
+        net_weighted=('net_weighted', 'sum'), net_weight=('net_weight', 'sum'),
+    )
+    scale = TEAM_MINUTES / totals['minutes'].where(totals['minutes'] > 0)
+    return pd.DataFrame({
+        'players': totals['players'],
+        'minutes': totals['minutes'],
+        'raw_pts': totals['pts'] * scale,
+        'raw_reb': totals['reb'] * scale,
+        'raw_net_rating': totals['net_weighted'] / totals['net_weight'].where(totals['net_weight'] > 0),
+    })
+
+def historical_roll_ups(per_game, per_100):
+    """roll_up of every past team-season from what its players actually did, keyed by (season, team)."""
+    per_game = per_game[per_game['lg'].isin(LEAGUES) & ~per_game['tm'].str.match(MULTI_TEAM)]
+    per_100 = per_100[per_100['lg'].isin(LEAGUES) & ~per_100['tm'].str.match(MULTI_TEAM)]
+    columns = ['season', 'team', 'minutes', 'pts', 'reb', 'net', 'net_weight']
+    players = per_game.assign(
+        team=per_game['tm'], minutes=per_game['mp_per_game'], pts=per_game['pts_per_game'],
+        reb=per_game['trb_per_game'], net=np.nan, net_weight=0.0,
+    )[columns]
+    # Ratings come from a separate file, so they join the roll-up as rows with no minutes or stats
+    ratings = per_100.assign(
+        team=per_100['tm'], minutes=0.0, pts=0.0, reb=0.0,
+        net=per_100['o_rtg'] - per_100['d_rtg'], net_weight=per_100['mp'],
+    )[columns]
+    return roll_up(pd.concat([players, ratings], ignore_index=True), keys=('season', 'team'))
+
+def season_calibration(data_dir=None):
+    """Season-level lookup of how actual team stats relate to the player roll-up.
+
+    pts and reb get a ratio (Team Totals per game over rolled-up); net rating
+    gets a least-squares slope through the origin against Team Summaries, as
+    its league mean is zero.
+    """
+    data_dir = data_dir or DATA_DIR
+    per_game, per_100, totals, summaries = (
+        csv_cache.read_csv(os.path.join(data_dir, name))
+        for name in ('Player Per Game.csv', 'Per 100 Poss.csv', 'Team Totals.csv', 'Team Summaries.csv')
+    )
+    actual = (totals[totals['lg'].isin(LEAGUES) & totals['abbreviation'].notna()]
+              .assign(pts=lambda df: df['pts'] / df['g'], reb=lambda df: df['trb'] / df['g'])
+              .merge(summaries[['season', 'lg', 'abbreviation', 'n_rtg']], on=['season', 'lg', 'abbreviation'],
+                     how='left')
+              [['season', 'abbreviation', 'pts', 'reb', 'n_rtg']]
+              .rename(columns={'abbreviation': 'team'}))
+    joined = historical_roll_ups(per_game, per_100).reset_index().merge(actual, on=['season', 'team'])
+    net = joined.dropna(subset=['raw_net_rating', 'n_rtg'])
+    by_season = joined.groupby('season')
+    return pd.DataFrame({
+        'teams': by_season.size(),
+        # Seasons before minutes were recorded roll up to nothing and get no factor
+        'pts_ratio': by_season['pts'].sum() / by_season['raw_pts'].sum().where(lambda total: total > 0),
+        'reb_ratio': by_season['reb'].sum() / by_season['raw_reb'].sum().where(lambda total: total > 0),
+        'net_slope': ((net['raw_net_rating'] * net['n_rtg']).groupby(net['season']).sum()
+                      / (net['raw_net_rating'] ** 2).groupby(net['season']).sum()),
+    })
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS team_calibration (
+            season INTEGER PRIMARY KEY,
+            teams INTEGER,
+            pts_ratio REAL,
+            reb_ratio REAL,
+            net_slope REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS team_projections (
+            team TEXT PRIMARY KEY,
+            season INTEGER,
+            players INTEGER,
+            minutes REAL,
+            pts REAL,
+            reb REAL,
+            net_rating REAL,
+            raw_pts REAL,
+            raw_reb REAL,
+            raw_net_rating REAL,
+            roster_hash INTEGER NOT NULL,
+            last_updated DATETIME
+        )
+    ''')
+
+def write_calibration(conn, calibration):
+    with conn:
+        conn.execute('DELETE FROM team_calibration')
+        conn.executemany(
+            'INSERT INTO team_calibration VALUES (?, ?, ?, ?, ?)',
+            [(int(season), int(row.teams), *(None if pd.isna(value) else float(value)
+                                             for value in (row.pts_ratio, row.reb_ratio, row.net_slope)))
+             for season, row in calibration.iterrows()]
+        )
+
+def calibration_factors(conn, season):
+    """Mean factors of the CALIBRATION_SEASONS seasons up to `season`, from the stored lookup."""
+    row = conn.execute('''
+        SELECT AVG(pts_ratio), AVG(reb_ratio), AVG(net_slope) FROM (
+            SELECT * FROM team_calibration WHERE season <= ? ORDER BY season DESC LIMIT ?
+        )
+    ''', (season, CALIBRATION_SEASONS)).fetchone()
+    return tuple(1.0 if value is None else value for value in row)
+
+def table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+def load_rosters(conn, teams=None):
+    """Projected player rows of the current season's rosters, optionally of some teams only.
+
+    A player's team is the one of their season in the latest season; the
+    projections come from model_predictions when a model has been trained,
+    otherwise from the heuristic predictions with last season's minutes.
+    """
+    if table_exists(conn, 'model_predictions'):
+        source = 'LEFT JOIN model_predictions pr ON pr.player_id = s.player_id'
+        minutes = 'COALESCE(pr.min, s.minutes_per_game)'
+        pts, reb = 'COALESCE(pr.pts, s.pts_per_game)', 'COALESCE(pr.reb, s.reb_per_game)'
+    elif table_exists(conn, 'predictions'):
+        source = 'LEFT JOIN predictions pr ON pr.player_id = s.player_id'
+        minutes = 's.minutes_per_game'
+        pts, reb = 'COALESCE(pr.pts, s.pts_per_game)', 'COALESCE(pr.reb, s.reb_per_game)'
+    else:
+        # Nothing projected yet; last season stands in for next
+        source, minutes, pts, reb = '', 's.minutes_per_game', 's.pts_per_game', 's.reb_per_game'
+    team_filter = f"AND s.team IN ({', '.join('?' for _ in teams)})" if teams else ''
+    roster = pd.read_sql_query(f'''
+        SELECT s.player_id, s.team, CAST(s.season_id AS INTEGER) AS season,
+               {minutes} AS minutes, {pts} AS pts, {reb} AS reb, p.full_name
+        FROM seasons s
+        JOIN players p ON p.id = s.player_id
+        {source}
+        WHERE CAST(s.season_id AS INTEGER) = (SELECT MAX(CAST(season_id AS INTEGER)) FROM seasons)
+          AND s.team IS NOT NULL {team_filter}
+        ORDER BY s.team, s.player_id
+    ''', conn, params=list(teams or []))
+    roster = roster[~roster['team'].str.match(MULTI_TEAM)]
+
+    roster['net'] = np.nan
+    if table_exists(conn, 'player_per_100_poss') and len(roster):
+        # On-court ratings of the same season, joined by accent-folded name as the migration keys players
+        season = int(roster['season'].iloc[0])
+        ratings = pd.read_sql_query('''
+            SELECT player, tm, mp, o_rtg - d_rtg AS net FROM player_per_100_poss WHERE season = ?
+        ''', conn, params=[season])
+        ratings = ratings.sort_values('mp', ascending=False).drop_duplicates('player')
+        net = dict(zip(ratings['player'].map(normalize_name), ratings['net']))
+        roster['net'] = roster['full_name'].map(normalize_name).map(net)
+    roster['net_weight'] = roster['minutes']
+    return roster.drop(columns=['full_name'])
+
+def roster_hashes(roster):
+    """One order-independent fingerprint of every team's roster and projections."""
+    row_hashes = pd.util.hash_pandas_object(roster, index=False).to_numpy().view(np.int64)
+    # Wrapping int64 sum; any changed, added or removed player changes it
+    return pd.Series(row_hashes, index=roster['team'].to_numpy()).groupby(level=0).sum()
+
+def build_team_projections(db_path=None, teams=None, full=False, data_dir=None):
+    """Materialize team_projections, recomputing only teams whose roster or projections changed.
+
+    The calibration lookup is rebuilt from the CSVs with full or when the
+    database has none yet; otherwise the stored one is used. teams limits
+    the run to those teams, e.g. after a trade.
+    """
+    db_path = db_path or APP_DB
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            init_tables(conn)
+        if full or conn.execute('SELECT COUNT(*) FROM team_calibration').fetchone()[0] == 0:
+            write_calibration(conn, season_calibration(data_dir))
+
+        roster = load_rosters(conn, teams)
+        current = roster_hashes(roster)
+        stored = dict(conn.execute('SELECT team, roster_hash FROM team_projections').fetchall())
+        changed = [team for team, digest in current.items() if full or stored.get(team) != digest]
+        # Teams with nobody left on their roster; without a team filter that is every team not seen
+        scope = set(teams) if teams else set(stored)
+        removed = sorted(scope & set(stored) - set(current.index))
+
+        rows = []
+        if changed:
+            season = int(roster['season'].max())
+            pts_ratio, reb_ratio, net_slope = calibration_factors(conn, season)
+            rolled = roll_up(roster[roster['team'].isin(changed)])
+            for team, values in rolled.iterrows():
+                raw_net = None if pd.isna(values['raw_net_rating']) else float(values['raw_net_rating'])
+                rows.append((
+                    team, season + 1, int(values['players']), float(values['minutes']),
+                    float(values['raw_pts'] * pts_ratio), float(values['raw_reb'] * reb_ratio),
+                    None if raw_net is None else raw_net * net_slope,
+                    float(values['raw_pts']), float(values['raw_reb']), raw_net, int(current[team]),
+                ))
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO team_projections
+                (team, season, players, minutes, pts, reb, net_rating, raw_pts, raw_reb, raw_net_rating,
+                 roster_hash, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ''', rows)
+            conn.executemany('DELETE FROM team_projections WHERE team = ?', [(team,) for team in removed])
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Team projections: {len(rows)} teams recomputed, {len(removed)} removed, "
+                     f"{len(current) - len(rows)} unchanged in {elapsed:.3f}s")
+        return len(rows)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll player projections up to team projections.")
+    parser.add_argument('teams', nargs='*', help="Only these teams, e.g. after a roster change")
+    parser.add_argument('--full', action='store_true', help="Recompute every team and the calibration lookup")
+    args = parser.parse_args()
+    try:
+        build_team_projections(teams=args.teams or None, full=args.full)
+    except Exception as e:
+        logging.error(f"Team projections failed: {e}")
+        sys.exit(1)
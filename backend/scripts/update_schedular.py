@@ -2,8 +2,16 @@ import schedule
 import time
 import subprocess
 import logging
+import os
+import sys
 from datetime import datetime
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_SCRIPT = os.path.join(SCRIPT_DIR, 'incremental_migration.py')
+INGEST_SCRIPT = os.path.join(SCRIPT_DIR, 'ingest_nbastats.py')
+PREDICTIONS_SCRIPT = os.path.join(SCRIPT_DIR, 'batch_predictions.py')
+TEAM_PROJECTIONS_SCRIPT = os.path.join(SCRIPT_DIR, 'team_projections.py')
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -13,7 +21,14 @@ logging.basicConfig(
 def run_migration():
     try:
         logging.info("Starting scheduled data update")
-        subprocess.run(['python', 'migrate_kaggle_data.py'], check=True)
+        # Only changed CSV rows are upserted, so the API keeps serving data during the run
+        subprocess.run([sys.executable, MIGRATION_SCRIPT], check=True, cwd=SCRIPT_DIR)
+        # Reload any other nbastats CSVs that changed
+        subprocess.run([sys.executable, INGEST_SCRIPT], check=True, cwd=SCRIPT_DIR)
+        # Refresh the league-wide projection board from the updated seasons
+        subprocess.run([sys.executable, PREDICTIONS_SCRIPT], check=True, cwd=SCRIPT_DIR)
+        # Roll the new projections up to teams; only teams whose roster or projections moved are rewritten
+        subprocess.run([sys.executable, TEAM_PROJECTIONS_SCRIPT], check=True, cwd=SCRIPT_DIR)
         logging.info("Scheduled update completed successfully")
     except subprocess.CalledProcessError as e:
         logging.error(f"Update failed: {str(e)}")
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The scripts import each other (and routes/) by bare module name, as when run from backend/scripts
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Gets backend folder
+for folder in ('', 'scripts', 'routes'):
+    path = os.path.join(BASE_DIR, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
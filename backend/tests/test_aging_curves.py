@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aging_curves import ALL_POSITIONS, TARGETS, compute_curves
+
+def per_game_rows(rows):
+    """Player Per Game rows from (player_id, season, age, pos, games, pts) tuples; other stats stay flat."""
+    per_game = pd.DataFrame(rows, columns=['player_id', 'season', 'age', 'pos', 'g', 'pts_per_game'])
+    for column in TARGETS.values():
+        if column not in per_game:
+            per_game[column] = 30.0 if column == 'mp_per_game' else 0.5
+    return per_game
+
+@pytest.fixture
+def curves():
+    per_game = per_game_rows([
+        # Two guards aging 25 -> 26, the first with twice the minutes
+        (1, 2020, 25, 'PG', 82, 10.0), (1, 2021, 26, 'PG', 82, 12.0), (1, 2022, 27, 'PG', 82, 13.0),
+        (2, 2020, 25, 'SG-PG', 41, 10.0), (2, 2021, 26, 'SG-PG', 41, 14.0),
+        (3, 2020, 25, 'C', 82, 10.0), (3, 2021, 26, 'C', 82, 9.0),
+        # A gap year is not a season pair
+        (4, 2020, 25, 'PG', 82, 10.0), (4, 2022, 27, 'PG', 82, 30.0),
+    ])
+    return compute_curves(per_game, min_pairs=2)
+
+def test_deltas_are_weighted_by_the_pairs_minutes(curves):
+    # Harmonic-mean minutes: 82*30 for player 1, 41*30 for player 2
+    assert curves.loc[('G', 25), 'pts'] == pytest.approx((2 * 2460 + 4 * 1230) / 3690)
+    assert curves.loc[(ALL_POSITIONS, 25), 'pts'] == pytest.approx((2 * 2460 + 4 * 1230 - 2460) / 6150)
+    assert curves.loc[('G', 25), 'ast'] == 0.0
+
+def test_thin_cells_borrow_the_all_positions_curve(curves):
+    assert curves.loc[('C', 25), 'pts'] == curves.loc[(ALL_POSITIONS, 25), 'pts']
+    assert curves.loc[('F', 25), 'pts'] == curves.loc[(ALL_POSITIONS, 25), 'pts']
+    # Age 26 has one pair in total, too few even for the ALL curve
+    assert curves.loc[('G', 26), 'pts'] == 0.0
+
+def test_cumulative_columns_sum_deltas_from_the_youngest_age(curves):
+    assert curves.index.get_level_values('age').unique().tolist() == [25, 26]
+    guards = curves.xs('G', level='position')
+    np.testing.assert_allclose(guards['pts_cumulative'], guards['pts'].cumsum())
+
+def test_season_range_limits_the_pairs_used():
+    per_game = per_game_rows([
+        (1, 2019, 24, 'C', 82, 10.0), (1, 2020, 25, 'C', 82, 20.0), (1, 2021, 26, 'C', 82, 21.0),
+    ])
+    curves = compute_curves(per_game, first_season=2020, min_pairs=1)
+    assert curves.index.get_level_values('age').unique().tolist() == [25]
+    assert curves.loc[('C', 25), 'pts'] == 1.0
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from backtest import (STAT_COLUMNS, RECENT_WEIGHTS, lag_matrices, weight_grid, era_of, init_worker,
+                      run_seasons, summarize)
+
+def seasons_frame():
+    seasons = pd.DataFrame({'player_id': [1, 1, 1, 1, 2, 2], 'season': [2019, 2020, 2021, 2022, 2021, 2022]})
+    for column in STAT_COLUMNS.values():
+        seasons[column] = [10.0, 12.0, 15.0, 12.0, 4.0, 6.0]
+    # Percentages of 0 are unrecorded and never scored
+    seasons['fg3_percent'] = [0.3, 0.3, 0.3, 0.0, 0.4, 0.5]
+    # Shuffled, as SQL hands them over
+    return seasons.sample(frac=1, random_state=0)
+
+def test_lag_matrices_hold_each_targets_previous_seasons_most_recent_first():
+    targets, matrices = lag_matrices(seasons_frame())
+    assert list(zip(targets['player_id'], targets['season'])) == [(1, 2020), (1, 2021), (1, 2022), (2, 2022)]
+    np.testing.assert_array_equal(matrices['pts'], [
+        [10.0, np.nan, np.nan],
+        [12.0, 10.0, np.nan],
+        [15.0, 12.0, 10.0],
+        [4.0, np.nan, np.nan],
+    ])
+
+def test_weight_grid_sums_to_one_and_includes_the_current_weights():
+    grid = weight_grid(0.1)
+    assert all(np.isclose(weights.sum(), 1.0) and weights[0] > 0 for weights in grid)
+    assert any(np.allclose(weights, RECENT_WEIGHTS) for weights in grid)
+    assert len({tuple(np.round(weights, 6)) for weights in grid}) == len(grid)
+    # Off-grid weights in use are appended rather than silently skipped
+    assert any(np.allclose(weights, RECENT_WEIGHTS) for weights in weight_grid(0.25))
+
+def test_era_of_maps_seasons_to_the_era_they_start_in():
+    assert era_of(np.array([1947, 1954, 1955, 2004, 2005, 2025])).tolist() == [
+        'early', 'early', 'shot clock', 'three-point line', 'hand-check rules', 'pace and space']
+
+def test_run_seasons_scores_the_heuristics_predictions():
+    targets, matrices = lag_matrices(seasons_frame())
+    init_worker(targets, matrices)
+    sums = run_seasons([2022], [(RECENT_WEIGHTS, True), (np.array([1.0, 0.0, 0.0]), False)])
+
+    pts = sums[sums['stat'] == 'pts'].set_index('config')
+    # Player 1's weighted mean is 0.5*15 + 0.3*12 + 0.2*10 = 13.1; player 2 has one season of history
+    trend = ((15 - 12) / 12 + (12 - 10) / 10) / 2
+    heuristic = abs(13.1 * (1 + trend) - 12.0) + abs(0.5 * 4.0 - 6.0)
+    np.testing.assert_allclose(pts.loc[0, 'abs_error'], heuristic)
+    np.testing.assert_allclose(pts.loc[1, 'abs_error'], abs(15.0 - 12.0) + abs(4.0 - 6.0))
+    assert pts.loc[0, 'count'] == 2
+    # Player 1's 2022 three-point percentage is 0, so only player 2 is scored
+    assert sums[(sums['stat'] == 'fg3_pct') & (sums['config'] == 0)]['count'].item() == 1
+
+def test_summarize_turns_error_sums_into_mae_and_rmse():
+    sums = pd.DataFrame({'stat': ['pts', 'pts', 'ast'], 'count': [2, 2, 0],
+                         'abs_error': [2.0, 4.0, 0.0], 'sq_error': [2.0, 14.0, 0.0]})
+    summary = summarize(sums, ['stat'])
+    assert summary.index.tolist() == ['pts']
+    assert summary.loc['pts', 'mae'] == 1.5
+    assert summary.loc['pts', 'rmse'] == 2.0
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparables import MIN_MINUTES, ComparablesIndex, top_k
+
+def brute_force(queries, vectors, k):
+    distances = np.sqrt(((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2))
+    return np.argsort(distances, axis=1, kind='stable')[:, :k], np.sort(distances, axis=1)[:, :k]
+
+def test_top_k_matches_brute_force_across_query_blocks():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 6))
+    queries = rng.normal(size=(7, 6))
+    indexes, distances = top_k(queries, vectors, (vectors ** 2).sum(axis=1), 5, block=3)
+    expected_indexes, expected_distances = brute_force(queries, vectors, 5)
+    np.testing.assert_array_equal(indexes, expected_indexes)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+def test_top_k_skips_excluded_vectors_and_caps_k():
+    vectors = np.array([[0.0, 0.0], [1.0, 0.0], [3.0, 0.0]])
+    queries = np.array([[0.0, 0.0]])
+    exclude = lambda start, stop: np.array([[True, False, False]])
+    indexes, distances = top_k(queries, vectors, (vectors ** 2).sum(axis=1), 10, exclude)
+    assert indexes.tolist() == [[1, 2, 0]]
+    assert distances[0, :2].tolist() == [1.0, 3.0]
+    assert np.isinf(distances[0, 2])
+
+@pytest.fixture
+def index():
+    # Source ids 9 and 2 are the same player, like LeBron James (3463 to 2023, 3462 after); rows are in
+    # (player_id, season) order, as profile_vectors leaves them
+    seasons = pd.DataFrame({
+        'player_id': [2, 2, 3, 4, 9, 9],
+        'player': ['Nikola Jokić', 'Nikola Jokić', 'Other Center', 'Cameo', 'Nikola Jokić', 'Nikola Jokić'],
+        'season': [2024, 2025, 2025, 2025, 2022, 2023],
+        'tm': 'DEN', 'pos': 'C',
+        'mp': [2500.0, 2500.0, 2500.0, MIN_MINUTES - 1, 2500.0, 2500.0],
+    })
+    vectors = np.array([[0.2], [0.3], [2.0], [0.3], [0.0], [0.1]], dtype=np.float32)
+    return ComparablesIndex(seasons, vectors, np.zeros(1), np.ones(1), 'test')
+
+def test_find_returns_the_latest_season_across_source_ids(index):
+    assert index.find('nikola jokić') == (2, 2025)
+    assert index.find('Nikola Jokić', 2023) == (9, 2023)
+    with pytest.raises(KeyError):
+        index.find('Nikola Jokic')
+
+def test_own_seasons_are_excluded_across_source_ids(index):
+    comps = index.query(2, 2025, k=5)
+    # Only Other Center is left: the seasons under id 9 are excluded too, Cameo is under MIN_MINUTES
+    assert comps['player'].tolist() == ['Other Center']
+
+def test_include_self_ranks_own_seasons_by_distance(index):
+    comps = index.query(2, 2025, k=3, include_self=True)
+    assert list(zip(comps['player_id'], comps['season'])) == [(2, 2025), (2, 2024), (9, 2023)]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from feature_store import STAT_COLUMNS, RECENT_WEIGHTS, weighted_means, trends, compute_features
+
+nan = np.nan
+
+def test_weighted_means_weights_the_most_recent_season_first():
+    matrix = np.array([[10.0, 20.0, 30.0]])
+    np.testing.assert_allclose(weighted_means(matrix), [0.5 * 10 + 0.3 * 20 + 0.2 * 30])
+
+def test_weighted_means_missing_seasons_add_nothing():
+    # Not renormalized, like the reduce in generatePredictions
+    matrix = np.array([[10.0, nan, nan], [nan, nan, nan]])
+    np.testing.assert_allclose(weighted_means(matrix), [5.0, 0.0])
+
+def test_weighted_means_uses_as_many_weights_as_columns():
+    np.testing.assert_allclose(weighted_means(np.array([[10.0, 20.0]]), np.array([0.6, 0.4, 0.0])), [14.0])
+
+def test_trends_average_the_relative_season_over_season_changes():
+    # 10 -> 15 is +50%, 15 -> 12 is -20% (newest first in the matrix)
+    matrix = np.array([[12.0, 15.0, 10.0]])
+    np.testing.assert_allclose(trends(matrix), [(-0.2 + 0.5) / 2])
+
+def test_trends_skip_zero_and_missing_base_seasons():
+    matrix = np.array([
+        [12.0, 10.0, 0.0],   # 0 -> 10 has no relative change
+        [12.0, 10.0, nan],   # Only two seasons
+        [5.0, 0.0, 0.0],     # No usable change at all
+        [nan, nan, nan],
+    ])
+    np.testing.assert_allclose(trends(matrix), [0.2, 0.2, 0.0, 0.0])
+
+def test_compute_features_predicts_weighted_mean_times_trend():
+    seasons = pd.DataFrame({'player_id': [7, 7, 7, 9], 'season': [2025, 2024, 2023, 2025]})
+    for column in STAT_COLUMNS.values():
+        seasons[column] = [12.0, 15.0, 10.0, 4.0]
+    seasons['minutes_per_game'] = [30.0, 30.0, 30.0, 10.0]
+    features = compute_features(seasons)
+
+    weighted = RECENT_WEIGHTS @ [12.0, 15.0, 10.0]
+    assert features.loc[7, 'pts_weighted'] == weighted
+    np.testing.assert_allclose(features.loc[7, 'pts_predicted'], weighted * (1 + 0.15))
+    assert features.loc[7, 'pts_career_high'] == 15.0
+    assert features.loc[9, 'seasons_count'] == 1
+    assert features.loc[9, 'pts_trend'] == 0.0
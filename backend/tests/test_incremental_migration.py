@@ -0,0 +1,78 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental_migration import ROW_KEY, TRACKED_COLUMNS, hash_rows, diff_rows, init_tracking_tables
+
+def per_game_rows():
+    rows = pd.DataFrame({column: [0.0, 0.0, 0.0] for column in TRACKED_COLUMNS})
+    rows['player'] = ['A Player', 'B Player', 'C Player']
+    rows['season'] = [2024, 2024, 2025]
+    rows['tm'] = ['BOS', 'LAL', 'BOS']
+    rows['pos'] = ['PG', 'C', 'SF']
+    rows['pts_per_game'] = [20.1, 8.4, 12.0]
+    rows['seas_id'] = [1, 2, 3]
+    rows['player_id'] = [10, 11, 12]
+    return rows
+
+def source_of(per_game):
+    source = per_game[ROW_KEY].copy()
+    source['row_hash'] = hash_rows(per_game)
+    source['row_index'] = np.arange(len(per_game))
+    return source
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    init_tracking_tables(conn)
+    yield conn
+    conn.close()
+
+def track(conn, source):
+    conn.executemany(
+        'INSERT INTO season_sources (seas_id, source_player_id, tm, row_hash, season_row_id) VALUES (?, ?, ?, ?, ?)',
+        [(int(row.seas_id), int(row.player_id), row.tm, int(row.row_hash), index + 100)
+         for index, row in enumerate(source.itertuples())]
+    )
+
+def test_hash_rows_only_changes_with_tracked_columns():
+    per_game = per_game_rows()
+    per_game['untracked'] = [1, 2, 3]
+    before = hash_rows(per_game)
+    per_game['untracked'] = [4, 5, 6]
+    assert (hash_rows(per_game) == before).all()
+    per_game.loc[1, 'pts_per_game'] = 9.0
+    after = hash_rows(per_game)
+    assert after.dtype == np.int64
+    assert (after != before).tolist() == [False, True, False]
+
+def test_first_run_treats_every_row_as_changed(conn):
+    changed, removed, bootstrap = diff_rows(source_of(per_game_rows()), conn)
+    assert bootstrap
+    assert len(changed) == 3 and changed['season_row_id'].isna().all()
+    assert removed.empty
+
+def test_unchanged_rows_are_skipped(conn):
+    source = source_of(per_game_rows())
+    track(conn, source)
+    changed, removed, bootstrap = diff_rows(source, conn)
+    assert not bootstrap
+    assert changed.empty and removed.empty
+
+def test_edited_new_and_removed_rows_are_detected(conn):
+    per_game = per_game_rows()
+    track(conn, source_of(per_game))
+
+    per_game.loc[0, 'pts_per_game'] = 21.3
+    per_game = per_game.drop(index=2)
+    new_row = per_game.iloc[[1]].assign(seas_id=4, player_id=13, player='D Player')
+    changed, removed, _ = diff_rows(source_of(pd.concat([per_game, new_row], ignore_index=True)), conn)
+
+    assert sorted(changed['seas_id'].tolist()) == [1, 4]
+    # An edited row keeps its seasons row; a new one gets none yet
+    season_row_ids = dict(zip(changed['seas_id'], changed['season_row_id']))
+    assert season_row_ids[1] == 100 and np.isnan(season_row_ids[4])
+    assert removed['seas_id'].tolist() == [3]
+    assert removed['season_row_id'].tolist() == [102]
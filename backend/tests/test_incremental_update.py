@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from incremental_update import NBADatabaseUpdater
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+def players_db(updated_ago):
+    """A players table whose rows were last updated the given number of seconds ago (None: never)."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE players (id INTEGER PRIMARY KEY, last_updated DATETIME)')
+    conn.executemany(
+        "INSERT INTO players (id, last_updated) VALUES (?, datetime(?, 'unixepoch'))",
+        [(player_id, None if ago is None else int(time.time()) - ago) for player_id, ago in updated_ago.items()]
+    )
+    return conn
+
+def planned_ids(updated_ago, candidates, last_games=None):
+    conn = players_db(updated_ago)
+    try:
+        queue = NBADatabaseUpdater(cache_path=None).plan_updates(conn, [{'id': pid} for pid in candidates],
+                                                                 last_games)
+    finally:
+        conn.close()
+    return [player['id'] for player in queue]
+
+def test_recently_updated_players_are_not_due():
+    assert planned_ids({1: HOUR, 2: 2 * DAY}, [1, 2]) == [2]
+
+def test_never_updated_players_come_before_stale_ones():
+    # 3 is not in the players table at all
+    assert planned_ids({1: 2 * DAY, 2: None, 4: 3 * DAY}, [1, 2, 3, 4]) == [2, 3, 4, 1]
+
+def test_players_with_games_since_their_update_come_first():
+    now = int(time.time())
+    updated_ago = {1: 5 * DAY, 2: 2 * DAY, 3: 3 * DAY}
+    last_games = {2: now - DAY, 3: now - 4 * DAY}
+    assert planned_ids(updated_ago, [1, 2, 3], last_games) == [2, 1, 3]
+
+def test_a_game_on_the_update_day_counts_as_after_it():
+    now = int(time.time())
+    # Game dates carry no time, so a game an hour before the update may have finished after it
+    assert planned_ids({1: 3 * DAY, 2: 2 * DAY}, [1, 2], {2: now - 2 * DAY - HOUR}) == [2, 1]
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from migrate_nba_stats import normalize_percent, fill_numeric
+
+def test_normalize_percent_strips_signs_and_scales_whole_percentages():
+    values = normalize_percent(pd.Series(['45.5%', '0.455', '100', '1']))
+    np.testing.assert_allclose(values, [0.455, 0.455, 1.0, 1.0])
+
+def test_normalize_percent_defaults_missing_and_unparseable_values():
+    values = normalize_percent(pd.Series(['x', None, '']), default=-1.0)
+    np.testing.assert_array_equal(values, [-1.0, -1.0, -1.0])
+
+def test_normalize_percent_accepts_numeric_columns():
+    values = normalize_percent(pd.Series([0.5, 50.0, np.nan]))
+    np.testing.assert_allclose(values, [0.5, 0.5, 0.0])
+
+def test_fill_numeric_replaces_missing_values_and_casts():
+    values = fill_numeric(pd.Series(['3', None, 'a', 7]), default=-1, dtype=int)
+    assert values.dtype == int
+    assert values.tolist() == [3, -1, -1, 7]
+
+def test_fill_numeric_keeps_floats_by_default():
+    values = fill_numeric(pd.Series([1.5, np.nan]))
+    assert values.tolist() == [1.5, 0.0]
@@ -0,0 +1,63 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from projection_model import (TARGETS, FEATURES, PER_GAME_FEATURES, PER_100_FEATURES, ProjectionModel,
+                              player_seasons, training_pairs, project_latest_seasons, write_model_predictions)
+
+# The source gives some players a new player_id mid-career, like LeBron James (3463 to 2023, 3462 after)
+CAREERS = [
+    ('Nikola Jokić', 1, [2022, 2023]),
+    ('Nikola Jokic', 2, [2024, 2025]),
+    ('Role Player', 3, [2023, 2024]),
+]
+
+def sources():
+    rows = [(name, player_id, season) for name, player_id, seasons in CAREERS for season in seasons]
+    per_game = pd.DataFrame(rows, columns=['player', 'player_id', 'season'])
+    for number, column in enumerate(PER_GAME_FEATURES):
+        per_game[column] = per_game['season'] - 2000 + number
+    per_game['age'] = per_game['season'] - 1995
+    per_game['experience'] = per_game['season'] - 2015
+    per_game['pos'] = 'C'
+    per_100 = per_game[['player_id', 'season']].assign(**{column: 1.0 for column in PER_100_FEATURES})
+    season_info = per_game[['player_id', 'season', 'age', 'experience', 'pos']]
+    return per_game, per_100, season_info
+
+def constant_model(values):
+    """A model that projects the same value of every target for everyone."""
+    return ProjectionModel(np.zeros((len(TARGETS), len(FEATURES))), np.array(values, dtype=float),
+                           np.zeros(len(FEATURES)), np.zeros(len(FEATURES)), np.ones(len(FEATURES)),
+                           {'version': 'test'})
+
+def test_history_follows_a_player_across_source_ids():
+    seasons = player_seasons(*sources())
+    jokic = seasons[seasons['player_key'] == 'nikola jokic'].set_index('season')
+    assert jokic.index.tolist() == [2022, 2023, 2024, 2025]
+    # 2024 is the first season under the new id, and still has 2023 as its previous season
+    assert jokic.loc[2024, 'has_prev'] == 1.0
+    assert jokic.loc[2024, 'prev_pts_per_game'] == jokic.loc[2023, 'pts_per_game']
+
+    X, Y, groups = training_pairs(seasons)
+    assert sorted(groups.tolist()) == ['nikola jokic'] * 3 + ['role player']
+
+def test_each_player_is_projected_from_their_latest_season():
+    projections = project_latest_seasons(constant_model(range(len(TARGETS))), player_seasons(*sources()))
+    latest = dict(zip(projections['player_key'], projections['season']))
+    assert latest == {'nikola jokic': 2026, 'role player': 2025}
+
+def test_predictions_are_keyed_by_app_player_without_name_key():
+    conn = sqlite3.connect(':memory:')
+    # A database index_audit has not touched yet: players has no name_key column
+    conn.execute('CREATE TABLE players (id INTEGER PRIMARY KEY, full_name TEXT)')
+    conn.executemany('INSERT INTO players VALUES (?, ?)', [(10, 'Nikola Jokić'), (11, 'Role Player')])
+    model = constant_model(range(len(TARGETS)))
+    try:
+        count = write_model_predictions(conn, model, project_latest_seasons(model, player_seasons(*sources())))
+        rows = conn.execute('SELECT player_id, season, pts, model_version FROM model_predictions ORDER BY player_id')
+        assert count == 2
+        assert rows.fetchall() == [(10, 2026, float(list(TARGETS).index('pts')), 'test'),
+                                   (11, 2025, float(list(TARGETS).index('pts')), 'test')]
+    finally:
+        conn.close()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from team_projections import TEAM_MINUTES, roll_up, roster_hashes
+
+def roster():
+    return pd.DataFrame({
+        'team': ['BOS', 'BOS', 'BOS', 'LAL'],
+        'player_id': [1, 2, 3, 4],
+        'minutes': [36.0, 24.0, 20.0, 30.0],
+        'pts': [30.0, 12.0, 6.0, 25.0],
+        'reb': [8.0, 4.0, 10.0, 7.0],
+        'net': [5.0, -1.0, np.nan, 2.0],
+        'net_weight': [36.0, 24.0, 20.0, 30.0],
+    })
+
+def test_roll_up_scales_the_roster_to_240_minutes():
+    teams = roll_up(roster())
+    assert teams.loc['BOS', 'players'] == 3
+    assert teams.loc['BOS', 'minutes'] == 80.0
+    assert teams.loc['BOS', 'raw_pts'] == pytest.approx(48.0 * TEAM_MINUTES / 80.0)
+    assert teams.loc['LAL', 'raw_reb'] == pytest.approx(7.0 * TEAM_MINUTES / 30.0)
+
+def test_roll_up_net_rating_is_minutes_weighted_over_rated_players():
+    teams = roll_up(roster())
+    assert teams.loc['BOS', 'raw_net_rating'] == pytest.approx((5.0 * 36 - 1.0 * 24) / 60)
+    unrated = roster().assign(net=np.nan)
+    assert roll_up(unrated)['raw_net_rating'].isna().all()
+
+def test_roll_up_groups_by_several_keys_and_leaves_empty_rosters_unscaled():
+    players = roster().assign(season=[2024, 2025, 2025, 2025])
+    players.loc[0, 'minutes'] = 0.0
+    teams = roll_up(players, keys=('season', 'team'))
+    assert teams.index.tolist() == [(2024, 'BOS'), (2025, 'BOS'), (2025, 'LAL')]
+    assert np.isnan(teams.loc[(2024, 'BOS'), 'raw_pts'])
+
+def test_roster_hashes_ignore_order_and_track_each_team():
+    before = roster_hashes(roster())
+    assert roster_hashes(roster().iloc[::-1]).equals(before)
+
+    changed = roster()
+    changed.loc[3, 'pts'] = 26.0
+    after = roster_hashes(changed)
+    assert after['BOS'] == before['BOS']
+    assert after['LAL'] != before['LAL']
+
+    traded = roster()
+    traded.loc[2, 'team'] = 'LAL'
+    after = roster_hashes(traded)
+    assert after['BOS'] != before['BOS'] and after['LAL'] != before['LAL']